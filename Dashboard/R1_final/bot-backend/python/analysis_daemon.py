@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Netra.R1 Analysis Daemon
+Long-lived video analyzer that keeps the YOLO model warm and works through a
+spool directory of jobs, so an upload no longer pays for a fresh Python
+process, framework imports and a model load
+
+Jobs, status and events live in a spool directory (see analysis_spool.py),
+which behaves the same on Windows and Linux, unlike a Unix socket.
+
+Usage:
+    python analysis_daemon.py --max-jobs 2 --model yolov8n.pt
+    python analysis_daemon.py status [job_id]
+
+analyze_video.py submits to a running daemon automatically (see --no-daemon).
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from analysis_events import AnalysisEvents
+from analysis_spool import (
+    DEFAULT_SPOOL, FINAL_STATES, HEARTBEAT_INTERVAL, daemon_alive, job_status, read_json, spool_path, write_json
+)
+# analyze_video also puts cctv-detection on sys.path for the imports below
+from analyze_video import VideoAnalyzer
+from detection_engine import get_inference_backend
+from inference_backends import BACKENDS, PRECISIONS
+
+
+class JobEvents(AnalysisEvents):
+    def __init__(self, path, analysis_id, on_event):
+        """Analysis events written to the job's events file and mirrored into its status"""
+        super().__init__(open(path, 'a', buffering=1, encoding='utf-8'), analysis_id)
+        self.on_event = on_event
+
+    def emit(self, event, **fields):
+        super().emit(event, **fields)
+        self.on_event(event, fields)
+
+
+class AnalysisDaemon:
+    def __init__(self, spool=None, max_jobs=2, model_path='yolov8n.pt', inference_backend=None,
+                 precision=None, poll_interval=0.5):
+        """
+        Args:
+            spool: Spool directory shared with clients
+            max_jobs: Jobs analyzed concurrently (decoding, tracking and
+                drawing overlap; calls into the shared model take turns)
+            model_path: Default YOLOv8 weights, loaded and warmed up at start
+            inference_backend: Default backend for jobs that don't name one
+            precision: Default precision for jobs that don't name one
+            poll_interval: Seconds between spool scans
+        """
+        self.spool = spool_path(spool)
+        self.incoming = self.spool / 'incoming'
+        self.jobs_dir = self.spool / 'jobs'
+        for path in (self.incoming, self.jobs_dir):
+            path.mkdir(parents=True, exist_ok=True)
+
+        self.max_jobs = max(1, int(max_jobs))
+        self.model_path = model_path
+        self.inference_backend = inference_backend
+        self.precision = precision
+        self.poll_interval = poll_interval
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix='analysis-job')
+        self.running = {}  # job_id -> cancel event
+        self.running_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.started_at = time.time()
+        self.last_heartbeat = 0
+
+    def warm_up(self):
+        """Load the default model and run one inference so the first job starts hot"""
+        print(f"🚀 Loading {self.model_path}...")
+        backend = get_inference_backend(self.model_path, self.inference_backend, self.precision)
+        backend.predict([np.zeros((640, 640, 3), dtype=np.uint8)], 0.5)
+        print(f"✅ Model warm ({backend.name})")
+
+    def recover(self):
+        """Fail jobs left running by a previous daemon that died"""
+        for status_path in self.jobs_dir.glob('*/status.json'):
+            status = read_json(status_path)
+            if status and status.get('state') not in FINAL_STATES:
+                status.update(state='failed', error='Analysis daemon restarted', finished_at=time.time())
+                write_json(status_path, status)
+
+    def heartbeat(self):
+        if time.time() - self.last_heartbeat < HEARTBEAT_INTERVAL:
+            return
+        self.last_heartbeat = time.time()
+        with self.running_lock:
+            running = list(self.running)
+        write_json(self.spool / 'daemon.json', {
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'heartbeat_at': self.last_heartbeat,
+            'max_jobs': self.max_jobs,
+            'model_path': self.model_path,
+            'running': running
+        })
+
+    def claim_jobs(self):
+        """Move queued jobs into jobs/ (oldest first) while there are free slots"""
+        queued = sorted(self.incoming.glob('*.json'), key=lambda p: p.stat().st_mtime)
+        for job_path in queued:
+            with self.running_lock:
+                if len(self.running) >= self.max_jobs:
+                    return
+            job_id = job_path.stem
+            job_dir = self.jobs_dir / job_id
+            job_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                # Atomic claim: only one daemon wins the rename
+                os.replace(job_path, job_dir / 'job.json')
+            except OSError:
+                continue
+
+            job = read_json(job_dir / 'job.json')
+            if job is None:
+                write_json(job_dir / 'status.json', {'job_id': job_id, 'state': 'failed',
+                                                     'error': 'Unreadable job file'})
+                continue
+            if (job_dir / 'cancel').exists():
+                write_json(job_dir / 'status.json', {'job_id': job_id, 'analysis_id': job['analysis_id'],
+                                                     'state': 'cancelled', 'finished_at': time.time()})
+                continue
+
+            cancel_event = threading.Event()
+            with self.running_lock:
+                self.running[job_id] = cancel_event
+            self.executor.submit(self.run_job, job_id, job, cancel_event)
+
+    def check_cancellations(self):
+        with self.running_lock:
+            running = list(self.running.items())
+        for job_id, cancel_event in running:
+            if (self.jobs_dir / job_id / 'cancel').exists():
+                cancel_event.set()
+
+    def run_job(self, job_id, job, cancel_event):
+        """Analyze one job on a pool thread, keeping status.json current"""
+        job_dir = self.jobs_dir / job_id
+        status = {
+            'job_id': job_id,
+            'analysis_id': job['analysis_id'],
+            'video_path': job['video_path'],
+            'state': 'running',
+            'started_at': time.time(),
+            'percent': 0.0,
+            'incidents': 0
+        }
+        write_json(job_dir / 'status.json', status)
+
+        def on_event(event, fields):
+            if event == 'progress':
+                status['percent'] = fields.get('percent', status['percent'])
+            elif event == 'incident':
+                status['incidents'] += 1
+            else:
+                return
+            write_json(job_dir / 'status.json', status)
+
+        events = JobEvents(job_dir / 'events.ndjson', job['analysis_id'], on_event)
+        print(f"▶️ Job {job_id}: {job['video_path']}")
+        try:
+            os.makedirs(job['output_dir'], exist_ok=True)
+            analyzer = VideoAnalyzer(
+                job['video_path'], job['analysis_id'], job['output_dir'],
+                max_stride=job.get('max_stride', 1),
+                motion_threshold=job.get('motion_threshold', 4.0),
+                incident_cooldown=job.get('incident_cooldown', 2.0),
+                model_path=job.get('model_path') or self.model_path,
+                inference_backend=job.get('inference_backend') or self.inference_backend,
+                precision=job.get('precision') or self.precision,
+                events=events,
+                cancel_event=cancel_event
+            )
+            if analyzer.analyze_video(workers=job.get('workers', 1)):
+                status['results_path'] = analyzer.save_results()
+                status['state'] = 'cancelled' if analyzer.cancelled else 'completed'
+                if not analyzer.cancelled:
+                    status['percent'] = 100.0
+            else:
+                status['state'] = 'failed'
+                status['error'] = 'Analysis failed'
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            events.emit('error', message=str(e))
+            status['state'] = 'failed'
+            status['error'] = str(e)
+        finally:
+            events.close()
+            status['finished_at'] = time.time()
+            write_json(job_dir / 'status.json', status)
+            with self.running_lock:
+                self.running.pop(job_id, None)
+            print(f"⏹️ Job {job_id}: {status['state']}")
+
+    def run(self):
+        """Serve jobs until stop() is called"""
+        self.recover()
+        self.warm_up()
+        print(f"📂 Watching {self.spool} ({self.max_jobs} concurrent jobs)")
+
+        while not self.stop_event.is_set():
+            self.heartbeat()
+            self.check_cancellations()
+            self.claim_jobs()
+            self.stop_event.wait(self.poll_interval)
+
+        # Stop taking work and let running jobs save partial results
+        with self.running_lock:
+            for cancel_event in self.running.values():
+                cancel_event.set()
+        self.executor.shutdown(wait=True)
+        (self.spool / 'daemon.json').unlink(missing_ok=True)
+        print("👋 Analysis daemon stopped")
+
+    def stop(self, signum=None, frame=None):
+        self.stop_event.set()
+
+
+def print_status(spool, job_id=None):
+    spool = spool_path(spool)
+    heartbeat = read_json(spool / 'daemon.json')
+    if daemon_alive(spool):
+        print(f"🟢 Daemon pid {heartbeat['pid']}, running: {', '.join(heartbeat['running']) or 'none'}")
+    else:
+        print("🔴 No analysis daemon running")
+
+    if job_id:
+        print(json.dumps(job_status(job_id, spool), indent=2))
+        return
+
+    for job_path in sorted((spool / 'incoming').glob('*.json')):
+        print(f"   {job_path.stem:<40} queued")
+    for status_path in sorted((spool / 'jobs').glob('*/status.json'), key=lambda p: p.stat().st_mtime):
+        status = read_json(status_path) or {}
+        finished = status.get('finished_at')
+        when = datetime.fromtimestamp(finished).strftime('%Y-%m-%d %H:%M:%S') if finished else ''
+        print(f"   {status_path.parent.name:<40} {status.get('state', '?'):<10} "
+              f"{status.get('percent', 0):>5.1f}%  {status.get('incidents', 0)} incidents  {when}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Netra.R1 Analysis Daemon')
+    parser.add_argument('command', nargs='?', default='serve', choices=['serve', 'status'])
+    parser.add_argument('job_id', nargs='?', help='Job to show (status only)')
+    parser.add_argument('--spool', default=None, help=f'Spool directory (default: {DEFAULT_SPOOL})')
+    parser.add_argument('--max-jobs', type=int, default=int(os.environ.get('NETRA_ANALYZER_JOBS', '2')),
+                        help='Videos analyzed concurrently')
+    parser.add_argument('--model', default='yolov8n.pt')
+    parser.add_argument('--backend', choices=BACKENDS, default=None)
+    parser.add_argument('--precision', choices=PRECISIONS, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        print_status(args.spool, args.job_id)
+        return
+
+    if daemon_alive(args.spool):
+        sys.exit(f"❌ A daemon is already running on {spool_path(args.spool)}")
+
+    daemon = AnalysisDaemon(args.spool, args.max_jobs, args.model, args.backend, args.precision)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Analysis Events
+Machine-readable progress stream for the video analyzer
+
+One JSON object per line (NDJSON), each with an "event" field:
+    started    video info, before the first frame
+    progress   frames analyzed so far and percent complete
+    incident   one incident, as soon as it is final
+    clip       an incident's evidence clip, once cut from the source video
+    summary    totals and the results file, once it is written
+    cancelled  analysis stopped early on request (partial results are saved)
+    error      analysis failed
+"""
+
+import json
+import sys
+import threading
+import time
+
+
+class AnalysisEvents:
+    def __init__(self, stream=None, analysis_id=None):
+        """
+        Args:
+            stream: Text stream to write events to (None = events disabled)
+            analysis_id: Added to every event
+        """
+        self.stream = stream
+        self.analysis_id = analysis_id
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open(cls, target, analysis_id=None):
+        """
+        Args:
+            target: '-' for stdout, a file path to append to, or None to disable
+        """
+        if not target:
+            return cls(None, analysis_id)
+        if target == '-':
+            stream = sys.stdout
+            # Human-readable prints move to stderr so stdout stays pure NDJSON
+            sys.stdout = sys.stderr
+        else:
+            stream = open(target, 'a', buffering=1, encoding='utf-8')
+        return cls(stream, analysis_id)
+
+    def emit(self, event, **fields):
+        """Write one event line and flush it immediately"""
+        if self.stream is None:
+            return
+        record = {'event': event, 'analysis_id': self.analysis_id, 'time': round(time.time(), 3), **fields}
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def close(self):
+        if self.stream is not None and self.stream not in (sys.stdout, sys.__stdout__):
+            self.stream.close()
+
+
+class QueueEvents:
+    def __init__(self, queue, chunk_index):
+        """
+        Event sink for chunk processes
+
+        Events are forwarded to the parent through a queue; the parent turns
+        them into whole-video progress.
+        """
+        self.queue = queue
+        self.chunk_index = chunk_index
+
+    def emit(self, event, **fields):
+        self.queue.put((self.chunk_index, event, fields))
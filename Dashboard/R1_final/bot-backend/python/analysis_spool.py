@@ -0,0 +1,163 @@
+"""
+Analysis Spool
+Client side of the analysis daemon's spool directory: submit jobs, read
+their status, follow their events and cancel them
+
+Spool layout:
+    incoming/<job_id>.json       submitted jobs (written atomically by clients)
+    jobs/<job_id>/job.json       job claimed by the daemon
+    jobs/<job_id>/status.json    state, progress, incident count and results path
+    jobs/<job_id>/events.ndjson  the job's analysis events (see analysis_events.py)
+    jobs/<job_id>/cancel         created by a client to cancel the job
+    daemon.json                  daemon heartbeat
+
+A spool directory behaves the same on Windows and Linux, unlike a Unix socket.
+"""
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+DEFAULT_SPOOL = os.environ.get(
+    'NETRA_ANALYZER_SPOOL', str(Path(__file__).resolve().parent / 'analysis_spool')
+)
+
+FINAL_STATES = ('completed', 'cancelled', 'failed')
+
+# A daemon whose heartbeat is older than this is considered gone
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 10.0
+
+
+def spool_path(spool=None):
+    return Path(spool or DEFAULT_SPOOL)
+
+
+def write_json(path, data):
+    """Write JSON atomically (readers never see a half-written file)"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, default=str), encoding='utf-8')
+    for attempt in range(5):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            # Windows refuses to replace a file another process has open
+            time.sleep(0.05 * (attempt + 1))
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    """Read a JSON file, or None if it is missing or unreadable"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def daemon_alive(spool=None):
+    """True if a daemon is heartbeating on this spool"""
+    heartbeat = read_json(spool_path(spool) / 'daemon.json')
+    return bool(heartbeat) and time.time() - heartbeat.get('heartbeat_at', 0) < HEARTBEAT_TIMEOUT
+
+
+def submit_job(job, spool=None):
+    """
+    Queue a job for the daemon
+
+    Args:
+        job: Dict with video_path, analysis_id, output_dir and optional
+            max_stride, motion_threshold, incident_cooldown, workers, model_path,
+            inference_backend, precision. Paths are resolved against the
+            caller's working directory, since the daemon runs in its own
+            (a model_path that isn't a local file, like a hub weight name, is
+            passed through as-is)
+
+    Returns:
+        job_id
+    """
+    incoming = spool_path(spool) / 'incoming'
+    incoming.mkdir(parents=True, exist_ok=True)
+
+    job_id = f"{job['analysis_id']}-{uuid.uuid4().hex[:8]}"
+    job = {
+        **job,
+        'job_id': job_id,
+        'video_path': os.path.abspath(job['video_path']),
+        'output_dir': os.path.abspath(job['output_dir']),
+        'submitted_at': time.time()
+    }
+    if job.get('model_path') and os.path.exists(job['model_path']):
+        job['model_path'] = os.path.abspath(job['model_path'])
+    write_json(incoming / f"{job_id}.json", job)
+    return job_id
+
+
+def job_status(job_id, spool=None):
+    """
+    Returns:
+        Status dict, {'state': 'queued'} while waiting, or None if unknown
+    """
+    spool = spool_path(spool)
+    status = read_json(spool / 'jobs' / job_id / 'status.json')
+    if status:
+        return status
+    if (spool / 'incoming' / f"{job_id}.json").exists():
+        return {'job_id': job_id, 'state': 'queued'}
+    return None
+
+
+def cancel_job(job_id, spool=None):
+    """Ask the daemon to cancel a job (queued jobs are dropped, running ones stop early)"""
+    spool = spool_path(spool)
+    job_dir = spool / 'jobs' / job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
+    (job_dir / 'cancel').touch()
+
+
+def follow_job(job_id, spool=None, on_event=None, cancel_event=None, poll_interval=0.5):
+    """
+    Wait for a job to finish, passing each of its events to on_event
+
+    Args:
+        on_event: Called with every event dict, in order
+        cancel_event: When set, the job is cancelled (and still waited for)
+
+    Returns:
+        Final status dict
+    """
+    spool = spool_path(spool)
+    events_path = spool / 'jobs' / job_id / 'events.ndjson'
+    offset = 0
+    pending = b''
+    cancel_sent = False
+
+    def read_events():
+        nonlocal offset, pending
+        if not events_path.exists():
+            return
+        with open(events_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        offset += len(data)
+        *lines, pending = (pending + data).split(b'\n')
+        for line in lines:
+            if line.strip() and on_event:
+                on_event(json.loads(line))
+
+    while True:
+        if cancel_event is not None and cancel_event.is_set() and not cancel_sent:
+            cancel_job(job_id, spool)
+            cancel_sent = True
+
+        read_events()
+        status = job_status(job_id, spool)
+        if status and status['state'] in FINAL_STATES:
+            read_events()
+            return status
+        if not daemon_alive(spool):
+            return {'job_id': job_id, 'state': 'failed', 'error': 'Analysis daemon is not running'}
+        time.sleep(poll_interval)
@@ -5,61 +5,136 @@ Analyzes uploaded videos to detect garbage throwing incidents with face detectio
 """
 
 import sys
+import argparse
 import cv2
 import json
 import os
 from pathlib import Path
-from ultralytics import YOLO
 import numpy as np
 from datetime import datetime
 import requests
 from PIL import Image
 import base64
+import signal
+import threading
+import queue
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared detection helpers live with the CCTV detectors
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'cctv-detection'))
+from detection_result import DetectionResult
+from detection_engine import DetectionEngine
+from inference_backends import BACKENDS, PRECISIONS
+from video_segments import concat_videos, cut_clip, plan_chunks, probe_keyframes
+from analysis_events import AnalysisEvents, QueueEvents
+from analysis_spool import daemon_alive, follow_job, submit_job
 
 class VideoAnalyzer:
-    def __init__(self, video_path, analysis_id, output_dir):
+    def __init__(self, video_path, analysis_id, output_dir, max_stride=1, motion_threshold=4.0,
+                 model_path='yolov8n.pt', inference_backend=None, precision=None,
+                 garbage_classes=None, events=None, cancel_event=None, incident_cooldown=2.0,
+                 dedup_radius=150):
+        """
+        Args:
+            video_path: Uploaded video to analyze
+            analysis_id: ID used to name all output files
+            output_dir: Directory for results, screenshots and clips
+            max_stride: Maximum frames between YOLO runs (1 = run on every frame)
+            motion_threshold: Mean pixel difference that forces a YOLO run early
+            model_path: YOLOv8 weights (.pt) or exported .onnx model
+            inference_backend: 'torch', 'onnxruntime', 'openvino' or 'auto'
+            precision: 'fp32' or 'int8' (static INT8 ONNX model)
+            garbage_classes: {class_id: name} map overriding the built-in object set
+            events: AnalysisEvents sink for machine-readable progress (default: disabled)
+            cancel_event: Event that stops the analysis early when set
+            incident_cooldown: Seconds of video a person must stop being an
+                incident candidate before they can trigger another incident
+            dedup_radius: Candidates this close (pixels) to a recent incident count
+                as the same incident even under a different track ID
+        """
         self.video_path = video_path
         self.analysis_id = analysis_id
         self.output_dir = output_dir
         
-        # Load YOLO model
+        # Progress stream and early cancellation
+        self.events = events or AnalysisEvents(analysis_id=analysis_id)
+        self.cancel_event = cancel_event or threading.Event()
+        self.cancelled = False
+        
+        # Everything a chunk process needs to build an identical analyzer
+        self.options = {
+            'max_stride': max_stride,
+            'motion_threshold': motion_threshold,
+            'model_path': model_path,
+            'inference_backend': inference_backend,
+            'precision': precision,
+            'garbage_classes': garbage_classes,
+            'incident_cooldown': incident_cooldown,
+            'dedup_radius': dedup_radius
+        }
+        
+        # Load YOLO model (once per process, shared with other analyzers)
         print("Loading YOLO model...")
-        self.model = YOLO('yolov8n.pt')  # Using nano model for speed
+        self.person_confidence = 0.4
+        self.garbage_confidence = 0.3
+        self.engine = DetectionEngine(
+            model_path,
+            garbage_classes=garbage_classes,
+            default_garbage_classes={
+                39: 'bottle',
+                40: 'wine glass',
+                41: 'cup',
+                42: 'fork',
+                43: 'knife',
+                44: 'spoon',
+                45: 'bowl',
+                46: 'banana',
+                47: 'apple',
+                48: 'sandwich',
+                49: 'orange',
+                50: 'broccoli',
+                51: 'carrot',
+                64: 'potted plant',
+                73: 'book',
+                76: 'scissors',
+            },
+            person_confidence=self.person_confidence,
+            garbage_confidence=self.garbage_confidence,
+            inference_backend=inference_backend,
+            precision=precision
+        )
+        self.inference = self.engine.inference
+        self.person_class_id = self.engine.person_class_id
+        self.garbage_classes = self.engine.garbage_classes
+        self.inference_classes = self.engine.inference_classes
         
         # Load face detection model
         face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         self.face_cascade = cv2.CascadeClassifier(face_cascade_path)
         
-        # Detection settings
-        self.person_confidence = 0.4
-        self.garbage_confidence = 0.3
+        # Adaptive inference stride
+        self.max_stride = max(1, int(max_stride))
+        self.motion_threshold = motion_threshold
+        self.dense_window = 30  # Frames inferred back-to-back around candidates/incidents
+        self.frames_inferred = 0
+        self.frames_skipped = 0
         
         # Tracking data
         self.incidents = []
-        self.frame_buffer = []
-        self.buffer_size = 300  # 10 seconds at 30 fps
+        self.clip_seconds = 10  # Evidence clip length, ending at the incident frame
         self.annotated_frames = []  # Store frames with bounding boxes
         
-        # Classes of interest
-        self.person_class_id = 0  # COCO class for person
-        self.garbage_classes = {
-            39: 'bottle',
-            40: 'wine glass',
-            41: 'cup',
-            42: 'fork',
-            43: 'knife',
-            44: 'spoon',
-            45: 'bowl',
-            46: 'banana',
-            47: 'apple',
-            48: 'sandwich',
-            49: 'orange',
-            50: 'broccoli',
-            51: 'carrot',
-            64: 'potted plant',
-            73: 'book',
-            76: 'scissors',
-        }
+        # Duplicate suppression: per-track cooldown in video time, plus a
+        # spatial check that survives track ID switches
+        self.incident_cooldown = incident_cooldown
+        self.dedup_radius = dedup_radius
+        self.track_last_candidate = {}  # track_id -> video_seconds it was last a candidate
+        self.recent_incidents = []  # (video_seconds, center) of reported incidents
+        self.incidents_suppressed = 0
+        
+        # Parallel mode: shortest chunk worth its own process
+        self.min_chunk_seconds = 60
         
     def detect_faces(self, frame):
         """Detect faces in frame using Haar Cascade"""
@@ -119,14 +194,19 @@ class VideoAnalyzer:
         
         return face_path
     
-    def save_screenshot(self, frame, incident_num, timestamp):
+    def save_screenshot(self, frame, incident_num, timestamp, video_seconds=None):
         """Save incident screenshot with timestamp overlay"""
         # Add timestamp overlay
         overlay = frame.copy()
         cv2.rectangle(overlay, (10, 10), (400, 60), (0, 0, 0), -1)
         cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
         
-        timestamp_text = f"Incident #{incident_num}"
+        # Position in the video stays correct when chunked incidents are renumbered
+        if video_seconds is not None:
+            minutes, seconds = divmod(int(video_seconds), 60)
+            timestamp_text = f"Incident at {minutes:02d}:{seconds:02d}"
+        else:
+            timestamp_text = f"Incident #{incident_num}"
         time_text = timestamp.strftime("%Y-%m-%d %H:%M:%S")
         
         cv2.putText(frame, timestamp_text, (20, 35),
@@ -141,228 +221,454 @@ class VideoAnalyzer:
         
         return screenshot_path
     
-    def save_video_clip(self, incident_num, start_frame_idx, end_frame_idx):
-        """Save video clip of incident from buffer"""
-        if not self.frame_buffer:
-            return None
-        
+    def save_video_clip(self, incident_num, start_frame_idx, end_frame_idx, fps, frame_size):
+        """Cut the incident clip out of the source video"""
         video_filename = f"{self.analysis_id}_video_{incident_num}.mp4"
         video_path = os.path.join(self.output_dir, video_filename)
+        return cut_clip(self.video_path, video_path, start_frame_idx, end_frame_idx, fps, frame_size)
+    
+    def extract_clips(self, fps, frame_size):
+        """
+        Cut every incident's evidence clip from the source file
         
-        # Get frame dimensions
-        height, width = self.frame_buffer[0].shape[:2]
-        
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        fps = 30
-        out = cv2.VideoWriter(video_path, fourcc, fps, (width, height))
-        
-        # Write frames
-        for frame in self.frame_buffer[start_frame_idx:end_frame_idx]:
-            out.write(frame)
-        
-        out.release()
-        return video_path
+        Runs once analysis is done, so no decoded frames have to be kept
+        around while analyzing.
+        """
+        clip_frames = int(self.clip_seconds * max(fps, 1))
+        for incident_num, incident in enumerate(self.incidents, start=1):
+            end_frame = incident['frame_number']
+            incident['video_url'] = self.save_video_clip(
+                incident_num, max(0, end_frame - clip_frames), end_frame, fps, frame_size
+            )
+            if incident['video_url']:
+                self.events.emit('clip', incident_id=incident['incident_id'], video_url=incident['video_url'])
+            else:
+                print(f"⚠️ Could not cut clip for {incident['incident_id']}")
+    
+    def motion_thumbnail(self, frame):
+        """Small blurred grayscale copy of a frame for cheap motion scoring"""
+        gray = cv2.cvtColor(cv2.resize(frame, (160, 90), interpolation=cv2.INTER_AREA),
+                            cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+    
+    def motion_score(self, thumbnail, reference):
+        """Mean absolute difference between two motion thumbnails"""
+        if reference is None:
+            return float('inf')
+        return float(cv2.absdiff(thumbnail, reference).mean())
+    
+    def draw_detections(self, annotated_frame, persons, objects):
+        """Draw person (green) and garbage (red) boxes onto a frame"""
+        return self.engine.draw(annotated_frame, {'persons': persons, 'garbage': objects})
+    
+    def detect_objects(self, frame):
+        """Run YOLO and return (persons, objects) above their confidence thresholds"""
+        detections = self.engine.detect(frame)
+        return detections['persons'], detections['garbage']
     
     def detect_throwing_incident(self, frame, frame_number, persons, objects):
         """
         Detect if someone is throwing garbage
         Enhanced detection: person + garbage + motion
+        
+        Returns:
+            Indices of persons with garbage nearby (incident candidates)
         """
-        if len(persons) == 0:
-            return False, None
-        
-        # If we have both person and garbage in frame, it's a potential incident
-        if len(objects) > 0:
-            for person in persons:
-                px1, py1, px2, py2 = person['bbox']
-                person_center_x = (px1 + px2) / 2
-                person_center_y = (py1 + py2) / 2
-                
-                for obj in objects:
-                    ox1, oy1, ox2, oy2 = obj['bbox']
-                    obj_center_x = (ox1 + ox2) / 2
-                    obj_center_y = (oy1 + oy2) / 2
-                    
-                    # Check if garbage is near person (within 250 pixels)
-                    distance = np.sqrt(
-                        (person_center_x - obj_center_x)**2 + 
-                        (person_center_y - obj_center_y)**2
-                    )
-                    
-                    if distance < 250:
-                        # Return the person's bbox for face extraction
-                        return True, person['bbox']
-        
-        return False, None
+        if len(persons) == 0 or len(objects) == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        # Garbage near a person (within 250 pixels) makes them a candidate
+        person_idx, _, _ = self.engine.near_pairs({'persons': persons, 'garbage': objects}, 250)
+        return np.unique(person_idx)
     
-    def analyze_video(self):
-        """Main video analysis function"""
+    def is_duplicate_incident(self, track_id, center, video_seconds):
+        """
+        Check a candidate against the cooldown and remember it
+        
+        A candidate is a duplicate if the same track was a candidate less
+        than incident_cooldown seconds of video ago, or an incident was
+        reported within dedup_radius pixels in that time. The per-track
+        window slides: a person who stays next to the garbage keeps being
+        suppressed until they leave it for a while. The spatial check does
+        not slide, so other people at a busy spot are reported once the
+        last incident there is older than the cooldown.
+        """
+        self.track_last_candidate = {
+            tid: seconds for tid, seconds in self.track_last_candidate.items()
+            if video_seconds - seconds < self.incident_cooldown
+        }
+        self.recent_incidents = [
+            entry for entry in self.recent_incidents
+            if video_seconds - entry[0] < self.incident_cooldown
+        ]
+        
+        duplicate = track_id in self.track_last_candidate or any(
+            np.hypot(*(incident_center - center)) < self.dedup_radius
+            for _, incident_center in self.recent_incidents
+        )
+        self.track_last_candidate[track_id] = video_seconds
+        if not duplicate:
+            self.recent_incidents.append((video_seconds, center))
+        return duplicate
+    
+    def record_incident(self, frame, annotated_frame, frame_number, fps, person_index, persons, objects):
+        """Capture evidence for one incident and append it to self.incidents"""
+        incident_num = len(self.incidents) + 1
+        timestamp = datetime.now()
+        
+        print(f"🚨 Incident #{incident_num} detected at frame {frame_number}")
+        
+        # Capture the person's full image (culprit)
+        person_bbox = persons.boxes[person_index]
+        person_image_path = self.capture_person_image(frame, person_bbox, incident_num)
+        print(f"   👤 Person image captured!")
+        
+        # Also try to detect face for better identification
+        faces = self.detect_faces(frame)
+        face_path = None
+        
+        if len(faces) > 0:
+            print(f"   � Face also detected!")
+            face_path = self.capture_face(frame, faces[0], incident_num)
+        
+        # Save screenshot
+        screenshot_path = self.save_screenshot(annotated_frame, incident_num, timestamp,
+                                               video_seconds=frame_number / max(fps, 1))
+        
+        # Get garbage type and confidence
+        garbage_type = objects.label(0, self.garbage_classes) if len(objects) else 'Unknown item'
+        avg_confidence = objects.scores.mean() if len(objects) else 0.5
+        
+        # Store incident data
+        self.incidents.append({
+            'incident_id': f"{self.analysis_id}_INC{incident_num:04d}",
+            'frame_number': frame_number,
+            'video_time_seconds': round(frame_number / max(fps, 1), 3),
+            'track_id': int(persons.track_ids[person_index]),
+            'person_bbox': [float(v) for v in person_bbox],
+            'timestamp': timestamp.isoformat(),
+            'person_image_url': person_image_path,  # Main culprit image
+            'culprit_face_url': face_path,  # Face zoom if available
+            'screenshot_url': screenshot_path,
+            'video_url': None,  # Cut from the source after analysis
+            'video_duration_seconds': self.clip_seconds,
+            'garbage_type': garbage_type,
+            'confidence': float(avg_confidence),
+            'persons_detected': len(persons),
+            'objects_detected': len(objects)
+        })
+        self.events.emit('incident', incident=self.incidents[-1])
+    
+    def analyze_video(self, workers=1):
+        """
+        Main video analysis function
+        
+        Args:
+            workers: Processes to split the video across (1 = analyze sequentially)
+        """
         print(f"📹 Analyzing video: {self.video_path}")
         
         cap = cv2.VideoCapture(self.video_path)
         
         if not cap.isOpened():
             print(f"❌ Error: Cannot open video file")
+            self.events.emit('error', message='Cannot open video file')
             return False
         
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
         
         print(f"📊 Video info: {total_frames} frames, {fps} FPS, {width}x{height}")
+        self.events.emit('started', video_path=self.video_path, total_frames=total_frames,
+                         fps=fps, width=width, height=height, workers=workers)
         
-        # Create video writer for annotated output
         output_video_path = os.path.join(self.output_dir, f"{self.analysis_id}_analyzed.mp4")
+        
+        chunks = []
+        if workers > 1:
+            # Each chunk re-decodes enough frames before its own range to
+            # rebuild the tracker and incident cooldowns at the border
+            chunks = plan_chunks(
+                total_frames, fps, workers,
+                int(self.incident_cooldown * max(fps, 1)) + self.dense_window,
+                keyframes=probe_keyframes(self.video_path),
+                min_chunk_frames=self.min_chunk_seconds * max(fps, 1)
+            )
+        
+        if len(chunks) > 1:
+            ok = self.analyze_parallel(chunks, workers, output_video_path, fps, (width, height), total_frames)
+        else:
+            ok = self.analyze_segment(output_video_path)
+        
+        if not ok:
+            self.events.emit('error', message='Analysis failed')
+            return False
+        
+        self.extract_clips(fps, (width, height))
+        
+        if self.cancelled:
+            print(f"\n⏹️ Analysis cancelled")
+        else:
+            print(f"\n✅ Analysis complete!")
+        print(f"   Total incidents detected: {len(self.incidents)}")
+        print(f"   Faces captured: {sum(1 for i in self.incidents if i['culprit_face_url'])}")
+        print(f"   Duplicate candidates suppressed: {self.incidents_suppressed}")
+        print(f"   Frames inferred: {self.frames_inferred}, skipped: {self.frames_skipped}")
+        print(f"   Analyzed video saved: {output_video_path}")
+        
+        self.analyzed_video_path = output_video_path
+        return True
+    
+    def analyze_segment(self, output_video_path, decode_start=0, start=0, end=None):
+        """
+        Analyze frames [start, end) of the video (end None = until the end)
+        
+        Decoding begins at decode_start; frames before start only warm up the
+        person tracker and incident cooldowns and are neither written nor
+        reported (evidence clips are cut from the source file afterwards).
+        """
+        cap = cv2.VideoCapture(self.video_path)
+        
+        if not cap.isOpened():
+            print(f"❌ Error: Cannot open video file")
+            return False
+        
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        last_frame = total_frames if end is None else end
+        
+        if decode_start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, decode_start)
+        
+        # Create video writer for annotated output
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
         
-        frame_number = 0
-        incident_count = 0
+        frame_number = decode_start
+        
+        # Adaptive stride state
+        persons = objects = DetectionResult.empty()
+        reference_thumbnail = None
+        frames_since_inference = 0
+        dense_until = 0
         
         while cap.isOpened():
+            if end is not None and frame_number >= end:
+                break
+            
+            if self.cancel_event.is_set():
+                self.cancelled = True
+                break
+            
             ret, frame = cap.read()
             if not ret:
                 break
             
             frame_number += 1
-            
-            # Add to buffer
-            self.frame_buffer.append(frame.copy())
-            if len(self.frame_buffer) > self.buffer_size:
-                self.frame_buffer.pop(0)
+            owned = frame_number > start
             
             # Create annotated frame
             annotated_frame = frame.copy()
             
-            # Run YOLO detection
-            results = self.model(frame, verbose=False)
+            # Decide whether this frame needs a YOLO run
+            thumbnail = self.motion_thumbnail(frame) if self.max_stride > 1 else None
+            run_inference = (
+                self.max_stride == 1 or
+                frames_since_inference + 1 >= self.max_stride or
+                frame_number <= dense_until or
+                self.motion_score(thumbnail, reference_thumbnail) >= self.motion_threshold
+            )
             
-            persons = []
-            objects = []
+            if run_inference:
+                persons, objects = self.detect_objects(frame)
+                self.engine.track({'persons': persons, 'garbage': objects}, 'video')
+                self.frames_inferred += 1
+                frames_since_inference = 0
+                reference_thumbnail = thumbnail
+            else:
+                # Reuse the last detections on low-motion frames
+                self.frames_skipped += 1
+                frames_since_inference += 1
             
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    cls = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    bbox = box.xyxy[0].cpu().numpy()
-                    x1, y1, x2, y2 = map(int, bbox)
-                    
-                    # Draw bounding boxes on annotated frame
-                    if cls == self.person_class_id and conf >= self.person_confidence:
-                        persons.append({
-                            'bbox': bbox,
-                            'confidence': conf
-                        })
-                        # Draw green box for persons
-                        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        cv2.putText(annotated_frame, f'Person {conf:.2f}', (x1, y1-10),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                    
-                    elif cls in self.garbage_classes and conf >= self.garbage_confidence:
-                        objects.append({
-                            'bbox': bbox,
-                            'confidence': conf,
-                            'class': cls,
-                            'name': self.garbage_classes[cls]
-                        })
-                        # Draw red box for garbage
-                        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                        cv2.putText(annotated_frame, f'{self.garbage_classes[cls]} {conf:.2f}', 
-                                  (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+            self.draw_detections(annotated_frame, persons, objects)
             
             # Write annotated frame
-            out.write(annotated_frame)
-            
-            # Check for throwing incident
-            incident_detected, person_bbox = self.detect_throwing_incident(frame, frame_number, persons, objects)
+            if owned:
+                out.write(annotated_frame)
             
-            if incident_detected and person_bbox is not None:
-                incident_count += 1
-                timestamp = datetime.now()
-                
-                print(f"🚨 Incident #{incident_count} detected at frame {frame_number}")
-                
-                # Capture the person's full image (culprit)
-                person_image_path = self.capture_person_image(frame, person_bbox, incident_count)
-                print(f"   👤 Person image captured!")
-                
-                # Also try to detect face for better identification
-                faces = self.detect_faces(frame)
-                face_path = None
-                
-                if len(faces) > 0:
-                    print(f"   � Face also detected!")
-                    face_path = self.capture_face(frame, faces[0], incident_count)
-                
-                # Save screenshot
-                screenshot_path = self.save_screenshot(annotated_frame, incident_count, timestamp)
-                
-                # Save video clip (last 10 seconds from buffer)
-                buffer_start = max(0, len(self.frame_buffer) - self.buffer_size)
-                video_path = self.save_video_clip(
-                    incident_count,
-                    buffer_start,
-                    len(self.frame_buffer)
-                )
+            # Check for throwing incident (only on freshly inferred frames)
+            if run_inference:
+                candidates = self.detect_throwing_incident(frame, frame_number, persons, objects)
                 
-                # Get garbage type and confidence
-                garbage_type = objects[0]['name'] if objects else 'Unknown item'
-                avg_confidence = np.mean([obj['confidence'] for obj in objects]) if objects else 0.5
-                
-                # Store incident data
-                incident_data = {
-                    'incident_id': f"{self.analysis_id}_INC{incident_count:04d}",
-                    'frame_number': frame_number,
-                    'timestamp': timestamp.isoformat(),
-                    'person_image_url': person_image_path,  # Main culprit image
-                    'culprit_face_url': face_path,  # Face zoom if available
-                    'screenshot_url': screenshot_path,
-                    'video_url': video_path,
-                    'video_duration_seconds': 10,
-                    'garbage_type': garbage_type,
-                    'confidence': float(avg_confidence),
-                    'persons_detected': len(persons),
-                    'objects_detected': len(objects)
-                }
-                
-                self.incidents.append(incident_data)
-                
-                # Skip next 60 frames to avoid duplicate detections (2 seconds)
-                for _ in range(60):
-                    ret, frame = cap.read()
-                    if ret:
-                        out.write(frame)
-                    frame_number += 1
+                # Sample densely while a person and garbage are both in view
+                if len(persons) > 0 and len(objects) > 0:
+                    dense_until = frame_number + self.dense_window
+            else:
+                candidates = ()
+            
+            video_seconds = frame_number / max(fps, 1)
+            for person_index in candidates:
+                # Warm-up frames only replay the cooldown state; their incidents
+                # belong to the previous chunk
+                if self.is_duplicate_incident(int(persons.track_ids[person_index]),
+                                              persons.centers[person_index], video_seconds):
+                    if owned:
+                        self.incidents_suppressed += 1
+                elif owned:
+                    self.record_incident(frame, annotated_frame, frame_number, fps,
+                                         person_index, persons, objects)
             
             # Progress indicator
-            if frame_number % 100 == 0:
-                progress = (frame_number / total_frames) * 100
-                print(f"   Progress: {progress:.1f}% ({frame_number}/{total_frames} frames)")
+            if frame_number % 100 == 0 and owned:
+                progress = (frame_number - start) / max(last_frame - start, 1) * 100
+                print(f"   Progress: {progress:.1f}% ({frame_number}/{last_frame} frames)")
+                self.events.emit('progress', frame=frame_number, total_frames=last_frame,
+                                 processed=frame_number - start, percent=round(progress, 1))
         
         cap.release()
         out.release()
         
-        print(f"\n✅ Analysis complete!")
-        print(f"   Total incidents detected: {incident_count}")
-        print(f"   Faces captured: {sum(1 for i in self.incidents if i['culprit_face_url'])}")
-        print(f"   Analyzed video saved: {output_video_path}")
-        
         self.analyzed_video_path = output_video_path
         return True
     
+    def analyze_parallel(self, chunks, workers, output_video_path, fps, frame_size, total_frames):
+        """
+        Analyze chunks in a process pool, then stitch the annotated parts and
+        merge the incidents
+        """
+        workers = min(workers, len(chunks))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"⚡ Splitting into {len(chunks)} chunks across {workers} processes")
+        
+        manager = mp.get_context('spawn').Manager()
+        event_queue = manager.Queue()
+        chunk_cancel = manager.Event()
+        
+        # Turn per-chunk progress into whole-video progress and pass
+        # cancellation on to the chunk processes
+        forwarding = threading.Event()
+        
+        def forward_events():
+            processed = {}
+            while forwarding.is_set():
+                if self.cancel_event.is_set():
+                    chunk_cancel.set()
+                try:
+                    chunk_index, event, fields = event_queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if event == 'progress':
+                    processed[chunk_index] = fields['processed']
+                    done = sum(processed.values())
+                    self.events.emit('progress', processed=done, total_frames=total_frames,
+                                     percent=round(min(99.9, done / max(total_frames, 1) * 100), 1))
+        
+        forwarding.set()
+        forwarder = threading.Thread(target=forward_events, name='chunk-events', daemon=True)
+        forwarder.start()
+        
+        parts = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                                     initializer=_init_chunk_worker, initargs=(threads,)) as pool:
+                futures = [
+                    pool.submit(analyze_chunk, self.video_path, self.analysis_id,
+                                self.output_dir, self.options, chunk, event_queue, chunk_cancel)
+                    for chunk in chunks
+                ]
+                # Chunks finish roughly in order; merging them in order lets
+                # incidents be reported as soon as everything before them is done
+                for future in futures:
+                    part = future.result()
+                    parts.append(part)
+                    if part['ok']:
+                        self.merge_incidents(part['incidents'])
+                    self.cancelled = self.cancelled or part['cancelled']
+        finally:
+            forwarding.clear()
+            forwarder.join()
+            manager.shutdown()
+        
+        if not all(part['ok'] for part in parts):
+            print(f"❌ Error: A chunk failed to analyze")
+            return False
+        
+        part_paths = [part['video_path'] for part in parts]
+        concat_videos(part_paths, output_video_path, fps, frame_size)
+        for path in part_paths:
+            os.remove(path)
+        
+        for part in parts:
+            self.frames_inferred += part['frames_inferred']
+            self.frames_skipped += part['frames_skipped']
+            self.incidents_suppressed += part['incidents_suppressed']
+        return True
+    
+    def merge_incidents(self, incidents):
+        """
+        Append one chunk's incidents, merged in frame order
+        
+        Chunks must be merged in order. Track IDs restart in every chunk, so
+        an incident within the cooldown and dedup radius of the previous one
+        is treated as the same event seen from both sides of a border and is
+        dropped. Kept incidents are renumbered, their evidence files renamed
+        to the names a sequential run would have produced, and reported as
+        incident events.
+        """
+        evidence_fields = [
+            ('person_image_url', 'person'),
+            ('culprit_face_url', 'face'),
+            ('screenshot_url', 'screenshot')
+        ]
+        
+        def center(incident):
+            x1, y1, x2, y2 = incident['person_bbox']
+            return np.array([(x1 + x2) / 2, (y1 + y2) / 2])
+        
+        for incident in sorted(incidents, key=lambda i: i['frame_number']):
+            previous = self.incidents[-1] if self.incidents else None
+            if (previous is not None and
+                    incident['video_time_seconds'] - previous['video_time_seconds'] < self.incident_cooldown and
+                    np.hypot(*(center(incident) - center(previous))) < self.dedup_radius):
+                self.incidents_suppressed += 1
+                for field, _ in evidence_fields:
+                    if incident[field] and os.path.exists(incident[field]):
+                        os.remove(incident[field])
+                continue
+            
+            incident_num = len(self.incidents) + 1
+            incident['incident_id'] = f"{self.analysis_id}_INC{incident_num:04d}"
+            for field, kind in evidence_fields:
+                if incident[field]:
+                    extension = os.path.splitext(incident[field])[1]
+                    path = os.path.join(self.output_dir, f"{self.analysis_id}_{kind}_{incident_num}{extension}")
+                    os.replace(incident[field], path)
+                    incident[field] = path
+            self.incidents.append(incident)
+            self.events.emit('incident', incident=incident)
+    
     def save_results(self):
         """Save analysis results to JSON"""
         results = {
             'analysis_id': self.analysis_id,
+            'status': 'cancelled' if self.cancelled else 'completed',
             'timestamp': datetime.now().isoformat(),
             'analyzed_video_url': self.analyzed_video_path,
             'incidents': self.incidents,
             'culprits': [i for i in self.incidents if i.get('culprit_face_url')],
             'garbage_detected': sum(i['objects_detected'] for i in self.incidents),
-            'avg_confidence': np.mean([i['confidence'] for i in self.incidents]) if self.incidents else 0
+            'avg_confidence': np.mean([i['confidence'] for i in self.incidents]) if self.incidents else 0,
+            'inference_stats': {
+                'max_stride': self.max_stride,
+                'frames_inferred': self.frames_inferred,
+                'frames_skipped': self.frames_skipped
+            },
+            'suppressed_incidents': self.incidents_suppressed
         }
         
         results_path = os.path.join(self.output_dir, f"{self.analysis_id}_results.json")
@@ -370,31 +676,197 @@ class VideoAnalyzer:
             json.dump(results, f, indent=2)
         
         print(f"💾 Results saved to: {results_path}")
+        self.events.emit(
+            'cancelled' if self.cancelled else 'summary',
+            results_path=results_path,
+            analyzed_video_url=self.analyzed_video_path,
+            incidents=len(self.incidents),
+            culprits=len(results['culprits']),
+            suppressed_incidents=self.incidents_suppressed,
+            inference_stats=results['inference_stats']
+        )
         return results_path
 
+def _init_chunk_worker(threads):
+    """Give each chunk process its share of the cores"""
+    # Ctrl+C reaches the whole process group; the parent cancels chunks itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Chunk processes inherit the real stdout, which may be carrying NDJSON events
+    sys.stdout = sys.stderr
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+def analyze_chunk(video_path, analysis_id, output_dir, options, chunk, event_queue=None, cancel_event=None):
+    """
+    Analyze one chunk in a pool process
+    
+    The model is loaded once per process and reused for every chunk it runs.
+    """
+    part_id = f"{analysis_id}_part{chunk['index']:03d}"
+    events = QueueEvents(event_queue, chunk['index']) if event_queue is not None else None
+    analyzer = VideoAnalyzer(video_path, part_id, output_dir, events=events,
+                             cancel_event=cancel_event, **options)
+    video_path = os.path.join(output_dir, f"{part_id}_analyzed.mp4")
+    ok = analyzer.analyze_segment(video_path, chunk['decode_start'], chunk['start'], chunk['end'])
+    return {
+        'ok': ok,
+        'cancelled': analyzer.cancelled,
+        'video_path': video_path,
+        'incidents': analyzer.incidents,
+        'frames_inferred': analyzer.frames_inferred,
+        'frames_skipped': analyzer.frames_skipped,
+        'incidents_suppressed': analyzer.incidents_suppressed
+    }
+
+def watch_for_cancel(cancel_event):
+    """
+    Set cancel_event on SIGTERM/SIGINT, or when a "cancel" line arrives on
+    stdin (the portable way to stop it from a parent process on Windows)
+    """
+    def cancel(signum=None, frame=None):
+        if not cancel_event.is_set():
+            print("⏹️ Cancellation requested, finishing current frame...")
+        cancel_event.set()
+    
+    signal.signal(signal.SIGTERM, cancel)
+    signal.signal(signal.SIGINT, cancel)
+    
+    def read_stdin():
+        for line in sys.stdin:
+            if line.strip().lower() == 'cancel':
+                cancel()
+                return
+    
+    if not sys.stdin.isatty():
+        threading.Thread(target=read_stdin, name='stdin-cancel', daemon=True).start()
+
+def run_in_daemon(args, events):
+    """
+    Hand the analysis to a running analysis daemon and relay its events
+    
+    Returns:
+        Process exit code (0 completed, 130 cancelled, 1 failed)
+    """
+    job = {
+        'video_path': args.video_path,
+        'analysis_id': args.analysis_id,
+        'output_dir': args.output_dir,
+        'max_stride': args.max_stride,
+        'motion_threshold': args.motion_threshold,
+        'workers': args.workers,
+        'incident_cooldown': args.incident_cooldown,
+        'inference_backend': args.backend,
+        'precision': args.precision
+    }
+    # Without --model the job runs on the model the daemon already has warm
+    if args.model:
+        job['model_path'] = args.model
+    job_id = submit_job(job, args.spool)
+    print(f"📨 Submitted to analysis daemon as job {job_id}")
+    
+    def relay(record):
+        event = record.pop('event')
+        if event == 'progress':
+            print(f"   Progress: {record['percent']:.1f}%")
+        elif event == 'incident':
+            print(f"🚨 Incident {record['incident']['incident_id']} at frame {record['incident']['frame_number']}")
+        events.emit(event, **record)
+    
+    cancel_event = threading.Event()
+    watch_for_cancel(cancel_event)
+    status = follow_job(job_id, args.spool, on_event=relay, cancel_event=cancel_event)
+    
+    if status['state'] == 'completed':
+        print(f"💾 Results saved to: {status.get('results_path')}")
+        print("\n" + "=" * 60)
+        print("✨ Analysis completed successfully!")
+        print("=" * 60)
+        return 0
+    if status['state'] == 'cancelled':
+        print("\n⏹️ Analysis cancelled")
+        return 130
+    print(f"\n❌ Analysis failed: {status.get('error', 'unknown error')}")
+    if status.get('error') == 'Analysis daemon is not running':
+        events.emit('error', message=status['error'])
+    return 1
+
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: python analyze_video.py <video_path> <analysis_id> <output_dir>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Netra.R1 Video Analyzer')
+    parser.add_argument('video_path')
+    parser.add_argument('analysis_id')
+    parser.add_argument('output_dir')
+    parser.add_argument('--max-stride', type=int, default=1,
+                        help='Maximum frames between YOLO runs on low-motion footage (1 = every frame)')
+    parser.add_argument('--motion-threshold', type=float, default=4.0,
+                        help='Mean pixel difference that forces an early YOLO run')
+    parser.add_argument('--model', default=None,
+                        help="YOLOv8 weights (.pt) or exported .onnx model (default: yolov8n.pt, "
+                             "or the daemon's model)")
+    parser.add_argument('--backend', choices=BACKENDS, default=None,
+                        help='Inference backend (default: YOLO_BACKEND env var, else torch)')
+    parser.add_argument('--precision', choices=PRECISIONS, default=None,
+                        help='int8 uses the static INT8 model (default: YOLO_PRECISION env var, else fp32)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Analyze long videos as parallel chunks across this many processes')
+    parser.add_argument('--incident-cooldown', type=float, default=2.0,
+                        help='Seconds a person must be away from garbage before another incident is reported')
+    parser.add_argument('--events', metavar='PATH',
+                        help="Stream NDJSON progress/incident/summary events to PATH ('-' = stdout)")
+    parser.add_argument('--spool', default=None,
+                        help='Analysis daemon spool directory (default: NETRA_ANALYZER_SPOOL or ./analysis_spool)')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Analyze in this process even if an analysis daemon is running')
+    args = parser.parse_args()
     
-    video_path = sys.argv[1]
-    analysis_id = sys.argv[2]
-    output_dir = sys.argv[3]
+    events = AnalysisEvents.open(args.events, args.analysis_id)
     
     print("=" * 60)
     print("🔍 Netra.R1 Video Analyzer Starting...")
     print("=" * 60)
     
-    analyzer = VideoAnalyzer(video_path, analysis_id, output_dir)
+    # A running daemon already has the model loaded; just submit the job to it
+    if not args.no_daemon:
+        if daemon_alive(args.spool):
+            code = run_in_daemon(args, events)
+            events.close()
+            sys.exit(code)
+    
+    analyzer = VideoAnalyzer(
+        args.video_path, args.analysis_id, args.output_dir,
+        max_stride=args.max_stride,
+        motion_threshold=args.motion_threshold,
+        model_path=args.model or 'yolov8n.pt',
+        inference_backend=args.backend,
+        precision=args.precision,
+        events=events,
+        incident_cooldown=args.incident_cooldown
+    )
+    watch_for_cancel(analyzer.cancel_event)
+    
+    try:
+        ok = analyzer.analyze_video(workers=args.workers)
+    except Exception as e:
+        events.emit('error', message=str(e))
+        raise
     
-    if analyzer.analyze_video():
+    if ok:
         analyzer.save_results()
+        events.close()
+        if analyzer.cancelled:
+            print("\n⏹️ Analysis cancelled, partial results saved")
+            sys.exit(130)
         print("\n" + "=" * 60)
         print("✨ Analysis completed successfully!")
         print("=" * 60)
         sys.exit(0)
     else:
         print("\n❌ Analysis failed")
+        events.close()
         sys.exit(1)
 
 if __name__ == "__main__":
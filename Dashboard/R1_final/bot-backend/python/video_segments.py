@@ -0,0 +1,173 @@
+"""
+Video Segments
+Keyframe-aligned chunk planning and ffmpeg helpers used to split an upload
+across analyzer processes, stitch the annotated parts back together and cut
+evidence clips out of the source file
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from bisect import bisect_right
+
+import cv2
+
+
+def probe_keyframes(video_path):
+    """
+    Keyframe timestamps of the first video stream
+
+    Returns:
+        Sorted list of seconds (empty if ffprobe is unavailable or fails)
+    """
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return []
+
+    cmd = [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+           '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', str(video_path)]
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=300).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+
+    times = []
+    for line in output.splitlines():
+        fields = line.split(',')
+        if len(fields) >= 2 and 'K' in fields[1]:
+            try:
+                times.append(float(fields[0]))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def plan_chunks(total_frames, fps, num_chunks, overlap_frames, keyframes=None, min_chunk_frames=0):
+    """
+    Split a video into contiguous frame ranges, one per analyzer process
+
+    Each chunk starts decoding at decode_start (snapped back to a keyframe
+    when keyframes are known, so the seek is cheap and exact) and only owns
+    frames from start onwards. The overlap_frames in between rebuild the
+    detection state (tracks, cooldowns), so incidents near a border are
+    judged the same way as in a sequential run.
+
+    Args:
+        total_frames: Frame count of the video
+        fps: Frame rate (used to convert keyframe timestamps)
+        num_chunks: Desired number of chunks
+        overlap_frames: Warm-up frames decoded before each owned range
+        keyframes: Keyframe timestamps in seconds (see probe_keyframes)
+        min_chunk_frames: Smallest owned range worth a separate process
+
+    Returns:
+        List of dicts with index, decode_start, start and end (end is None
+        for the last chunk, which runs until the end of the file)
+    """
+    min_chunk_frames = max(1, min_chunk_frames, overlap_frames)
+    num_chunks = max(1, min(num_chunks, total_frames // min_chunk_frames))
+
+    keyframe_indices = sorted({int(round(t * fps)) for t in keyframes or []})
+
+    bounds = [(0, 0)]
+    for i in range(1, num_chunks):
+        decode_start = max(0, i * total_frames // num_chunks - overlap_frames)
+        if keyframe_indices:
+            # Latest keyframe at or before the warm-up start
+            k = bisect_right(keyframe_indices, decode_start) - 1
+            if k >= 0:
+                decode_start = keyframe_indices[k]
+        start = decode_start + overlap_frames
+        if start - bounds[-1][1] < min_chunk_frames or total_frames - start < min_chunk_frames:
+            continue
+        bounds.append((decode_start, start))
+
+    chunks = []
+    for index, (decode_start, start) in enumerate(bounds):
+        end = bounds[index + 1][1] if index + 1 < len(bounds) else None
+        chunks.append({'index': index, 'decode_start': decode_start, 'start': start, 'end': end})
+    return chunks
+
+
+def concat_videos(part_paths, output_path, fps, frame_size):
+    """
+    Join video parts into one file
+
+    Uses ffmpeg's concat demuxer (stream copy, no re-encode) when available,
+    otherwise re-encodes the parts with OpenCV.
+
+    Returns:
+        output_path
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as listing:
+            for path in part_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                listing.write(f"file '{escaped}'\n")
+        try:
+            subprocess.run([ffmpeg, '-y', '-v', 'error', '-f', 'concat', '-safe', '0',
+                            '-i', listing.name, '-c', 'copy', str(output_path)],
+                           check=True, capture_output=True, timeout=600)
+            return output_path
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ ffmpeg concat failed, re-encoding parts: {e}")
+        finally:
+            os.unlink(listing.name)
+
+    out = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+    for path in part_paths:
+        cap = cv2.VideoCapture(str(path))
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    out.release()
+    return output_path
+
+
+def cut_clip(source_path, output_path, start_frame, end_frame, fps, frame_size):
+    """
+    Copy frames [start_frame, end_frame) of a video into a new file
+
+    With ffmpeg the clip is remuxed without re-encoding; the input seek snaps
+    to the keyframe at or before the start, so the clip may begin slightly
+    early. Otherwise the range is seeked and decoded with OpenCV and
+    re-encoded.
+
+    Returns:
+        output_path, or None if nothing could be written
+    """
+    fps = max(fps, 1)
+    start_seconds = start_frame / fps
+    duration = max(end_frame - start_frame, 1) / fps
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        try:
+            subprocess.run([ffmpeg, '-y', '-v', 'error', '-ss', f"{start_seconds:.3f}",
+                            '-i', str(source_path), '-t', f"{duration:.3f}", '-map', '0:v:0',
+                            '-c', 'copy', '-avoid_negative_ts', 'make_zero', str(output_path)],
+                           check=True, capture_output=True, timeout=300)
+            if os.path.getsize(output_path) > 0:
+                return output_path
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ ffmpeg stream copy failed, decoding clip instead: {e}")
+
+    cap = cv2.VideoCapture(str(source_path))
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    out = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+    written = 0
+    for _ in range(end_frame - start_frame):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        out.write(frame)
+        written += 1
+    cap.release()
+    out.release()
+    return output_path if written else None
@@ -0,0 +1,153 @@
+"""
+Backend Client
+Shared, pooled HTTP client for calls to the Node backend API
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_API_URL = os.environ.get('BACKEND_API_URL', 'http://localhost:3001/api')
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def record(self, elapsed_ms, error=False):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if elapsed_ms <= bound:
+                index = i
+                break
+
+        self.counts[index] += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.count += 1
+        if error:
+            self.errors += 1
+
+    def snapshot(self):
+        labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': self.total_ms / self.count if self.count else 0,
+            'max_ms': self.max_ms,
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+class BackendClient:
+    def __init__(self, base_url=None, max_retries=3, backoff_factor=0.5,
+                 pool_size=10, max_concurrency=8):
+        """
+        Initialize the backend client
+
+        Args:
+            base_url: Backend API base URL (defaults to BACKEND_API_URL)
+            max_retries: Retries for connection errors, and for 502/503/504
+                responses to idempotent methods only
+            backoff_factor: Exponential backoff factor between retries (0.5 -> 0.5s, 1s, 2s, ...)
+            pool_size: Keep-alive connections kept open to the backend
+            max_concurrency: Maximum requests in flight at once across all threads
+        """
+        self.base_url = (base_url or DEFAULT_API_URL).rstrip('/')
+
+        # Read errors, and gateway errors on POST/PATCH, are not retried: the
+        # backend may already have created the ticket/incident. Connection
+        # errors are retried for every method since nothing reached the server.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.concurrency = threading.BoundedSemaphore(max_concurrency)
+
+        self.stats_lock = threading.Lock()
+        self.latency = {}
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request to the backend
+
+        Args:
+            method: HTTP method
+            path: API path relative to the base URL (e.g. '/tickets')
+            **kwargs: Passed through to requests (json, files, data, timeout, ...)
+
+        Returns:
+            requests.Response (raises requests.RequestException on failure)
+        """
+        endpoint = f"{method.upper()} {path.split('?')[0]}"
+        url = f"{self.base_url}/{path.lstrip('/')}"
+
+        with self.concurrency:
+            start = time.time()
+            error = True
+            try:
+                response = self.session.request(method, url, **kwargs)
+                error = response.status_code >= 500
+                return response
+            finally:
+                self._record(endpoint, (time.time() - start) * 1000, error)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def _record(self, endpoint, elapsed_ms, error):
+        with self.stats_lock:
+            if endpoint not in self.latency:
+                self.latency[endpoint] = LatencyHistogram()
+            self.latency[endpoint].record(elapsed_ms, error)
+
+    def get_stats(self):
+        """Per-endpoint latency histograms"""
+        with self.stats_lock:
+            return {
+                'base_url': self.base_url,
+                'endpoints': {
+                    endpoint: histogram.snapshot()
+                    for endpoint, histogram in self.latency.items()
+                }
+            }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_backend_client(base_url=None):
+    """Return the process-wide client for a backend URL, creating it on first use"""
+    base_url = (base_url or DEFAULT_API_URL).rstrip('/')
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = BackendClient(base_url)
+        return _clients[base_url]
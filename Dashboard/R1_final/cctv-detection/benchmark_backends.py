@@ -0,0 +1,89 @@
+"""
+Inference Backend Benchmark
+Compares end-to-end detection latency (preprocess + inference + NMS) of the
+PyTorch path against ONNX Runtime and OpenVINO on this machine
+
+Usage:
+    python benchmark_backends.py --model yolov8n.pt --image sample.jpg
+    python benchmark_backends.py --backends torch onnxruntime --batch 4 --runs 100
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from inference_backends import load_inference_backend
+
+
+def load_frames(image_path, batch):
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise SystemExit(f"❌ Could not read image: {image_path}")
+    else:
+        # Synthetic 720p frame (detections will be near-empty, so NMS cost is a lower bound)
+        frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    return [frame.copy() for _ in range(batch)]
+
+
+def benchmark(backend, frames, conf, runs, warmup):
+    """
+    Returns:
+        Dict with latency percentiles (ms per batch), throughput and detection count
+    """
+    for _ in range(warmup):
+        backend.predict(frames, conf)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = backend.predict(frames, conf)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    return {
+        'mean_ms': timings.mean(),
+        'p50_ms': np.percentile(timings, 50),
+        'p95_ms': np.percentile(timings, 95),
+        'fps': len(frames) * 1000 / timings.mean(),
+        'detections': sum(len(result) for result in results)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark YOLOv8 inference backends')
+    parser.add_argument('--model', default='yolov8n.pt', help='YOLOv8 .pt weights (exported to ONNX as needed)')
+    parser.add_argument('--image', help='Test image (default: synthetic 720p frame)')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'onnxruntime', 'openvino'])
+    parser.add_argument('--batch', type=int, default=1, help='Frames per predict call')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--threads', type=int, default=None, help='ONNX Runtime intra-op threads')
+    args = parser.parse_args()
+
+    frames = load_frames(args.image, args.batch)
+
+    print("=" * 72)
+    print(f"⏱️  {args.model}, batch {args.batch}, {args.runs} runs ({frames[0].shape[1]}x{frames[0].shape[0]})")
+    print("=" * 72)
+    print(f"{'backend':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'FPS':>10}{'dets':>8}{'speedup':>10}")
+
+    baseline = None
+    for name in args.backends:
+        try:
+            backend = load_inference_backend(args.model, name, threads=args.threads)
+        except ImportError as e:
+            print(f"{name:<14}skipped: {e}")
+            continue
+
+        stats = benchmark(backend, frames, args.conf, args.runs, args.warmup)
+        baseline = baseline or stats['mean_ms']
+        print(f"{name:<14}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{stats['fps']:>10.1f}{stats['detections']:>8}{baseline / stats['mean_ms']:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+"""
+Camera Shards
+Runs groups of cameras in separate worker processes, each with its own
+YOLOv8 model, so capture, inference and drawing scale across CPU cores.
+Annotated frames come back to the parent through shared memory slots
+instead of being pickled. Cameras can also be added and removed while the
+shards run (see add_camera), which is how the API server uses it
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+HEADER_BYTES = 8  # int64 sequence number in front of the pixels
+
+
+def _attach_shared_memory(name):
+    """Attach to a block created (and later unlinked) by the parent process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: spawned workers share the parent's resource tracker,
+        # so the duplicate registration is harmless and the parent's unlink clears it
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameSlot:
+    def __init__(self, shm, frame_shape, owner=False):
+        """
+        Single-frame shared memory slot (one writer, any number of readers)
+
+        The sequence number is odd while a write is in progress, so readers
+        can detect and retry torn reads without a cross-process lock.
+
+        Args:
+            shm: SharedMemory block of HEADER_BYTES + H * W * 3 bytes
+            frame_shape: (height, width) of stored frames
+            owner: Unlink the block on close (the process that created it)
+        """
+        self.shm = shm
+        self.frame_shape = tuple(frame_shape)
+        self.owner = owner
+
+        height, width = self.frame_shape
+        self.header = np.ndarray((1,), dtype=np.int64, buffer=shm.buf)
+        self.frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf, offset=HEADER_BYTES)
+        self.last_read_seq = 0
+
+    @classmethod
+    def create(cls, frame_shape):
+        height, width = frame_shape
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + height * width * 3)
+        slot = cls(shm, frame_shape, owner=True)
+        slot.header[0] = 0
+        return slot
+
+    @classmethod
+    def attach(cls, name, frame_shape):
+        return cls(_attach_shared_memory(name), frame_shape)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, frame):
+        """Copy a BGR frame into the slot (resized if it doesn't match the slot shape)"""
+        self.header[0] += 1  # Odd: write in progress
+        if frame.shape[:2] != self.frame_shape:
+            height, width = self.frame_shape
+            cv2.resize(frame, (width, height), dst=self.frame, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(self.frame, frame)
+        self.header[0] += 1
+
+    def read(self, only_new=True, retries=3):
+        """
+        Copy of the latest frame
+
+        Returns:
+            Frame array, or None if nothing new was written (or the writer
+            kept overwriting it during every retry)
+        """
+        for _ in range(retries):
+            seq = int(self.header[0])
+            if seq % 2:
+                time.sleep(0.001)
+                continue
+            if seq == 0 or (only_new and seq == self.last_read_seq):
+                return None
+
+            frame = self.frame.copy()
+            if int(self.header[0]) == seq:
+                self.last_read_seq = seq
+                return frame
+        return None
+
+    def close(self):
+        # Drop the numpy views before closing the mapping
+        self.header = None
+        self.frame = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _shard_main(shard_id, cameras, frame_shape, detector_kwargs, options, stop_event, stats_queue,
+                command_queue):
+    """
+    Worker process: own model, batched inference and a camera supervisor for its cameras
+
+    ('add', camera) and ('remove', camera_id) commands on command_queue start
+    and stop cameras while the shard runs.
+    """
+    from yolov8_detector import YOLOv8GarbageDetector
+    from inference_scheduler import BatchInferenceScheduler
+    from camera_supervisor import CameraSupervisor
+
+    print(f"🧩 Shard {shard_id} starting with {len(cameras)} camera(s)")
+    detector = YOLOv8GarbageDetector(**detector_kwargs)
+
+    scheduler = None
+    if len(cameras) > 1 or options['dynamic']:
+        scheduler = BatchInferenceScheduler(
+            detector.detect_batch,
+            max_batch_size=options['batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+            max_queue_size=max(options['batch_size'] * 2, len(cameras))
+        ).start()
+
+    supervisor = CameraSupervisor(
+        detector, scheduler,
+        latest_frame_only=options['latest_frame_only'],
+        detect_interval=options['detect_interval']
+    )
+
+    slots = {}
+
+    def add(camera):
+        slot = SharedFrameSlot.attach(camera['shm_name'], frame_shape)
+        try:
+            supervisor.start(camera['id'], camera['source'], camera['location'], frame_sink=slot.write)
+        except ValueError:
+            slot.close()
+            raise
+        slots[camera['id']] = slot
+
+    def remove(camera_id):
+        supervisor.stop(camera_id)
+        # Keep the slot while the worker may still be writing to it
+        if camera_id in slots and camera_id not in supervisor:
+            slots.pop(camera_id).close()
+
+    try:
+        for camera in cameras:
+            add(camera)
+
+        last_stats = 0
+        while not stop_event.is_set():
+            try:
+                command, payload = command_queue.get(timeout=options['stats_interval'])
+            except queue.Empty:
+                command = None
+
+            try:
+                if command == 'add':
+                    add(payload)
+                elif command == 'remove':
+                    remove(payload)
+            except Exception as e:
+                print(f"❌ Shard {shard_id} failed to {command} camera: {e}")
+
+            if time.time() - last_stats >= options['stats_interval']:
+                last_stats = time.time()
+                try:
+                    stats_queue.put_nowait((shard_id, supervisor.list_cameras()))
+                except queue.Full:
+                    pass
+    finally:
+        supervisor.stop_all()
+        if scheduler is not None:
+            scheduler.stop()
+        detector.evidence_pool.drain()
+        for slot in slots.values():
+            slot.close()
+        print(f"🧩 Shard {shard_id} stopped")
+
+
+class CameraShardPool:
+    def __init__(self, camera_configs, num_processes=None, detector_kwargs=None,
+                 frame_shape=(720, 1280), batch_size=8, max_wait_ms=20,
+                 latest_frame_only=True, detect_interval=1, stats_interval=1.0):
+        """
+        Initialize the shard pool
+
+        Args:
+            camera_configs: List of dict with 'source', 'id', 'location' (may be
+                empty when cameras are added later with add_camera)
+            num_processes: Worker processes (default: one per core, at most one
+                per initial camera when camera_configs is given)
+            detector_kwargs: Arguments for YOLOv8GarbageDetector in each worker
+            frame_shape: (height, width) of the shared annotated-frame slots
+            batch_size: Maximum frames per batched model call within a shard
+            max_wait_ms: Maximum time to wait for a batch to fill up
+            latest_frame_only: Drop stale frames instead of queueing them per camera
+            detect_interval: Run detection on every k-th frame per camera
+            stats_interval: Seconds between stats reports from each shard
+        """
+        self.camera_configs = list(camera_configs)
+        self.num_processes = max(1, num_processes or mp.cpu_count())
+        if self.camera_configs:
+            self.num_processes = min(self.num_processes, len(self.camera_configs))
+        self.detector_kwargs = detector_kwargs or {}
+        self.frame_shape = tuple(frame_shape)
+        self.options = {
+            'batch_size': batch_size,
+            'max_wait_ms': max_wait_ms,
+            'latest_frame_only': latest_frame_only,
+            'detect_interval': detect_interval,
+            'stats_interval': stats_interval,
+            # A shard started without cameras batches as soon as more arrive
+            'dynamic': not self.camera_configs
+        }
+
+        # Spawn (not fork): each worker initializes torch/CUDA from scratch
+        self.ctx = mp.get_context('spawn')
+        self.stop_event = self.ctx.Event()
+        self.stats_queue = self.ctx.Queue(maxsize=256)
+        self.command_queues = [self.ctx.Queue() for _ in range(self.num_processes)]
+        self.processes = []
+        self.slots = {}
+        self.cameras = {}  # camera_id -> config, shard and start time
+        self.cameras_lock = threading.Lock()
+        self.camera_stats = {}
+
+    def _register(self, config, shard_id):
+        """Allocate a camera's frame slot and record which shard runs it"""
+        slot = SharedFrameSlot.create(self.frame_shape)
+        self.slots[config['id']] = slot
+        self.cameras[config['id']] = {
+            'source': config['source'],
+            'location': config['location'],
+            'started_at': datetime.now().isoformat(),
+            'shard': shard_id
+        }
+        return {
+            'id': config['id'],
+            'source': config['source'],
+            'location': config['location'],
+            'shm_name': slot.name
+        }
+
+    def start(self):
+        """Allocate shared frame slots and start the worker processes"""
+        shards = [[] for _ in range(self.num_processes)]
+        for i, config in enumerate(self.camera_configs):
+            shard_id = i % self.num_processes
+            shards[shard_id].append(self._register(config, shard_id))
+
+        for shard_id, cameras in enumerate(shards):
+            process = self.ctx.Process(
+                target=_shard_main,
+                args=(shard_id, cameras, self.frame_shape, self.detector_kwargs,
+                      self.options, self.stop_event, self.stats_queue, self.command_queues[shard_id]),
+                name=f'camera-shard-{shard_id}',
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        print(f"🧩 {len(self.camera_configs)} cameras sharded across {self.num_processes} processes")
+        return self
+
+    def add_camera(self, camera_id, source, location='Unknown'):
+        """
+        Start a camera on the shard running the fewest cameras
+
+        Raises:
+            ValueError if the camera is already active
+        """
+        with self.cameras_lock:
+            if camera_id in self.cameras:
+                raise ValueError(f'Camera {camera_id} is already active')
+            load = [0] * self.num_processes
+            for camera in self.cameras.values():
+                load[camera['shard']] += 1
+            shard_id = load.index(min(load))
+            camera = self._register({'id': camera_id, 'source': source, 'location': location}, shard_id)
+            self.command_queues[shard_id].put(('add', camera))
+        print(f"🧩 Camera {camera_id} added to shard {shard_id}")
+        return shard_id
+
+    def remove_camera(self, camera_id):
+        """
+        Stop a camera in its shard
+
+        Returns:
+            False if the camera is not active
+        """
+        with self.cameras_lock:
+            camera = self.cameras.pop(camera_id, None)
+            if camera is None:
+                return False
+            self.command_queues[camera['shard']].put(('remove', camera_id))
+            # The shard keeps its own mapping until its worker has exited
+            self.slots.pop(camera_id).close()
+            self.camera_stats.pop(camera_id, None)
+        return True
+
+    def __len__(self):
+        with self.cameras_lock:
+            return len(self.cameras)
+
+    def __contains__(self, camera_id):
+        with self.cameras_lock:
+            return camera_id in self.cameras
+
+    def latest_frame(self, camera_id, only_new=True):
+        """Copy of a camera's newest annotated frame, or None"""
+        return self.slots[camera_id].read(only_new)
+
+    def get_stats(self):
+        """Latest per-camera stats reported by the shards"""
+        with self.cameras_lock:
+            while True:
+                try:
+                    shard_id, cameras = self.stats_queue.get_nowait()
+                except queue.Empty:
+                    break
+                for camera_id, stats in cameras.items():
+                    # Late reports for removed cameras are ignored
+                    if camera_id in self.cameras:
+                        self.camera_stats[camera_id] = {'shard': shard_id, **stats}
+            return dict(self.camera_stats)
+
+    def list_cameras(self):
+        """Per-camera config and the latest stats reported by its shard"""
+        stats = self.get_stats()
+        with self.cameras_lock:
+            cameras = list(self.cameras.items())
+
+        return {
+            camera_id: {
+                'location': camera['location'],
+                'stream_url': camera['source'],
+                'started_at': camera['started_at'],
+                'shard': camera['shard'],
+                **stats.get(camera_id, {'state': 'starting'})
+            }
+            for camera_id, camera in cameras
+        }
+
+    def is_alive(self):
+        return any(process.is_alive() for process in self.processes)
+
+    def stop(self, timeout=10.0):
+        """Stop all shards and release the shared memory"""
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                print(f"⚠️ {process.name} did not exit, terminating")
+                process.terminate()
+                process.join()
+        self.processes = []
+
+        with self.cameras_lock:
+            for slot in self.slots.values():
+                slot.close()
+            self.slots = {}
+            self.cameras = {}
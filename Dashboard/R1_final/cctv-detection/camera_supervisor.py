@@ -0,0 +1,230 @@
+"""
+Camera Supervisor
+Owns one worker thread and stop event per camera stream, runs streams
+headless, reconnects dropped feeds with backoff and keeps per-camera stats
+"""
+
+import threading
+import time
+from datetime import datetime
+
+
+class CameraStats:
+    def __init__(self):
+        """Live counters for one camera, updated by its worker thread"""
+        self.lock = threading.Lock()
+        self.state = 'starting'
+        self.fps = 0.0
+        self.inference_ms = 0.0  # Exponential moving average
+        self.frames_processed = 0
+        self.frames_inferred = 0
+        self.frames_dropped = 0
+        self.dropped_before_connection = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.last_error_at = None
+        self.last_frame_at = None
+
+    def set_state(self, state):
+        with self.lock:
+            self.state = state
+
+    def begin_connection(self):
+        """Dropped-frame counts restart with every new capture"""
+        with self.lock:
+            self.dropped_before_connection = self.frames_dropped
+            self.state = 'running'
+
+    def record_frame(self, fps=None):
+        with self.lock:
+            self.frames_processed += 1
+            self.last_frame_at = time.time()
+            if fps is not None:
+                self.fps = fps
+
+    def record_inference(self, elapsed_ms):
+        with self.lock:
+            self.frames_inferred += 1
+            if self.frames_inferred == 1:
+                self.inference_ms = elapsed_ms
+            else:
+                self.inference_ms = 0.9 * self.inference_ms + 0.1 * elapsed_ms
+
+    def record_dropped(self, dropped_this_connection):
+        with self.lock:
+            self.frames_dropped = self.dropped_before_connection + dropped_this_connection
+
+    def record_error(self, message):
+        with self.lock:
+            self.last_error = message
+            self.last_error_at = time.time()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'fps': round(self.fps, 1),
+                'inference_ms': round(self.inference_ms, 1),
+                'frames_processed': self.frames_processed,
+                'frames_inferred': self.frames_inferred,
+                'frames_dropped': self.frames_dropped,
+                'reconnects': self.reconnects,
+                'last_error': self.last_error,
+                'last_error_at': datetime.fromtimestamp(self.last_error_at).isoformat() if self.last_error_at else None,
+                'last_frame_at': datetime.fromtimestamp(self.last_frame_at).isoformat() if self.last_frame_at else None
+            }
+
+
+class CameraSupervisor:
+    def __init__(self, detector, scheduler=None, initial_backoff=1.0, max_backoff=30.0,
+                 latest_frame_only=True, detect_interval=1):
+        """
+        Initialize the supervisor
+
+        Args:
+            detector: YOLOv8GarbageDetector shared by all cameras
+            scheduler: Optional BatchInferenceScheduler shared by all cameras
+            initial_backoff: Seconds before the first reconnect attempt
+            max_backoff: Upper bound for the doubling reconnect delay
+            latest_frame_only: Always process the newest frame, dropping stale ones
+            detect_interval: Run detection on every k-th frame per camera
+        """
+        self.detector = detector
+        self.scheduler = scheduler
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.latest_frame_only = latest_frame_only
+        self.detect_interval = detect_interval
+
+        self.cameras = {}
+        self.cameras_lock = threading.Lock()
+
+    def start(self, camera_id, source, location='Unknown', frame_sink=None):
+        """
+        Start supervising a camera stream
+
+        Args:
+            frame_sink: Optional callable receiving every annotated frame
+
+        Raises:
+            ValueError if the camera is already active, or its previous
+            worker is still stopping (so two workers never share a capture)
+        """
+        with self.cameras_lock:
+            if camera_id in self.cameras:
+                if self.cameras[camera_id]['stop_event'].is_set():
+                    raise ValueError(f'Camera {camera_id} is still stopping, retry shortly')
+                raise ValueError(f'Camera {camera_id} is already active')
+
+            camera = {
+                'source': source,
+                'location': location,
+                'started_at': datetime.now().isoformat(),
+                'frame_sink': frame_sink,
+                'stop_event': threading.Event(),
+                'stats': CameraStats()
+            }
+            camera['thread'] = threading.Thread(
+                target=self._supervise, args=(camera_id, camera),
+                name=f'camera-{camera_id}', daemon=True
+            )
+            self.cameras[camera_id] = camera
+            camera['thread'].start()
+
+        return camera
+
+    def _supervise(self, camera_id, camera):
+        """Worker loop: run the stream, reconnecting with backoff until stopped"""
+        stop_event = camera['stop_event']
+        stats = camera['stats']
+        backoff = self.initial_backoff
+
+        while not stop_event.is_set():
+            stats.set_state('connecting')
+            frames_before = stats.frames_processed
+            try:
+                self.detector.process_camera_stream(
+                    camera['source'], camera_id, camera['location'],
+                    scheduler=self.scheduler,
+                    latest_frame_only=self.latest_frame_only,
+                    detect_interval=self.detect_interval,
+                    stop_event=stop_event,
+                    display=False,
+                    stats=stats,
+                    frame_sink=camera['frame_sink']
+                )
+            except Exception as e:
+                stats.record_error(str(e))
+                print(f"❌ Camera {camera_id} worker error: {e}")
+
+            if stop_event.is_set():
+                break
+
+            # A connection that delivered frames resets the backoff
+            if stats.frames_processed > frames_before:
+                backoff = self.initial_backoff
+
+            stats.set_state('reconnecting')
+            with stats.lock:
+                stats.reconnects += 1
+            print(f"🔁 Reconnecting {camera_id} in {backoff:.1f}s")
+            stop_event.wait(backoff)
+            backoff = min(self.max_backoff, backoff * 2)
+
+        stats.set_state('stopped')
+        # The entry outlives stop()'s join timeout; it goes once the capture is released
+        with self.cameras_lock:
+            if self.cameras.get(camera_id) is camera:
+                del self.cameras[camera_id]
+
+    def stop(self, camera_id, timeout=5.0):
+        """
+        Signal a camera's worker to stop and wait for it to exit
+
+        The camera stays registered (as 'stopping') until its worker has
+        actually exited, so it cannot be restarted while the old capture is
+        still open.
+
+        Returns:
+            False if the camera is not active
+        """
+        with self.cameras_lock:
+            camera = self.cameras.get(camera_id)
+        if camera is None:
+            return False
+
+        camera['stop_event'].set()
+        camera['thread'].join(timeout)
+        if camera['thread'].is_alive():
+            print(f"⚠️ Camera {camera_id} worker did not exit within {timeout}s")
+        return True
+
+    def stop_all(self, timeout=5.0):
+        with self.cameras_lock:
+            camera_ids = list(self.cameras)
+        for camera_id in camera_ids:
+            self.stop(camera_id, timeout)
+
+    def __len__(self):
+        with self.cameras_lock:
+            return len(self.cameras)
+
+    def __contains__(self, camera_id):
+        with self.cameras_lock:
+            return camera_id in self.cameras
+
+    def list_cameras(self):
+        """Per-camera config and live stats"""
+        with self.cameras_lock:
+            cameras = list(self.cameras.items())
+
+        return {
+            camera_id: {
+                'location': camera['location'],
+                'stream_url': camera['source'],
+                'started_at': camera['started_at'],
+                **camera['stats'].snapshot(),
+                **({'state': 'stopping'} if camera['stop_event'].is_set() else {})
+            }
+            for camera_id, camera in cameras
+        }
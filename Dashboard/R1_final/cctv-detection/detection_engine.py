@@ -0,0 +1,227 @@
+"""
+Detection Engine
+The one YOLO hot path shared by the CCTV detector, Netra.R1 and the video
+analyzer: class-filtered batched inference, person/garbage split into
+DetectionResults, per-camera trackers, proximity checks and drawing.
+
+Inference backends are cached per process, so every detector built on the
+same weights shares a single loaded model. Calls into a shared model are
+serialized, since neither the ultralytics model nor an OpenVINO compiled
+model may be run from two threads at once.
+"""
+
+import threading
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from detection_result import DetectionResult
+from inference_backends import (
+    DEFAULT_BACKEND, DEFAULT_PRECISION, class_filter, configured_garbage_classes, load_inference_backend
+)
+from proximity import count_within, pairs_within
+from tracker import MultiObjectTracker
+
+# COCO objects commonly dropped as litter
+GARBAGE_CLASSES = {
+    39: 'bottle', 40: 'wine glass', 41: 'cup', 42: 'fork',
+    43: 'knife', 44: 'spoon', 45: 'bowl', 46: 'banana',
+    47: 'apple', 48: 'sandwich', 49: 'orange', 50: 'broccoli',
+    51: 'carrot', 52: 'hot dog', 53: 'pizza', 54: 'donut', 55: 'cake',
+    # Add custom garbage classes if you train custom model
+    # 80: 'plastic bag', 81: 'waste', 82: 'litter'
+}
+
+PERSON_CLASS_ID = 0
+
+GARBAGE_COLOR = (0, 0, 255)
+PERSON_COLOR = (0, 255, 0)
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class SharedBackend:
+    def __init__(self, backend):
+        """
+        Inference backend shared between threads
+
+        predict() holds a per-model lock; everything else (name, names, ...)
+        is read straight from the wrapped backend.
+        """
+        self.backend = backend
+        self.lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        return getattr(self.backend, attr)
+
+    def predict(self, frames, conf, classes=None):
+        with self.lock:
+            return self.backend.predict(frames, conf, classes)
+
+
+def get_inference_backend(model_path='yolov8n.pt', backend=None, precision=None):
+    """
+    Load an inference backend once per process
+
+    Detectors asking for the same weights, backend and precision get the
+    same instance back instead of loading another copy of the model.
+
+    Returns:
+        SharedBackend, safe to call from several threads
+    """
+    key = (str(model_path), backend or DEFAULT_BACKEND, precision or DEFAULT_PRECISION)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = SharedBackend(load_inference_backend(model_path, backend, precision=precision))
+        return _backends[key]
+
+
+class DetectionEngine:
+    def __init__(self, model_path='yolov8n.pt', confidence_threshold=0.5, garbage_classes=None,
+                 default_garbage_classes=None, person_confidence=None, garbage_confidence=None,
+                 inference_backend=None, precision=None, tracker_max_age=30):
+        """
+        Args:
+            model_path: YOLOv8 weights (.pt) or exported .onnx model
+            confidence_threshold: Minimum confidence for every detection
+            garbage_classes: {class_id: name} map used as-is
+            default_garbage_classes: Fallback map (still overridable with
+                YOLO_GARBAGE_CLASSES); defaults to GARBAGE_CLASSES
+            person_confidence: Stricter/looser threshold for persons only
+            garbage_confidence: Stricter/looser threshold for garbage only
+            inference_backend: 'torch', 'onnxruntime', 'openvino' or 'auto'
+            precision: 'fp32' or 'int8'
+            tracker_max_age: Frames a person track survives without a match
+        """
+        self.inference = get_inference_backend(model_path, inference_backend, precision)
+        self.model_path = model_path
+        self.precision = precision
+
+        self.person_class_id = PERSON_CLASS_ID
+        self.garbage_classes = garbage_classes or configured_garbage_classes(
+            default_garbage_classes or GARBAGE_CLASSES, self.inference.names
+        )
+
+        # Only these classes are scored and kept by inference
+        self.inference_classes = class_filter(self.garbage_classes, self.person_class_id)
+
+        self.person_confidence = person_confidence or confidence_threshold
+        self.garbage_confidence = garbage_confidence or confidence_threshold
+        # Nothing below the lower of the two thresholds is kept anyway
+        self.confidence_threshold = min(self.person_confidence, self.garbage_confidence)
+
+        self.tracker_max_age = tracker_max_age
+        self.trackers = {}
+        self.trackers_lock = threading.Lock()
+
+    def split(self, result):
+        """
+        Split one frame's DetectionResult into garbage and person detections
+
+        Returns:
+            Dict with 'garbage' and 'persons' DetectionResults and a timestamp
+        """
+        garbage_mask = result.class_mask(self.garbage_classes)
+        person_mask = (result.class_ids == self.person_class_id) & ~garbage_mask
+
+        if self.garbage_confidence > self.confidence_threshold:
+            garbage_mask &= result.scores >= self.garbage_confidence
+        if self.person_confidence > self.confidence_threshold:
+            person_mask &= result.scores >= self.person_confidence
+
+        return {
+            'garbage': result.select(garbage_mask),
+            'persons': result.select(person_mask),
+            'timestamp': datetime.now()
+        }
+
+    def detect(self, frame):
+        """Detect garbage and persons in a single frame"""
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        """
+        Detect garbage and persons in several frames with one model call
+
+        Returns:
+            List of split detections, one per input frame
+        """
+        results = self.inference.predict(frames, self.confidence_threshold, self.inference_classes)
+        return [self.split(result) for result in results]
+
+    def get_tracker(self, camera_id):
+        """Get (or create) the person tracker for a camera"""
+        with self.trackers_lock:
+            if camera_id not in self.trackers:
+                self.trackers[camera_id] = MultiObjectTracker(iou_threshold=0.3, max_age=self.tracker_max_age)
+            return self.trackers[camera_id]
+
+    def track(self, detections, camera_id):
+        """Assign stable track IDs to the persons of a freshly detected frame"""
+        persons = detections['persons']
+        persons.track_ids = self.get_tracker(camera_id).update(persons.boxes, persons.scores)
+        return persons.track_ids
+
+    def predict(self, detections, camera_id):
+        """
+        Carry detections forward to a frame where inference was skipped
+
+        Person boxes come from the tracker's motion prediction; garbage is
+        assumed to stay where it was last detected.
+        """
+        boxes, scores, track_ids = self.get_tracker(camera_id).predict()
+        persons = DetectionResult(
+            boxes, scores,
+            np.full(len(boxes), self.person_class_id),
+            detections['persons'].names,
+            track_ids
+        )
+
+        return {
+            'garbage': detections['garbage'],
+            'persons': persons,
+            'timestamp': datetime.now()
+        }
+
+    def near_pairs(self, detections, radius):
+        """
+        Person/garbage pairs whose centers are within radius pixels
+
+        Returns:
+            (person_idx, garbage_idx, distances) arrays
+        """
+        return pairs_within(detections['persons'].centers, detections['garbage'].centers, radius)
+
+    def nearby_garbage_counts(self, detections, radius):
+        """Number of garbage items within radius pixels of each person"""
+        return count_within(detections['persons'].centers, detections['garbage'].centers, radius)
+
+    def draw(self, frame, detections, thickness=2, font_scale=0.5):
+        """
+        Draw garbage (red) and person (green) boxes onto frame in place
+
+        Returns:
+            The same frame
+        """
+        garbage = detections['garbage']
+        persons = detections['persons']
+
+        for bbox, name, confidence in zip(garbage.boxes.astype(int),
+                                          garbage.labels(self.garbage_classes),
+                                          garbage.scores):
+            cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), GARBAGE_COLOR, thickness)
+            cv2.putText(frame, f"{name} {confidence:.2f}", (bbox[0], bbox[1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, GARBAGE_COLOR, 2)
+
+        for i, (bbox, confidence) in enumerate(zip(persons.boxes.astype(int), persons.scores)):
+            cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), PERSON_COLOR, thickness)
+            if persons.track_ids is not None:
+                label = f"Person #{persons.track_ids[i]} {confidence:.2f}"
+            else:
+                label = f"Person {confidence:.2f}"
+            cv2.putText(frame, label, (bbox[0], bbox[1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, PERSON_COLOR, 2)
+
+        return frame
@@ -0,0 +1,144 @@
+"""
+Detection Metrics
+COCO-style mean average precision (mAP@0.5 and mAP@0.5:0.95) for comparing
+model variants on a labelled sample of our own frames
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from tracker import iou_matrix
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+RECALL_POINTS = np.linspace(0, 1, 101)
+
+
+def load_yolo_labels(label_path, width, height):
+    """
+    Read a YOLO-format label file (class cx cy w h, normalized)
+
+    Returns:
+        (boxes, class_ids): (N, 4) xyxy pixel boxes and (N,) class IDs
+    """
+    label_path = Path(label_path)
+    if not label_path.exists() or not label_path.read_text().strip():
+        return np.empty((0, 4)), np.empty(0, dtype=np.int64)
+
+    rows = np.loadtxt(label_path, ndmin=2)
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return boxes, rows[:, 0].astype(np.int64)
+
+
+def match_predictions(pred_boxes, pred_scores, pred_classes, gt_boxes, gt_classes):
+    """
+    Greedily match predictions to ground truth at every IoU threshold
+
+    Returns:
+        (P, T) bool array, True where prediction p is a true positive at threshold t
+    """
+    tp = np.zeros((len(pred_boxes), len(IOU_THRESHOLDS)), dtype=bool)
+    if not len(pred_boxes) or not len(gt_boxes):
+        return tp
+
+    iou = iou_matrix(pred_boxes, gt_boxes)
+    iou[pred_classes[:, None] != gt_classes[None, :]] = 0
+    order = np.argsort(-pred_scores)
+
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        matched = np.zeros(len(gt_boxes), dtype=bool)
+        for p in order:
+            candidates = np.where(~matched & (iou[p] >= threshold), iou[p], -1)
+            best = candidates.argmax()
+            if candidates[best] >= 0:
+                matched[best] = True
+                tp[p, t] = True
+    return tp
+
+
+def average_precision(tp, scores, num_gt):
+    """101-point interpolated AP for one class, per IoU threshold"""
+    if num_gt == 0 or not len(scores):
+        return np.zeros(tp.shape[1])
+
+    order = np.argsort(-scores)
+    tp_cum = np.cumsum(tp[order], axis=0)
+    fp_cum = np.cumsum(~tp[order], axis=0)
+    recall = tp_cum / num_gt
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1e-9)
+
+    # Precision envelope: best precision at this recall or higher
+    precision = np.flip(np.maximum.accumulate(np.flip(precision, axis=0), axis=0), axis=0)
+
+    ap = np.zeros(tp.shape[1])
+    for t in range(tp.shape[1]):
+        idx = np.searchsorted(recall[:, t], RECALL_POINTS, side='left')
+        valid = idx < len(recall)
+        ap[t] = precision[idx[valid], t].sum() / len(RECALL_POINTS)
+    return ap
+
+
+class MeanAveragePrecision:
+    def __init__(self, class_ids=None):
+        """
+        Accumulates predictions over a labelled sample
+
+        Args:
+            class_ids: Only evaluate these classes (default: every class in the labels)
+        """
+        self.class_ids = None if class_ids is None else set(class_ids)
+        self.tp = []
+        self.scores = []
+        self.pred_classes = []
+        self.gt_counts = {}
+
+    def _keep(self, classes):
+        if self.class_ids is None:
+            return np.ones(len(classes), dtype=bool)
+        return np.isin(classes, list(self.class_ids))
+
+    def update(self, result, gt_boxes, gt_classes):
+        """
+        Add one image
+
+        Args:
+            result: DetectionResult for the image
+            gt_boxes: (N, 4) xyxy ground-truth boxes
+            gt_classes: (N,) ground-truth class IDs
+        """
+        pred_keep = self._keep(result.class_ids)
+        gt_keep = self._keep(gt_classes)
+        pred_classes = result.class_ids[pred_keep]
+        gt_classes = gt_classes[gt_keep]
+
+        self.tp.append(match_predictions(result.boxes[pred_keep], result.scores[pred_keep],
+                                         pred_classes, gt_boxes[gt_keep], gt_classes))
+        self.scores.append(result.scores[pred_keep])
+        self.pred_classes.append(pred_classes)
+        for class_id in gt_classes:
+            self.gt_counts[int(class_id)] = self.gt_counts.get(int(class_id), 0) + 1
+
+    def compute(self):
+        """
+        Returns:
+            Dict with map50, map50_95 and per-class AP@0.5:0.95
+        """
+        if not self.gt_counts:
+            return {'map50': 0.0, 'map50_95': 0.0, 'per_class': {}}
+
+        tp = np.concatenate(self.tp) if self.tp else np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)
+        scores = np.concatenate(self.scores) if self.scores else np.zeros(0)
+        pred_classes = np.concatenate(self.pred_classes) if self.pred_classes else np.zeros(0, dtype=np.int64)
+
+        per_class = {}
+        for class_id, num_gt in self.gt_counts.items():
+            mask = pred_classes == class_id
+            per_class[class_id] = average_precision(tp[mask], scores[mask], num_gt)
+
+        aps = np.stack(list(per_class.values()))
+        return {
+            'map50': float(aps[:, 0].mean()),
+            'map50_95': float(aps.mean()),
+            'per_class': {class_id: float(ap.mean()) for class_id, ap in per_class.items()}
+        }
@@ -0,0 +1,91 @@
+"""
+Detection Results
+Structure-of-arrays container for one frame of YOLO detections
+"""
+
+import numpy as np
+
+
+class DetectionResult:
+    def __init__(self, boxes, scores, class_ids, names=None, track_ids=None):
+        """
+        Create a detection result from parallel arrays
+
+        Args:
+            boxes: (N, 4) array of xyxy boxes
+            scores: (N,) array of confidences
+            class_ids: (N,) array of class IDs
+            names: Optional class ID -> name mapping (e.g. results.names)
+            track_ids: Optional (N,) array of tracker IDs
+        """
+        self.boxes = np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.scores = np.ascontiguousarray(scores, dtype=np.float32).reshape(-1)
+        self.class_ids = np.ascontiguousarray(class_ids, dtype=np.int32).reshape(-1)
+        self.centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+        self.names = names if names is not None else {}
+        self.track_ids = None if track_ids is None else np.asarray(track_ids, dtype=np.int64).reshape(-1)
+
+    @classmethod
+    def from_yolo(cls, results):
+        """
+        Build from an ultralytics Results object with one bulk device-to-host copy
+
+        boxes.data is [x1, y1, x2, y2, (track_id,) conf, cls] per row.
+        """
+        data = results.boxes.data.cpu().numpy()
+        track_ids = data[:, 4] if data.shape[1] == 7 else None
+        return cls(data[:, :4], data[:, -2], data[:, -1], results.names, track_ids)
+
+    @classmethod
+    def empty(cls, names=None):
+        """Result with no detections"""
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), names)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def select(self, mask):
+        """Return a new result holding only the rows selected by a boolean mask or index array"""
+        return DetectionResult(
+            self.boxes[mask],
+            self.scores[mask],
+            self.class_ids[mask],
+            self.names,
+            None if self.track_ids is None else self.track_ids[mask]
+        )
+
+    def class_mask(self, class_ids):
+        """Boolean mask of detections whose class is in class_ids"""
+        return np.isin(self.class_ids, np.fromiter(class_ids, dtype=np.int32))
+
+    def label(self, index, label_map=None):
+        """Name of one detection, preferring label_map over the model's own names"""
+        class_id = int(self.class_ids[index])
+        if label_map and class_id in label_map:
+            return label_map[class_id]
+        return self.names.get(class_id, str(class_id))
+
+    def labels(self, label_map=None):
+        """Names of all detections"""
+        return [self.label(i, label_map) for i in range(len(self))]
+
+    def to_dicts(self, label_map=None):
+        """
+        Per-detection dict view for JSON responses
+
+        Returns:
+            List of dicts with class_id, class_name, confidence, bbox and center
+        """
+        dicts = []
+        for i in range(len(self)):
+            item = {
+                'class_id': int(self.class_ids[i]),
+                'class_name': self.label(i, label_map),
+                'confidence': float(self.scores[i]),
+                'bbox': self.boxes[i].tolist(),
+                'center': self.centers[i].tolist()
+            }
+            if self.track_ids is not None:
+                item['track_id'] = int(self.track_ids[i])
+            dicts.append(item)
+        return dicts
@@ -6,19 +6,26 @@ Stores comprehensive data in netra_r1 table
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import time
 from datetime import datetime, timedelta
 import requests
 import json
 import os
-from collections import deque
 import base64
 import threading
 from pathlib import Path
+from backend_client import get_backend_client
+from frame_grabber import LatestFrameGrabber
+from proximity import nearest
+from frame_ring import FrameRingBuffer
+from evidence_pipeline import EvidenceWorkerPool
+from incident_outbox import IncidentOutbox
+from detection_engine import GARBAGE_CLASSES, DetectionEngine
 
 class NetraR1Detector:
-    def __init__(self, model_path='yolov8n.pt', confidence_threshold=0.6):
+    def __init__(self, model_path='yolov8n.pt', confidence_threshold=0.6,
+                 evidence_scale=1.0, evidence_jpeg_quality=80, evidence_workers=2,
+                 inference_backend=None, precision=None, garbage_classes=None):
         """
         Initialize Netra.R1 Enhanced Detection System
         
@@ -27,32 +34,51 @@ class NetraR1Detector:
         - 10-second video buffer recording
         - Screenshot at exact moment of incident
         - Comprehensive incident logging to netra_r1 table
+        
+        Args:
+            model_path: Path to YOLOv8 model
+            confidence_threshold: Minimum confidence for detections
+            evidence_scale: Downscale factor for buffered evidence frames
+            evidence_jpeg_quality: Keep buffered frames JPEG-compressed at this quality
+                (None = raw frames; every incident then copies the whole buffer)
+            evidence_workers: Number of threads saving and uploading incident evidence
+            inference_backend: 'torch', 'onnxruntime', 'openvino' or 'auto'
+                (default: YOLO_BACKEND environment variable, else 'torch')
+            precision: 'fp32' or 'int8' (static INT8 ONNX model, see model_quantization.py)
+            garbage_classes: {class_id: name} map overriding the built-in garbage set
         """
         print("🚀 Initializing Netra.R1 Detection System...")
         
-        # Load YOLOv8 model
-        self.model = YOLO(model_path)
+        # Load YOLOv8 model (shared with any other detector in this process)
+        self.fps = 30
+        self.engine = DetectionEngine(
+            model_path, confidence_threshold,
+            garbage_classes=garbage_classes,
+            default_garbage_classes={
+                **GARBAGE_CLASSES,
+                # Add bags and backpacks as potential garbage
+                24: 'backpack', 26: 'handbag', 28: 'suitcase'
+            },
+            inference_backend=inference_backend,
+            precision=precision,
+            tracker_max_age=self.fps
+        )
+        self.inference = self.engine.inference
         self.confidence_threshold = confidence_threshold
+        self.garbage_classes = self.engine.garbage_classes
+        self.person_class_id = self.engine.person_class_id
+        self.inference_classes = self.engine.inference_classes
         
         # Face detection using Haar Cascade (faster than deep learning)
         cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         self.face_cascade = cv2.CascadeClassifier(cascade_path)
         
-        # Garbage classes from COCO dataset
-        self.garbage_classes = {
-            39: 'bottle', 40: 'wine glass', 41: 'cup', 42: 'fork',
-            43: 'knife', 44: 'spoon', 45: 'bowl', 46: 'banana',
-            47: 'apple', 48: 'sandwich', 49: 'orange', 50: 'broccoli',
-            51: 'carrot', 52: 'hot dog', 53: 'pizza', 54: 'donut', 55: 'cake',
-            # Add bags and backpacks as potential garbage
-            24: 'backpack', 26: 'handbag', 28: 'suitcase'
-        }
-        
-        self.person_class_id = 0
-        
         # Video buffer - stores last 10 seconds (300 frames at 30fps)
-        self.video_buffer = deque(maxlen=300)
-        self.fps = 30
+        # JPEG frames make incident snapshots a list of references (shared
+        # with the live buffer) instead of a 300-frame pixel copy
+        self.video_buffer = FrameRingBuffer(
+            300, scale=evidence_scale, jpeg_quality=evidence_jpeg_quality
+        )
         
         # Tracking state
         self.person_tracker = {}
@@ -69,7 +95,21 @@ class NetraR1Detector:
             path.mkdir(parents=True, exist_ok=True)
         
         # Backend API
-        self.api_url = "http://localhost:3001/api"
+        self.backend = get_backend_client()
+        self.api_url = self.backend.base_url
+        
+        # Incidents and uploads are recorded on disk before sending, and
+        # replayed by a background drainer if the backend is unreachable
+        self.outbox = IncidentOutbox(self.base_path / 'outbox.db', self.backend).start_drainer()
+        
+        # Evidence is saved, uploaded and logged off the detection thread
+        self.evidence_pool = EvidenceWorkerPool(num_workers=evidence_workers, name='netra-evidence')
+        self.evidence_stages = [
+            ('culprit_face', self._evidence_face_stage),
+            ('screenshot', self._evidence_screenshot_stage),
+            ('video', self._evidence_video_stage),
+            ('deliver', self._evidence_deliver_stage)
+        ]
         
         print("✅ Netra.R1 System Ready!")
         print(f"📊 Confidence Threshold: {confidence_threshold}")
@@ -114,29 +154,22 @@ class NetraR1Detector:
         print(f"😈 Culprit face captured: {face_filename}")
         return str(face_path)
     
-    def save_video_evidence(self, incident_id, description):
+    def save_video_evidence(self, incident_id, description, video_clip=None):
         """
         Save last 10 seconds of video buffer as evidence
+        
+        Args:
+            video_clip: Frozen FrameRingBuffer snapshot (defaults to the live buffer)
         """
-        if len(self.video_buffer) == 0:
+        video_clip = video_clip if video_clip is not None else self.video_buffer
+        if len(video_clip) == 0:
             return None
         
         video_filename = f"incident_{incident_id}.mp4"
         video_path = self.videos_path / video_filename
         
-        # Get video dimensions from first frame
-        first_frame = self.video_buffer[0]
-        height, width = first_frame.shape[:2]
-        
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(video_path), fourcc, self.fps, (width, height))
-        
-        # Write all buffered frames
-        for frame in self.video_buffer:
-            out.write(frame)
-        
-        out.release()
+        # Encode buffered frames directly from the ring buffer
+        video_clip.write_video(video_path, self.fps)
         
         print(f"📹 10-second video evidence saved: {video_filename}")
         return str(video_path)
@@ -165,8 +198,8 @@ class NetraR1Detector:
         try:
             with open(file_path, 'rb') as f:
                 files = {file_type: (os.path.basename(file_path), f)}
-                response = requests.post(
-                    f"{self.api_url}/upload/netra-evidence",
+                response = self.backend.post(
+                    "/upload/netra-evidence",
                     files=files,
                     timeout=30
                 )
@@ -196,8 +229,8 @@ class NetraR1Detector:
         - Detection confidence
         """
         try:
-            response = requests.post(
-                f"{self.api_url}/netra-r1/incidents",
+            response = self.backend.post(
+                "/netra-r1/incidents",
                 json=incident_data,
                 timeout=10
             )
@@ -212,41 +245,63 @@ class NetraR1Detector:
             print(f"❌ Error logging to Netra.R1: {e}")
             return None
     
+    def _evidence_face_stage(self, job):
+        if job['face_bbox'] is None:
+            return {'culprit_face': None}
+        return {'culprit_face': self.capture_culprit_face(job['frame'], job['face_bbox'], job['incident_id'])}
+    
+    def _evidence_screenshot_stage(self, job):
+        return {'screenshot': self.save_incident_screenshot(job['frame'], job['incident_id'])}
+    
+    def _evidence_video_stage(self, job):
+        video_evidence = self.save_video_evidence(
+            job['incident_id'],
+            f"Person throwing garbage at {job['location']}",
+            job['video_clip']
+        )
+        # Release the frozen frames as soon as they are encoded
+        return {'video_evidence': video_evidence, 'video_clip': None}
+    
+    def _evidence_deliver_stage(self, job, send_now=True):
+        """Upload evidence and log the incident through the durable outbox"""
+        uploads = [
+            {'field': field, 'path': job[key], 'endpoint': '/upload/netra-evidence', 'form_field': form_field}
+            for field, key, form_field in [
+                ('culprit_face_url', 'culprit_face', 'image'),
+                ('screenshot_url', 'screenshot', 'image'),
+                ('video_url', 'video_evidence', 'video')
+            ]
+            if job[key]
+        ]
+        
+        result = self.outbox.submit('netra_incident', {
+            'uploads': uploads,
+            'request': {'path': '/netra-r1/incidents', 'json': job['incident_data']}
+        }, send_now=send_now)
+        
+        if result is not None:
+            print(f"✅ Incident logged to Netra.R1 database")
+        else:
+            print(f"📥 Incident {job['incident_id']} kept in outbox for retry")
+    
+    def _spill_evidence(self, job):
+        """
+        Evidence queue is full: record the incident in the outbox right away
+        with just its screenshot, instead of dropping it
+        
+        Runs on the detection thread, so nothing is uploaded here; the outbox
+        drainer delivers it.
+        """
+        job.update(self._evidence_screenshot_stage(job))
+        job.update(culprit_face=None, video_evidence=None, video_clip=None)
+        self._evidence_deliver_stage(job, send_now=False)
+    
     def detect_and_track(self, frame):
         """
         Run YOLO detection and track persons with garbage
         """
         # Run YOLO detection
-        results = self.model(frame, conf=self.confidence_threshold)[0]
-        
-        detections = {
-            'garbage': [],
-            'persons': [],
-            'timestamp': datetime.now()
-        }
-        
-        # Process YOLO detections
-        for box in results.boxes:
-            class_id = int(box.cls[0])
-            confidence = float(box.conf[0])
-            bbox = box.xyxy[0].cpu().numpy()
-            
-            center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
-            
-            if class_id in self.garbage_classes:
-                detections['garbage'].append({
-                    'class_id': class_id,
-                    'type': self.garbage_classes[class_id],
-                    'confidence': confidence,
-                    'bbox': bbox,
-                    'center': center
-                })
-            elif class_id == self.person_class_id:
-                detections['persons'].append({
-                    'confidence': confidence,
-                    'bbox': bbox,
-                    'center': center
-                })
+        detections = self.engine.detect(frame)
         
         # Detect faces separately for better accuracy
         faces = self.detect_faces(frame)
@@ -257,6 +312,23 @@ class NetraR1Detector:
         
         return detections
     
+    def get_tracker(self, camera_id):
+        """
+        Get (or create) the person tracker for a camera
+        """
+        return self.engine.get_tracker(camera_id)
+    
+    def predict_detections(self, detections, camera_id):
+        """
+        Carry detections forward to a frame where inference was skipped
+        
+        Person boxes come from the tracker's motion prediction; garbage and
+        faces are kept from the last detected frame.
+        """
+        predicted = self.engine.predict(detections, camera_id)
+        predicted['faces'] = detections['faces']
+        return predicted
+    
     def check_throwing_incident(self, detections, frame, camera_id, location):
         """
         Detect person throwing garbage and capture evidence
@@ -271,31 +343,31 @@ class NetraR1Detector:
         current_time = time.time()
         incidents = []
         
+        persons = detections['persons']
+        
+        # Stable person IDs across frames
+        self.engine.track(detections, camera_id)
+        
+        # Count garbage within 150 pixels of every person in one pass
+        nearby_counts = self.engine.nearby_garbage_counts(detections, 150)
+        face_centers = [face['center'] for face in detections['faces']]
+        
         # Check each person
-        for person_idx, person in enumerate(detections['persons']):
-            person_center = person['center']
-            person_bbox = person['bbox']
+        for person_idx in range(len(persons)):
+            person_center = persons.centers[person_idx]
+            person_confidence = float(persons.scores[person_idx])
+            nearby_count = int(nearby_counts[person_idx])
             
-            # Check proximity to garbage
-            nearby_garbage = []
-            for garbage in detections['garbage']:
-                dist = np.sqrt(
-                    (person_center[0] - garbage['center'][0])**2 +
-                    (person_center[1] - garbage['center'][1])**2
-                )
-                if dist < 150:  # Within 150 pixels
-                    nearby_garbage.append(garbage)
-            
-            # Create person ID based on position
-            person_id = f"{camera_id}_{int(person_center[0])}_{int(person_center[1])}"
+            # Person ID from the tracker
+            person_id = f"{camera_id}_{persons.track_ids[person_idx]}"
             
             # Track person
             if person_id not in self.person_tracker:
                 self.person_tracker[person_id] = {
                     'first_seen': current_time,
                     'last_seen': current_time,
-                    'had_garbage': len(nearby_garbage) > 0,
-                    'garbage_count': len(nearby_garbage),
+                    'had_garbage': nearby_count > 0,
+                    'garbage_count': nearby_count,
                     'frames_tracked': 1
                 }
             else:
@@ -304,7 +376,7 @@ class NetraR1Detector:
                 prev_data['frames_tracked'] += 1
                 
                 # Check if person had garbage but now doesn't (THROWING DETECTED!)
-                if prev_data['had_garbage'] and len(nearby_garbage) == 0:
+                if prev_data['had_garbage'] and nearby_count == 0:
                     # Check cooldown to avoid duplicates
                     if person_id not in self.incident_cooldown or \
                        (current_time - self.incident_cooldown[person_id]) > 10:
@@ -317,63 +389,46 @@ class NetraR1Detector:
                         incident_id = f"{camera_id}_{int(current_time)}"
                         
                         # Find closest face
-                        culprit_face = None
-                        if detections['faces']:
-                            min_dist = float('inf')
-                            closest_face = None
-                            for face in detections['faces']:
-                                dist = np.sqrt(
-                                    (person_center[0] - face['center'][0])**2 +
-                                    (person_center[1] - face['center'][1])**2
-                                )
-                                if dist < min_dist:
-                                    min_dist = dist
-                                    closest_face = face
-                            
-                            if closest_face and min_dist < 200:
-                                culprit_face = self.capture_culprit_face(
-                                    frame, closest_face['bbox'], incident_id
-                                )
-                        
-                        # Save screenshot
-                        screenshot = self.save_incident_screenshot(frame, incident_id)
-                        
-                        # Save 10-second video
-                        video_evidence = self.save_video_evidence(
-                            incident_id,
-                            f"Person throwing garbage at {location}"
-                        )
-                        
-                        # Upload to cloud
-                        culprit_face_url = self.upload_to_backend(culprit_face, 'image') if culprit_face else None
-                        screenshot_url = self.upload_to_backend(screenshot, 'image')
-                        video_url = self.upload_to_backend(video_evidence, 'video') if video_evidence else None
+                        face_bbox = None
+                        face_idx, face_dist = nearest([person_center], face_centers)
+                        if face_idx is not None and face_dist[0] < 200:
+                            face_bbox = detections['faces'][face_idx[0]]['bbox']
                         
                         # Prepare incident data for Netra.R1 database
+                        # (evidence URLs are filled in by the evidence workers)
                         incident_data = {
                             'incident_id': incident_id,
                             'camera_id': camera_id,
                             'location': location,
                             'timestamp': datetime.now().isoformat(),
                             'incident_type': 'garbage_throwing',
-                            'culprit_face_url': culprit_face_url,
-                            'screenshot_url': screenshot_url,
-                            'video_url': video_url,
+                            'culprit_face_url': None,
+                            'screenshot_url': None,
+                            'video_url': None,
                             'video_duration_seconds': 10,
                             'garbage_type': prev_data.get('garbage_type', 'unknown'),
-                            'detection_confidence': person['confidence'],
+                            'detection_confidence': person_confidence,
                             'description': f"Person caught throwing garbage at {location}. AI-verified incident with face capture and video evidence.",
                             'status': 'pending_review',
                             'priority': 'high',
                             'metadata': {
                                 'frames_tracked': prev_data['frames_tracked'],
                                 'garbage_count': prev_data['garbage_count'],
-                                'person_confidence': person['confidence']
+                                'person_confidence': person_confidence
                             }
                         }
                         
-                        # Log to database
-                        self.log_to_netra_r1_table(incident_data)
+                        # Hand a snapshot to the evidence workers and keep detecting
+                        evidence_job = {
+                            'incident_id': incident_id,
+                            'location': location,
+                            'frame': frame.copy(),
+                            'face_bbox': face_bbox,
+                            'video_clip': self.video_buffer.snapshot(),
+                            'incident_data': dict(incident_data)
+                        }
+                        if not self.evidence_pool.submit(incident_id, self.evidence_stages, evidence_job):
+                            self._spill_evidence(evidence_job)
                         
                         incidents.append(incident_data)
                         
@@ -384,8 +439,8 @@ class NetraR1Detector:
                         del self.person_tracker[person_id]
                 
                 # Update tracker
-                prev_data['had_garbage'] = len(nearby_garbage) > 0
-                prev_data['garbage_count'] = len(nearby_garbage)
+                prev_data['had_garbage'] = nearby_count > 0
+                prev_data['garbage_count'] = nearby_count
         
         # Clean up old tracks
         self.person_tracker = {
@@ -399,25 +454,7 @@ class NetraR1Detector:
         """
         Draw bounding boxes and labels on frame
         """
-        annotated = frame.copy()
-        
-        # Draw garbage (RED boxes)
-        for garbage in detections['garbage']:
-            bbox = garbage['bbox'].astype(int)
-            cv2.rectangle(annotated, (bbox[0], bbox[1]), (bbox[2], bbox[3]),
-                         (0, 0, 255), 3)
-            label = f"{garbage['type']} {garbage['confidence']:.2f}"
-            cv2.putText(annotated, label, (bbox[0], bbox[1] - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        
-        # Draw persons (GREEN boxes)
-        for person in detections['persons']:
-            bbox = person['bbox'].astype(int)
-            cv2.rectangle(annotated, (bbox[0], bbox[1]), (bbox[2], bbox[3]),
-                         (0, 255, 0), 3)
-            label = f"Person {person['confidence']:.2f}"
-            cv2.putText(annotated, label, (bbox[0], bbox[1] - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        annotated = self.engine.draw(frame.copy(), detections, thickness=3, font_scale=0.6)
         
         # Draw faces (YELLOW boxes)
         for face in detections['faces']:
@@ -432,7 +469,7 @@ class NetraR1Detector:
             f"Garbage: {len(detections['garbage'])}",
             f"Persons: {len(detections['persons'])}",
             f"Faces: {len(detections['faces'])}",
-            f"Buffer: {len(self.video_buffer)}/300 frames"
+            f"Buffer: {len(self.video_buffer)}/{self.video_buffer.capacity} frames"
         ]
         
         y_pos = 30
@@ -444,7 +481,8 @@ class NetraR1Detector:
         return annotated
     
     def monitor_camera(self, camera_source=0, camera_id='netra_cam_1',
-                      location='Municipal Area', display=True):
+                      location='Municipal Area', display=True, latest_frame_only=False,
+                      detect_interval=1):
         """
         Monitor camera feed for garbage throwing incidents
         
@@ -453,6 +491,10 @@ class NetraR1Detector:
             camera_id: Unique camera identifier
             location: Physical location description
             display: Show live feed window
+            latest_frame_only: Grab frames on a separate thread and always process
+                the newest one (the video buffer then only holds processed frames)
+            detect_interval: Run detection on every k-th frame only; the person
+                tracker predicts positions on the frames in between
         """
         print(f"\n{'='*60}")
         print(f"🎥 Netra.R1 Monitoring Started")
@@ -460,21 +502,26 @@ class NetraR1Detector:
         print(f"🆔 Camera: {camera_id}")
         print(f"{'='*60}\n")
         
-        cap = cv2.VideoCapture(camera_source)
+        if latest_frame_only:
+            cap = LatestFrameGrabber(camera_source, width=1920, height=1080, fps=self.fps).start()
+        else:
+            cap = cv2.VideoCapture(camera_source)
         
         if not cap.isOpened():
             print(f"❌ Failed to open camera: {camera_source}")
             return
         
-        # Set resolution
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-        cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if not latest_frame_only:
+            # Set resolution
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
         
         frame_count = 0
         fps_counter = 0
         fps_start = time.time()
         current_fps = 0
+        detections = None
         
         print("✅ Monitoring active. Press 'q' to quit.\n")
         
@@ -487,16 +534,20 @@ class NetraR1Detector:
                 
                 frame_count += 1
                 
-                # Add frame to video buffer
-                self.video_buffer.append(frame.copy())
-                
-                # Run detection
-                detections = self.detect_and_track(frame)
+                # Add frame to video buffer (copied into its preallocated slot)
+                self.video_buffer.append(frame)
                 
-                # Check for throwing incidents
-                incidents = self.check_throwing_incident(
-                    detections, frame, camera_id, location
-                )
+                if detections is None or frame_count % detect_interval == 0:
+                    # Run detection
+                    detections = self.detect_and_track(frame)
+                    
+                    # Check for throwing incidents
+                    incidents = self.check_throwing_incident(
+                        detections, frame, camera_id, location
+                    )
+                else:
+                    # Skipped frame: let the tracker predict where people moved
+                    detections = self.predict_detections(detections, camera_id)
                 
                 # Draw detections
                 if display:
@@ -528,6 +579,15 @@ class NetraR1Detector:
             cap.release()
             if display:
                 cv2.destroyAllWindows()
+            if latest_frame_only:
+                stats = cap.get_stats()
+                print(f"📉 Dropped {stats['frames_dropped']} of {stats['frames_grabbed']} frames")
+            
+            # Let pending evidence finish uploading
+            self.evidence_pool.drain()
+            evidence_stats = self.evidence_pool.get_stats()
+            print(f"🗂️ Evidence jobs: {evidence_stats['jobs_completed']} completed, "
+                  f"{evidence_stats['jobs_failed']} failed, {evidence_stats['jobs_dropped']} sent to outbox without video")
             print(f"\n✅ Netra.R1 monitoring stopped for {camera_id}")
 
 
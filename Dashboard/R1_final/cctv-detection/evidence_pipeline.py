@@ -0,0 +1,117 @@
+"""
+Evidence Pipeline
+Worker pool that saves, uploads and logs incident evidence off the
+detection thread
+"""
+
+import queue
+import threading
+import time
+
+
+class EvidenceWorkerPool:
+    def __init__(self, num_workers=2, max_queue_size=32, name='evidence'):
+        """
+        Initialize the evidence worker pool
+
+        Args:
+            num_workers: Number of worker threads processing evidence jobs
+            max_queue_size: Maximum pending jobs; new jobs are refused when full
+                (submit returns False and the caller decides what to keep)
+            name: Label used in log messages
+        """
+        self.name = name
+        self.job_queue = queue.Queue(maxsize=max_queue_size)
+        self.workers = []
+
+        # Statistics
+        self.stats_lock = threading.Lock()
+        self.jobs_submitted = 0
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.jobs_dropped = 0
+        self.stage_stats = {}
+
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._run, name=f"{name}-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, job_id, stages, context):
+        """
+        Queue an evidence job without blocking the caller
+
+        Args:
+            job_id: Identifier used in log messages (e.g. incident ID)
+            stages: List of (stage_name, fn) run in order; each fn receives the
+                context dict and may return a dict of values to merge into it
+            context: Dict with the frame snapshot and incident metadata
+
+        Returns:
+            True if the job was queued, False if the queue was full
+        """
+        try:
+            self.job_queue.put_nowait((job_id, stages, context))
+        except queue.Full:
+            with self.stats_lock:
+                self.jobs_dropped += 1
+            print(f"⚠️ Evidence queue full, job {job_id} not queued")
+            return False
+
+        with self.stats_lock:
+            self.jobs_submitted += 1
+        return True
+
+    def _record_stage(self, stage_name, elapsed):
+        with self.stats_lock:
+            stats = self.stage_stats.setdefault(stage_name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+
+    def _run(self):
+        """Worker loop"""
+        while True:
+            job_id, stages, context = self.job_queue.get()
+            stage_name = None
+            try:
+                for stage_name, fn in stages:
+                    start = time.time()
+                    try:
+                        updates = fn(context)
+                    finally:
+                        self._record_stage(stage_name, time.time() - start)
+                    if updates:
+                        context.update(updates)
+
+                with self.stats_lock:
+                    self.jobs_completed += 1
+            except Exception as e:
+                print(f"❌ Evidence job {job_id} failed at stage '{stage_name}': {e}")
+                with self.stats_lock:
+                    self.jobs_failed += 1
+            finally:
+                self.job_queue.task_done()
+
+    def drain(self):
+        """Block until every queued job has been processed"""
+        self.job_queue.join()
+
+    def get_stats(self):
+        """Return queue depth, job counters and per-stage latency"""
+        with self.stats_lock:
+            return {
+                'queue_depth': self.job_queue.qsize(),
+                'jobs_submitted': self.jobs_submitted,
+                'jobs_completed': self.jobs_completed,
+                'jobs_failed': self.jobs_failed,
+                'jobs_dropped': self.jobs_dropped,
+                'stages': {
+                    name: {
+                        'count': stats['count'],
+                        'avg_ms': stats['total'] / stats['count'] * 1000,
+                        'max_ms': stats['max'] * 1000
+                    }
+                    for name, stats in self.stage_stats.items()
+                }
+            }
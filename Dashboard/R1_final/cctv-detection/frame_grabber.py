@@ -0,0 +1,140 @@
+"""
+Latest-Frame Grabber
+Reads a camera stream on a dedicated thread and keeps only the newest frame,
+so slow detection never lets the OpenCV/FFmpeg buffer build up a backlog
+"""
+
+import cv2
+import threading
+import time
+
+
+class LatestFrameGrabber:
+    def __init__(self, source, width=None, height=None, fps=None):
+        """
+        Open a camera stream for latest-frame-only capture
+
+        Args:
+            source: Camera index (0, 1, 2) or RTSP URL
+            width: Optional capture width
+            height: Optional capture height
+            fps: Optional capture frame rate
+        """
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+
+        # Keep the backend's own buffer as small as the driver allows
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Single-slot ring: newest frame plus a sequence number
+        self.condition = threading.Condition()
+        self.latest_frame = None
+        self.latest_seq = 0
+        self.read_seq = 0
+        self.stream_ended = False
+
+        # Statistics
+        self.frames_grabbed = 0
+        self.frames_read = 0
+        self.frames_dropped = 0
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start the grabber thread"""
+        if not self.cap.isOpened():
+            return self
+
+        self.thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def isOpened(self):
+        """Mirror cv2.VideoCapture.isOpened so the grabber is a drop-in replacement"""
+        return self.cap.isOpened()
+
+    def _grab_loop(self):
+        """
+        Continuously decode frames, overwriting any frame nobody picked up
+
+        The capture is released here, once the last read() has returned;
+        releasing it from another thread mid-read is unsafe with several
+        OpenCV backends.
+        """
+        try:
+            while not self.stop_event.is_set():
+                ret, frame = self.cap.read()
+
+                with self.condition:
+                    if not ret:
+                        self.stream_ended = True
+                        self.condition.notify_all()
+                        break
+
+                    if self.latest_seq > self.read_seq:
+                        self.frames_dropped += 1
+
+                    self.latest_frame = frame
+                    self.latest_seq += 1
+                    self.frames_grabbed += 1
+                    self.condition.notify_all()
+        finally:
+            self.cap.release()
+
+    def read(self, timeout=5.0):
+        """
+        Return the newest frame not yet returned
+
+        Blocks until a fresh frame arrives, the stream ends or the timeout expires.
+
+        Returns:
+            (ret, frame) like cv2.VideoCapture.read
+        """
+        deadline = time.time() + timeout
+
+        with self.condition:
+            while self.latest_seq == self.read_seq:
+                remaining = deadline - time.time()
+                if self.stream_ended or self.stop_event.is_set() or remaining <= 0:
+                    return False, None
+                self.condition.wait(remaining)
+
+            self.read_seq = self.latest_seq
+            self.frames_read += 1
+            return True, self.latest_frame
+
+    def release(self):
+        """
+        Stop the grabber thread and release the capture
+
+        If the thread is still blocked in a read after the join timeout, it
+        releases the capture itself as soon as that read returns.
+        """
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+
+        if self.thread is None:
+            self.cap.release()
+            return
+
+        self.thread.join(timeout=2)
+        if self.thread.is_alive():
+            print(f"⚠️ Frame grabber for {self.source} still blocked in read, releasing when it returns")
+
+    def get_stats(self):
+        """Return capture statistics"""
+        with self.condition:
+            return {
+                'frames_grabbed': self.frames_grabbed,
+                'frames_read': self.frames_read,
+                'frames_dropped': self.frames_dropped
+            }
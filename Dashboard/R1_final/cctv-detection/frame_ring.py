@@ -0,0 +1,154 @@
+"""
+Frame Ring Buffer
+Preallocated, fixed-size buffer of the most recent video frames used for
+incident evidence clips
+"""
+
+import cv2
+import numpy as np
+
+
+class FrameRingBuffer:
+    def __init__(self, capacity, scale=1.0, jpeg_quality=None):
+        """
+        Initialize the ring buffer
+
+        Storage is a single (capacity, H, W, 3) uint8 block allocated on the
+        first frame and overwritten in place afterwards.
+
+        Args:
+            capacity: Number of frames kept (e.g. 300 = 10 seconds at 30 fps)
+            scale: Downscale factor applied to stored frames (1.0 = full resolution)
+            jpeg_quality: Store JPEG-compressed frames at this quality instead of raw pixels
+        """
+        self.capacity = capacity
+        self.scale = scale
+        self.jpeg_quality = jpeg_quality
+
+        self.frames = None  # Raw mode: (capacity, H, W, 3) block
+        self.encoded = [None] * capacity if jpeg_quality else None  # JPEG mode slots
+        self.frame_shape = None  # (H, W) of stored frames
+
+        self.next_index = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _stored_size(self, frame):
+        height, width = frame.shape[:2]
+        return max(1, int(height * self.scale)), max(1, int(width * self.scale))
+
+    def append(self, frame):
+        """Write a frame into the next slot, overwriting the oldest one when full"""
+        if self.frame_shape is None:
+            self.frame_shape = self._stored_size(frame)
+            if not self.jpeg_quality:
+                height, width = self.frame_shape
+                self.frames = np.empty((self.capacity, height, width, 3), dtype=np.uint8)
+
+        height, width = self.frame_shape
+        if self.jpeg_quality:
+            if frame.shape[:2] != self.frame_shape:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            self.encoded[self.next_index] = buffer if ok else None
+        elif frame.shape[:2] != self.frame_shape:
+            cv2.resize(frame, (width, height), dst=self.frames[self.next_index],
+                       interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(self.frames[self.next_index], frame)
+
+        self.next_index = (self.next_index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _slot(self, position):
+        """Map a chronological position (0 = oldest) to a storage slot"""
+        oldest = (self.next_index - self.count) % self.capacity
+        return (oldest + position) % self.capacity
+
+    def _range(self, start, end):
+        start, end, _ = slice(start, end).indices(self.count)
+        return start, max(start, end)
+
+    def get(self, position):
+        """Frame at a chronological position (0 = oldest, -1 = newest)"""
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError('frame index out of range')
+
+        slot = self._slot(position)
+        if self.jpeg_quality:
+            return cv2.imdecode(self.encoded[slot], cv2.IMREAD_COLOR)
+        return self.frames[slot]
+
+    def iter_frames(self, start=0, end=None):
+        """
+        Yield frames oldest to newest
+
+        In raw mode these are views into the buffer, so no pixels are copied.
+        """
+        start, end = self._range(start, end)
+        for position in range(start, end):
+            yield self.get(position)
+
+    def clip(self, start=0, end=None):
+        """
+        Contiguous (N, H, W, 3) array of frames oldest to newest
+
+        Returns a view when the range does not wrap around the end of the
+        buffer; otherwise the two halves are joined with a single copy.
+        """
+        start, end = self._range(start, end)
+        if end == start:
+            return np.empty((0, *(self.frame_shape or (0, 0)), 3), dtype=np.uint8)
+
+        if self.jpeg_quality:
+            return np.stack(list(self.iter_frames(start, end)))
+
+        first = self._slot(start)
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self.frames[first:last]
+        return np.concatenate([self.frames[first:], self.frames[:last - self.capacity]])
+
+    def snapshot(self):
+        """
+        Frozen copy of the current contents for use on another thread
+
+        Raw frames are copied once into a compact buffer; in JPEG mode only the
+        references to the encoded frames are copied.
+        """
+        frozen = FrameRingBuffer(max(1, self.count), self.scale, self.jpeg_quality)
+        frozen.frame_shape = self.frame_shape
+        frozen.count = self.count
+
+        if self.jpeg_quality:
+            frozen.encoded = [self.encoded[self._slot(i)] for i in range(self.count)] or [None]
+        elif self.count:
+            frames = self.clip()
+            frozen.frames = frames.copy() if frames.base is self.frames else frames
+
+        return frozen
+
+    def write_video(self, path, fps, start=0, end=None):
+        """
+        Encode buffered frames straight to a video file
+
+        Returns:
+            Number of frames written
+        """
+        start, end = self._range(start, end)
+        if end == start:
+            return 0
+
+        height, width = self.frame_shape
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(str(path), fourcc, fps, (width, height))
+
+        for frame in self.iter_frames(start, end):
+            out.write(frame)
+
+        out.release()
+        return end - start
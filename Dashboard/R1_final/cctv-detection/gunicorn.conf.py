@@ -0,0 +1,56 @@
+"""
+Gunicorn configuration for the YOLOv8 Detection API
+
+Pre-fork production server: every worker process loads and warms up its own
+copy of the model before it accepts requests.
+
+Usage (Linux/macOS):
+    gunicorn -c gunicorn.conf.py yolo_api_server:app
+
+Environment:
+    YOLO_API_BIND: Address to listen on (default 0.0.0.0:5000)
+    YOLO_API_WORKERS: Worker processes (default: CPU cores / YOLO_THREADS_PER_WORKER)
+    YOLO_THREADS_PER_WORKER: Torch intra-op threads per worker (default 2)
+    YOLO_API_THREADS: Request threads per worker (default 4)
+"""
+
+import os
+
+cpu_count = os.cpu_count() or 1
+torch_threads = max(1, int(os.environ.get('YOLO_THREADS_PER_WORKER', '2')))
+
+bind = os.environ.get('YOLO_API_BIND', '0.0.0.0:5000')
+
+# One model per worker; split the cores between them instead of letting every
+# worker's torch thread pool fight over all of them
+workers = int(os.environ.get('YOLO_API_WORKERS', max(1, cpu_count // torch_threads)))
+worker_class = 'gthread'
+threads = int(os.environ.get('YOLO_API_THREADS', '4'))
+
+# Load the model after fork: CUDA/torch state must not be shared across processes
+preload_app = False
+
+# Model load + warmup happens before a worker starts serving
+timeout = 120
+graceful_timeout = 30
+
+# Recycle workers now and then to cap memory growth
+max_requests = 2000
+max_requests_jitter = 200
+
+
+def post_fork(server, worker):
+    os.environ['OMP_NUM_THREADS'] = str(torch_threads)
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+
+def post_worker_init(worker):
+    from yolo_api_server import initialize_detector
+
+    os.makedirs('./screenshots', exist_ok=True)
+    initialize_detector(warmup=True)
+    worker.log.info(f"Worker {os.getpid()} ready ({torch_threads} torch threads)")
@@ -0,0 +1,270 @@
+"""
+Incident Outbox
+Durable SQLite outbox for incidents and evidence uploads, so nothing is lost
+while the Node backend is down
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from backend_client import get_backend_client
+
+MAX_BACKOFF_SECONDS = 300
+
+# How long a claimed job is hidden from other processes sharing the database
+CLAIM_LEASE_SECONDS = 120
+
+
+class PermanentDeliveryError(Exception):
+    """The backend rejected a job (4xx); retrying will not help"""
+
+
+class IncidentOutbox:
+    def __init__(self, db_path, client=None, batch_size=20, drain_interval=5):
+        """
+        Open (or create) the outbox
+
+        A job is a JSON dict:
+            {
+                'uploads': [{'field', 'path', 'endpoint', 'form_field', 'data'}],
+                'request': {'path', 'json'}
+            }
+        Each upload posts a local file and stores the returned URL into
+        request['json'][field]; the request is sent once all uploads succeed.
+
+        Args:
+            db_path: SQLite database file
+            client: BackendClient used for delivery (defaults to the shared client)
+            batch_size: Jobs replayed per drainer pass
+            drain_interval: Seconds between drainer passes
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.client = client or get_backend_client()
+        self.batch_size = batch_size
+        self.drain_interval = drain_interval
+
+        self.db_lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT
+            )
+        ''')
+        self.db.commit()
+
+        self.in_flight = set()
+        self.stop_event = threading.Event()
+        self.drainer = None
+
+    def record(self, kind, job, claimed=False):
+        """
+        Append a job to the outbox and return its ID
+
+        Args:
+            claimed: Hide the job from drainers for CLAIM_LEASE_SECONDS because
+                the caller is about to deliver it itself
+        """
+        now = time.time()
+        next_attempt_at = now + CLAIM_LEASE_SECONDS if claimed else now
+        with self.db_lock:
+            cursor = self.db.execute(
+                'INSERT INTO outbox (kind, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?)',
+                (kind, json.dumps(job), now, next_attempt_at)
+            )
+            self.db.commit()
+            return cursor.lastrowid
+
+    def submit(self, kind, job, send_now=True):
+        """
+        Record a job, then try to deliver it immediately
+
+        Returns:
+            Backend JSON response if delivered now, otherwise None (the
+            drainer retries it later)
+        """
+        job_id = self.record(kind, job, claimed=send_now)
+        if not send_now:
+            return None
+
+        with self.db_lock:
+            self.in_flight.add(job_id)
+        try:
+            _, result, _ = self._attempt(job_id, job)
+            return result
+        finally:
+            with self.db_lock:
+                self.in_flight.discard(job_id)
+
+    def _save_progress(self, job_id, job):
+        with self.db_lock:
+            self.db.execute('UPDATE outbox SET payload = ? WHERE id = ?', (json.dumps(job), job_id))
+            self.db.commit()
+
+    def _deliver(self, job_id, job):
+        """Run pending uploads, then the final request"""
+        request_spec = job['request']
+        body = request_spec.setdefault('json', {})
+
+        for upload in job.get('uploads', []):
+            if upload.get('url'):
+                continue
+
+            with open(upload['path'], 'rb') as f:
+                files = {upload.get('form_field', 'image'): (os.path.basename(upload['path']), f)}
+                response = self.client.post(upload['endpoint'], files=files,
+                                            data=upload.get('data'), timeout=30)
+            self._check(response)
+
+            upload['url'] = response.json().get('url') or upload['path']
+            body[upload['field']] = upload['url']
+            self._save_progress(job_id, job)
+
+        response = self.client.post(request_spec['path'], json=body, timeout=10)
+        self._check(response)
+        return response.json() if response.content else {}
+
+    def _check(self, response):
+        if 400 <= response.status_code < 500:
+            raise PermanentDeliveryError(f"HTTP {response.status_code}")
+        if response.status_code >= 300:
+            raise requests.HTTPError(f"HTTP {response.status_code}")
+
+    def _attempt(self, job_id, job):
+        """
+        Try one delivery and update the job's row accordingly
+
+        Returns:
+            (delivered, result, backend_unreachable)
+        """
+        try:
+            result = self._deliver(job_id, job)
+        except FileNotFoundError as e:
+            self._mark_failed(job_id, f"Missing evidence file: {e}", permanent=True)
+            return False, None, False
+        except PermanentDeliveryError as e:
+            self._mark_failed(job_id, str(e), permanent=True)
+            return False, None, False
+        except requests.ConnectionError as e:
+            self._mark_failed(job_id, str(e))
+            return False, None, True
+        except (requests.RequestException, ValueError) as e:
+            self._mark_failed(job_id, str(e))
+            return False, None, False
+
+        with self.db_lock:
+            self.db.execute('DELETE FROM outbox WHERE id = ?', (job_id,))
+            self.db.commit()
+        return True, result, False
+
+    def _mark_failed(self, job_id, error, permanent=False):
+        with self.db_lock:
+            row = self.db.execute('SELECT attempts FROM outbox WHERE id = ?', (job_id,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            backoff = min(MAX_BACKOFF_SECONDS, 2 ** attempts)
+            self.db.execute(
+                'UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, status = ? WHERE id = ?',
+                (attempts, time.time() + backoff, error, 'dead' if permanent else 'pending', job_id)
+            )
+            self.db.commit()
+
+        if permanent:
+            print(f"❌ Outbox job {job_id} rejected: {error}")
+        else:
+            print(f"⚠️ Outbox job {job_id} queued for retry in {backoff}s: {error}")
+
+    def drain_once(self):
+        """
+        Replay one batch of due jobs, oldest first
+
+        Stops early when the backend is unreachable so a down backend is not
+        hammered with the whole backlog.
+
+        Returns:
+            Number of jobs delivered
+        """
+        with self.db_lock:
+            rows = self.db.execute(
+                "SELECT id, payload FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (time.time(), self.batch_size + len(self.in_flight))
+            ).fetchall()
+            rows = [(job_id, payload) for job_id, payload in rows if job_id not in self.in_flight]
+            rows = [(job_id, payload) for job_id, payload in rows[:self.batch_size] if self._claim(job_id)]
+            self.db.commit()
+            self.in_flight.update(job_id for job_id, _ in rows)
+
+        delivered = 0
+        try:
+            for job_id, payload in rows:
+                if self.stop_event.is_set():
+                    break
+                ok, _, unreachable = self._attempt(job_id, json.loads(payload))
+                if ok:
+                    delivered += 1
+                elif unreachable:
+                    break
+        finally:
+            with self.db_lock:
+                self.in_flight.difference_update(job_id for job_id, _ in rows)
+
+        if delivered:
+            print(f"📤 Outbox replayed {delivered} job(s), {self.pending_count()} pending")
+        return delivered
+
+    def _claim(self, job_id):
+        """
+        Lease a due job so drainers in other processes (e.g. other server
+        workers using the same database) skip it. Caller holds db_lock.
+        """
+        now = time.time()
+        cursor = self.db.execute(
+            "UPDATE outbox SET next_attempt_at = ? WHERE id = ? AND status = 'pending' AND next_attempt_at <= ?",
+            (now + CLAIM_LEASE_SECONDS, job_id, now)
+        )
+        return cursor.rowcount == 1
+
+    def _drain_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                delivered = self.drain_once()
+            except Exception as e:
+                print(f"❌ Outbox drainer error: {e}")
+                delivered = 0
+
+            # Keep going immediately while there is a backlog being delivered
+            if not delivered:
+                self.stop_event.wait(self.drain_interval)
+
+    def start_drainer(self):
+        """Start the background drainer thread"""
+        if self.drainer is None or not self.drainer.is_alive():
+            self.stop_event.clear()
+            self.drainer = threading.Thread(target=self._drain_loop, name='outbox-drainer', daemon=True)
+            self.drainer.start()
+        return self
+
+    def stop_drainer(self, timeout=5):
+        self.stop_event.set()
+        if self.drainer is not None:
+            self.drainer.join(timeout)
+            self.drainer = None
+
+    def pending_count(self):
+        """Number of jobs waiting for delivery"""
+        with self.db_lock:
+            return self.db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
@@ -0,0 +1,354 @@
+"""
+Inference Backends
+Pluggable YOLOv8 inference: the ultralytics/PyTorch path, or an exported ONNX
+model run with ONNX Runtime or OpenVINO using our own batched letterbox
+preprocessing and NumPy NMS. Every backend returns DetectionResults.
+"""
+
+import ast
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from detection_result import DetectionResult
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import openvino as ov
+except ImportError:
+    try:
+        from openvino import runtime as ov
+    except ImportError:
+        ov = None
+
+BACKENDS = ('torch', 'onnxruntime', 'openvino', 'auto')
+DEFAULT_BACKEND = os.environ.get('YOLO_BACKEND', 'torch')
+
+PRECISIONS = ('fp32', 'int8')
+DEFAULT_PRECISION = os.environ.get('YOLO_PRECISION', 'fp32')
+DEFAULT_CALIBRATION_DIR = os.environ.get('YOLO_CALIBRATION_DIR')
+
+# ultralytics defaults, so every backend gives the same detections
+DEFAULT_IOU = 0.7
+MAX_DETECTIONS = 300
+MAX_NMS_CANDIDATES = 30000
+PAD_VALUE = 114
+
+COCO_NAMES = {i: name for i, name in enumerate([
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat',
+    'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+    'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack',
+    'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball',
+    'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket',
+    'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple',
+    'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush'
+])}
+
+
+def configured_garbage_classes(default, names=None):
+    """
+    Garbage class map for this deployment
+
+    YOLO_GARBAGE_CLASSES (comma-separated class IDs, e.g. "39,40,41,24,26")
+    replaces the detector's built-in set; names come from the model.
+    """
+    override = os.environ.get('YOLO_GARBAGE_CLASSES')
+    if not override:
+        return default
+
+    names = names or COCO_NAMES
+    return {int(class_id): names.get(int(class_id), str(class_id)) for class_id in override.split(',') if class_id.strip()}
+
+
+def class_filter(garbage_classes, person_class_id=0):
+    """Class IDs passed to inference, so other classes are dropped before NMS"""
+    return sorted(set(garbage_classes) | {person_class_id})
+
+
+def letterbox(frames, size=640):
+    """
+    Resize and pad a batch of BGR frames to size x size, keeping aspect ratio
+
+    Frames are resized straight into one preallocated uint8 canvas; the
+    BGR->RGB flip, HWC->CHW transpose and scaling to [0, 1] are then done
+    once for the whole batch.
+
+    Returns:
+        blob: (N, 3, size, size) float32 network input
+        meta: (N, 3) array of [scale, pad_x, pad_y] to map boxes back
+    """
+    canvas = np.full((len(frames), size, size, 3), PAD_VALUE, dtype=np.uint8)
+    meta = np.empty((len(frames), 3), dtype=np.float32)
+
+    for i, frame in enumerate(frames):
+        height, width = frame.shape[:2]
+        scale = min(size / height, size / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+        target = canvas[i, pad_y:pad_y + new_h, pad_x:pad_x + new_w]
+        if (new_h, new_w) == (height, width):
+            np.copyto(target, frame)
+        else:
+            cv2.resize(frame, (new_w, new_h), dst=target, interpolation=cv2.INTER_LINEAR)
+        meta[i] = (scale, pad_x, pad_y)
+
+    blob = np.ascontiguousarray(canvas[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32)
+    blob *= 1 / 255.0
+    return blob, meta
+
+
+def nms(boxes, scores, iou_threshold):
+    """
+    Greedy non-maximum suppression over (N, 4) xyxy boxes
+
+    Each step suppresses every remaining box overlapping the current best
+    one in a single vectorized IoU computation.
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores)
+
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+
+        w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def postprocess(output, meta, frame_shapes, conf, iou=DEFAULT_IOU, classes=None,
+                max_det=MAX_DETECTIONS, names=None):
+    """
+    Decode raw YOLOv8 output into one DetectionResult per frame
+
+    Args:
+        output: (N, 4 + num_classes, num_anchors) array of [cx, cy, w, h, class scores...]
+        meta: Letterbox meta from letterbox()
+        frame_shapes: Original (height, width) per frame
+        conf: Minimum class score
+        iou: NMS IoU threshold
+        classes: Optional class IDs to keep; other class columns are never scored
+        max_det: Maximum detections per frame
+    """
+    predictions = output.transpose(0, 2, 1)
+    class_ids = None if classes is None else np.asarray(sorted(classes), dtype=np.int64)
+    results = []
+
+    for pred, (scale, pad_x, pad_y), (height, width) in zip(predictions, meta, frame_shapes):
+        class_scores = pred[:, 4:] if class_ids is None else pred[:, 4 + class_ids]
+        best = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(best)), best]
+
+        candidates = np.flatnonzero(scores > conf)
+        if len(candidates) > MAX_NMS_CANDIDATES:
+            candidates = candidates[np.argsort(-scores[candidates])[:MAX_NMS_CANDIDATES]]
+        if not len(candidates):
+            results.append(DetectionResult.empty(names))
+            continue
+
+        xywh = pred[candidates, :4]
+        boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+        scores = scores[candidates]
+        labels = best[candidates] if class_ids is None else class_ids[best[candidates]]
+
+        # Class-aware NMS in one pass: offset each class into its own region
+        offsets = labels[:, None].astype(np.float32) * 7680
+        keep = nms(boxes + offsets, scores, iou)[:max_det]
+
+        boxes = (boxes[keep] - [pad_x, pad_y, pad_x, pad_y]) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        results.append(DetectionResult(boxes, scores[keep], labels[keep], names))
+
+    return results
+
+
+def read_onnx_names(onnx_path):
+    """Class names stored in the model metadata by the ultralytics exporter"""
+    try:
+        import onnx
+        model = onnx.load(str(onnx_path), load_external_data=False)
+        metadata = {prop.key: prop.value for prop in model.metadata_props}
+    except ImportError:
+        if ort is None:
+            return None
+        metadata = ort.InferenceSession(str(onnx_path)).get_modelmeta().custom_metadata_map
+    return ast.literal_eval(metadata['names']) if 'names' in metadata else None
+
+
+def export_onnx(model_path, imgsz=640):
+    """
+    Export a .pt model to ONNX (cached next to the weights)
+
+    Returns:
+        Path to the .onnx file
+    """
+    onnx_path = Path(model_path).with_suffix('.onnx')
+    if onnx_path.exists():
+        return onnx_path
+
+    from ultralytics import YOLO
+
+    print(f"📦 Exporting {model_path} to ONNX...")
+    exported = YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+    return Path(exported)
+
+
+class UltralyticsBackend:
+    name = 'torch'
+
+    def __init__(self, model_path):
+        """ultralytics YOLO model on the PyTorch path"""
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, frames, conf, classes=None):
+        results = self.model(frames, conf=conf, classes=classes, verbose=False)
+        return [DetectionResult.from_yolo(result) for result in results]
+
+
+class OnnxBackend:
+    """Shared letterbox -> run -> postprocess flow for exported ONNX models"""
+
+    def __init__(self, onnx_path, imgsz=640, names=None):
+        self.onnx_path = Path(onnx_path)
+        self.imgsz = imgsz
+        self.names = names or read_onnx_names(self.onnx_path) or COCO_NAMES
+        self.max_batch = None  # None = dynamic batch axis
+
+    def run(self, blob):
+        raise NotImplementedError
+
+    def predict(self, frames, conf, classes=None):
+        results = []
+        step = self.max_batch or len(frames)
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            blob, meta = letterbox(chunk, self.imgsz)
+            output = self.run(blob)
+            results.extend(postprocess(output, meta, [f.shape[:2] for f in chunk], conf,
+                                       classes=classes, names=self.names))
+        return results
+
+
+class OnnxRuntimeBackend(OnnxBackend):
+    name = 'onnxruntime'
+
+    def __init__(self, onnx_path, imgsz=640, names=None, threads=None):
+        """
+        ONNX Runtime session (CPU unless a GPU provider is installed)
+
+        Args:
+            threads: Intra-op threads (default: ONNX Runtime picks)
+        """
+        if ort is None:
+            raise ImportError('onnxruntime is not installed (pip install onnxruntime)')
+        super().__init__(onnx_path, imgsz, names)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(str(self.onnx_path), options, providers=ort.get_available_providers())
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        if isinstance(model_input.shape[0], int):
+            self.max_batch = model_input.shape[0]
+
+    def run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINOBackend(OnnxBackend):
+    name = 'openvino'
+
+    def __init__(self, onnx_path, imgsz=640, names=None, device='CPU'):
+        """OpenVINO compiled model, tuned for latency"""
+        if ov is None:
+            raise ImportError('openvino is not installed (pip install openvino)')
+        super().__init__(onnx_path, imgsz, names)
+
+        core = ov.Core()
+        model = core.read_model(str(self.onnx_path))
+        if not model.input(0).get_partial_shape()[0].is_dynamic:
+            self.max_batch = model.input(0).get_partial_shape()[0].get_length()
+        self.compiled = core.compile_model(model, device, {'PERFORMANCE_HINT': 'LATENCY'})
+        self.output = self.compiled.output(0)
+
+    def run(self, blob):
+        return self.compiled(blob)[self.output]
+
+
+def load_inference_backend(model_path, backend=None, imgsz=640, threads=None,
+                           precision=None, calibration_dir=None):
+    """
+    Load a model on the requested backend
+
+    Args:
+        model_path: .pt weights (exported to ONNX on demand) or an .onnx file
+        backend: 'torch', 'onnxruntime', 'openvino' or 'auto' (default:
+            YOLO_BACKEND environment variable, else 'torch')
+        imgsz: Network input size for the ONNX backends
+        threads: Intra-op threads for ONNX Runtime
+        precision: 'fp32' or 'int8' (default: YOLO_PRECISION, else 'fp32').
+            INT8 always runs on an ONNX backend.
+        calibration_dir: Frames used to build the INT8 model if it doesn't
+            exist yet (default: YOLO_CALIBRATION_DIR)
+
+    Returns:
+        Backend with .predict(frames, conf, classes=None) -> [DetectionResult]
+    """
+    backend = backend or DEFAULT_BACKEND
+    precision = precision or DEFAULT_PRECISION
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+    if backend == 'auto' or (backend == 'torch' and precision == 'int8'):
+        backend = 'openvino' if ov is not None else 'onnxruntime' if ort is not None else 'torch'
+
+    if backend == 'torch':
+        if precision == 'int8':
+            raise ImportError('INT8 models need onnxruntime or openvino installed')
+        return UltralyticsBackend(model_path)
+
+    onnx_path = model_path if str(model_path).endswith('.onnx') else export_onnx(model_path, imgsz)
+
+    if precision == 'int8' and not str(onnx_path).endswith('.int8.onnx'):
+        from model_quantization import int8_path, quantize_int8
+
+        quantized = int8_path(onnx_path)
+        if not quantized.exists():
+            calibration_dir = calibration_dir or DEFAULT_CALIBRATION_DIR
+            if not calibration_dir:
+                raise ValueError(f"No INT8 model at {quantized}; pass calibration_dir or run "
+                                 f"'python model_quantization.py quantize'")
+            quantize_int8(onnx_path, calibration_dir, quantized, imgsz)
+        onnx_path = quantized
+    if backend == 'openvino':
+        return OpenVINOBackend(onnx_path, imgsz)
+    return OnnxRuntimeBackend(onnx_path, imgsz, threads=threads)
@@ -0,0 +1,138 @@
+"""
+Batched Inference Scheduler
+Collects frames from many camera threads and runs them through the model in batches
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchInferenceScheduler:
+    def __init__(self, infer_fn, max_batch_size=8, max_wait_ms=20, max_queue_size=64):
+        """
+        Initialize the batch scheduler
+
+        Args:
+            infer_fn: Callable taking a list of frames and returning one result per frame
+            max_batch_size: Maximum number of frames sent to the model in one call
+            max_wait_ms: Maximum time to wait for a batch to fill before running it
+            max_queue_size: Bound on pending frames (submit blocks when the queue is full)
+        """
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.frame_queue = queue.Queue(maxsize=max_queue_size)
+        self.stop_event = threading.Event()
+        self.worker = None
+
+        # Statistics
+        self.stats_lock = threading.Lock()
+        self.batches_run = 0
+        self.frames_inferred = 0
+        self.inference_time = 0.0
+
+    def start(self):
+        """Start the inference worker thread"""
+        if self.worker is not None and self.worker.is_alive():
+            return self
+
+        self.stop_event.clear()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+        print(f"🧮 Batch scheduler started (batch={self.max_batch_size}, wait={self.max_wait * 1000:.0f}ms)")
+        return self
+
+    def stop(self, timeout=5):
+        """Stop the worker and fail any frames still waiting in the queue"""
+        self.stop_event.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+
+        while True:
+            try:
+                _, future = self.frame_queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError('Inference scheduler stopped'))
+
+    def submit(self, frame, timeout=None):
+        """
+        Queue a frame for batched inference
+
+        Returns:
+            Future resolving to the inference result for this frame
+        """
+        if self.stop_event.is_set():
+            raise RuntimeError('Inference scheduler is not running')
+
+        future = Future()
+        self.frame_queue.put((frame, future), timeout=timeout)
+        return future
+
+    def infer(self, frame, timeout=None):
+        """Submit a frame and block until its result is ready"""
+        return self.submit(frame).result(timeout)
+
+    def _collect_batch(self):
+        """Wait for the first frame, then gather more until the batch is full or the wait expires"""
+        try:
+            batch = [self.frame_queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.frame_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Inference worker loop"""
+        while not self.stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            frames = [frame for frame, _ in batch]
+            futures = [future for _, future in batch]
+
+            start = time.time()
+            try:
+                results = self.infer_fn(frames)
+            except Exception as e:
+                print(f"❌ Batch inference error: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            elapsed = time.time() - start
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+            with self.stats_lock:
+                self.batches_run += 1
+                self.frames_inferred += len(frames)
+                self.inference_time += elapsed
+
+    def get_stats(self):
+        """Return throughput statistics for the scheduler"""
+        with self.stats_lock:
+            avg_batch = self.frames_inferred / self.batches_run if self.batches_run else 0
+            avg_latency = self.inference_time / self.batches_run if self.batches_run else 0
+            return {
+                'batches_run': self.batches_run,
+                'frames_inferred': self.frames_inferred,
+                'avg_batch_size': avg_batch,
+                'avg_batch_latency_ms': avg_latency * 1000,
+                'queue_depth': self.frame_queue.qsize()
+            }
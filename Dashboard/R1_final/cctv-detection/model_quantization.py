@@ -0,0 +1,257 @@
+"""
+Model Quantization
+Static INT8 quantization of exported YOLOv8 ONNX models, calibrated on our
+own CCTV frames, plus a report comparing fp32 and int8 accuracy/latency
+
+Usage:
+    # 1. Collect calibration frames from recorded footage
+    python model_quantization.py calibrate --videos cam1.mp4 cam2.mp4 --output calibration/
+
+    # 2. Build the INT8 model (written next to the weights as yolov8n.int8.onnx)
+    python model_quantization.py quantize --model yolov8n.pt --calibration calibration/
+
+    # 3. Compare fp32 vs int8 for each model size on a labelled sample
+    #    (YOLO format: sample/images/*.jpg + sample/labels/*.txt)
+    python model_quantization.py report --models yolov8n.pt yolov8s.pt yolov8m.pt \\
+        --calibration calibration/ --data sample/
+
+The INT8 model is then selected with precision='int8' on any detector (or
+YOLO_PRECISION=int8).
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from detection_metrics import MeanAveragePrecision, load_yolo_labels
+from inference_backends import export_onnx, letterbox, load_inference_backend
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_images(directory):
+    return sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def int8_path(onnx_path):
+    return Path(onnx_path).with_suffix('.int8.onnx')
+
+
+def collect_calibration_frames(video_paths, output_dir, every_n=30, max_frames=300):
+    """
+    Save every n-th frame of the given videos as calibration images
+
+    Returns:
+        Number of frames written
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    per_video = max(1, max_frames // max(1, len(video_paths)))
+
+    written = 0
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(str(video_path))
+        frame_number = 0
+        saved = 0
+        while saved < per_video:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_number % every_n == 0:
+                cv2.imwrite(str(output_dir / f"{Path(video_path).stem}_{frame_number:06d}.jpg"), frame)
+                saved += 1
+            frame_number += 1
+        cap.release()
+        written += saved
+        print(f"🎞️ {video_path}: {saved} calibration frames")
+    return written
+
+
+def _head_nodes(model):
+    """
+    Non-conv nodes of the detection head (box decoding, DFL, concat)
+
+    Quantizing these costs most of the accuracy for almost no speedup, so
+    they stay in float.
+    """
+    pattern = re.compile(r'^/model\.(\d+)/')
+    indices = [int(m.group(1)) for node in model.graph.node if (m := pattern.match(node.name))]
+    if not indices:
+        return []
+    head = f"/model.{max(indices)}/"
+    return [node.name for node in model.graph.node
+            if node.name.startswith(head) and node.op_type != 'Conv']
+
+
+def quantize_int8(model_path, calibration_dir, output_path=None, imgsz=640, max_images=200):
+    """
+    Static INT8 (QDQ, per-channel) quantization calibrated on our own frames
+
+    Args:
+        model_path: .pt weights (exported to ONNX first) or an .onnx model
+        calibration_dir: Directory of representative camera frames
+        output_path: Where to write the INT8 model (default: <model>.int8.onnx)
+        imgsz: Network input size
+        max_images: Calibration images used
+
+    Returns:
+        Path to the INT8 model
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+
+    onnx_path = Path(model_path) if str(model_path).endswith('.onnx') else export_onnx(model_path, imgsz)
+    output_path = Path(output_path) if output_path else int8_path(onnx_path)
+
+    images = list_images(calibration_dir)[:max_images]
+    if not images:
+        raise ValueError(f"No calibration images found in {calibration_dir}")
+
+    model = onnx.load(str(onnx_path))
+    input_name = model.graph.input[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(images)
+
+        def get_next(self):
+            for path in self.paths:
+                frame = cv2.imread(str(path))
+                if frame is not None:
+                    return {input_name: letterbox([frame], imgsz)[0]}
+            return None
+
+    print(f"🧮 Calibrating {onnx_path.name} on {len(images)} frames...")
+    start = time.time()
+    quantize_static(
+        str(onnx_path), str(output_path), FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=_head_nodes(model)
+    )
+    print(f"✅ INT8 model written to {output_path} ({time.time() - start:.0f}s)")
+    return output_path
+
+
+def evaluate(backend, data_dir, conf=0.001, class_ids=None):
+    """mAP of a backend on a YOLO-format labelled sample (images/ + labels/)"""
+    data_dir = Path(data_dir)
+    metric = MeanAveragePrecision(class_ids)
+
+    for image_path in list_images(data_dir / 'images'):
+        frame = cv2.imread(str(image_path))
+        if frame is None:
+            continue
+        gt_boxes, gt_classes = load_yolo_labels(data_dir / 'labels' / f"{image_path.stem}.txt",
+                                                frame.shape[1], frame.shape[0])
+        metric.update(backend.predict([frame], conf, classes=class_ids)[0], gt_boxes, gt_classes)
+
+    return metric.compute()
+
+
+def measure_latency(backend, frame, runs=50, warmup=5, batch=8):
+    """Single-frame latency and batched throughput"""
+    for _ in range(warmup):
+        backend.predict([frame], 0.5)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        backend.predict([frame], 0.5)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    frames = [frame] * batch
+    start = time.perf_counter()
+    for _ in range(max(1, runs // batch)):
+        backend.predict(frames, 0.5)
+    throughput = batch * max(1, runs // batch) / (time.perf_counter() - start)
+
+    return {'latency_ms': float(np.mean(timings)), 'p95_ms': float(np.percentile(timings, 95)), 'fps': throughput}
+
+
+def report(models, calibration_dir, data_dir, backend='onnxruntime', imgsz=640, runs=50, class_ids=None):
+    """
+    Print an fp32 vs int8 accuracy/latency table for each model size
+
+    Returns:
+        List of row dicts
+    """
+    images = list_images(Path(data_dir) / 'images')
+    if not images:
+        raise ValueError(f"No images found in {Path(data_dir) / 'images'}")
+    sample_frame = cv2.imread(str(images[0]))
+
+    rows = []
+    for model_path in models:
+        onnx_path = export_onnx(model_path, imgsz)
+        if not int8_path(onnx_path).exists():
+            quantize_int8(onnx_path, calibration_dir, imgsz=imgsz)
+
+        for precision in ('fp32', 'int8'):
+            engine = load_inference_backend(model_path, backend, imgsz=imgsz, precision=precision)
+            accuracy = evaluate(engine, data_dir, class_ids=class_ids)
+            speed = measure_latency(engine, sample_frame, runs=runs)
+            rows.append({
+                'model': Path(model_path).stem,
+                'precision': precision,
+                'map50': accuracy['map50'],
+                'map50_95': accuracy['map50_95'],
+                **speed
+            })
+
+    print("=" * 78)
+    print(f"{'model':<10}{'precision':<11}{'mAP50':>8}{'mAP50-95':>10}{'latency ms':>12}{'p95 ms':>10}{'batch FPS':>11}")
+    print("-" * 78)
+    for row in rows:
+        print(f"{row['model']:<10}{row['precision']:<11}{row['map50']:>8.3f}{row['map50_95']:>10.3f}"
+              f"{row['latency_ms']:>12.1f}{row['p95_ms']:>10.1f}{row['fps']:>11.1f}")
+    print("=" * 78)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLOv8 INT8 quantization tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    calibrate = subparsers.add_parser('calibrate', help='Extract calibration frames from videos')
+    calibrate.add_argument('--videos', nargs='+', required=True)
+    calibrate.add_argument('--output', required=True)
+    calibrate.add_argument('--every', type=int, default=30, help='Keep every n-th frame')
+    calibrate.add_argument('--max-frames', type=int, default=300)
+
+    quantize = subparsers.add_parser('quantize', help='Build a static INT8 model')
+    quantize.add_argument('--model', default='yolov8n.pt')
+    quantize.add_argument('--calibration', required=True)
+    quantize.add_argument('--output')
+    quantize.add_argument('--imgsz', type=int, default=640)
+    quantize.add_argument('--max-images', type=int, default=200)
+
+    compare = subparsers.add_parser('report', help='Compare fp32 vs int8 mAP and latency')
+    compare.add_argument('--models', nargs='+', default=['yolov8n.pt', 'yolov8s.pt', 'yolov8m.pt'])
+    compare.add_argument('--calibration', required=True)
+    compare.add_argument('--data', required=True, help='Labelled sample with images/ and labels/')
+    compare.add_argument('--backend', default='onnxruntime', choices=['onnxruntime', 'openvino'])
+    compare.add_argument('--imgsz', type=int, default=640)
+    compare.add_argument('--runs', type=int, default=50)
+    compare.add_argument('--classes', type=int, nargs='+', help='Only evaluate these class IDs')
+
+    args = parser.parse_args()
+    if args.command == 'calibrate':
+        collect_calibration_frames(args.videos, args.output, args.every, args.max_frames)
+    elif args.command == 'quantize':
+        quantize_int8(args.model, args.calibration, args.output, args.imgsz, args.max_images)
+    else:
+        report(args.models, args.calibration, args.data, args.backend, args.imgsz, args.runs, args.classes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Proximity Matching
+Vectorized person-to-object distance checks shared by all Netra detectors
+"""
+
+import numpy as np
+
+# Above this many person x object pairs the grid path is used instead of
+# building the full distance matrix
+GRID_MIN_PAIRS = 4096
+
+# Cell keys are packed into one int64: offset keeps negative cells positive
+_CELL_OFFSET = 1 << 20
+_CELL_STRIDE = 1 << 21
+
+_NEIGHBOUR_OFFSETS = np.array(
+    [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)],
+    dtype=np.int64
+)
+
+
+def as_centers(points):
+    """Convert a sequence of (x, y) centers into an (N, 2) float32 array"""
+    return np.asarray(points, dtype=np.float32).reshape(-1, 2)
+
+
+def distance_matrix(a, b):
+    """
+    Euclidean distance between every point of a and every point of b
+
+    Args:
+        a: (P, 2) array of centers
+        b: (G, 2) array of centers
+
+    Returns:
+        (P, G) array of distances
+    """
+    a = as_centers(a)
+    b = as_centers(b)
+    diff = a[:, None, :] - b[None, :, :]
+    return np.sqrt(np.einsum('pgk,pgk->pg', diff, diff))
+
+
+def _cell_keys(cells):
+    return (cells[..., 0] + _CELL_OFFSET) * _CELL_STRIDE + (cells[..., 1] + _CELL_OFFSET)
+
+
+def _grid_candidates(a, b, radius):
+    """
+    Candidate pairs from a uniform grid with cell size = radius
+
+    Only points in the same or a neighbouring cell can be closer than radius,
+    so each point of a is compared against at most 9 cells of b.
+    """
+    b_keys = _cell_keys(np.floor(b / radius).astype(np.int64))
+    order = np.argsort(b_keys, kind='stable')
+    sorted_keys = b_keys[order]
+
+    a_cells = np.floor(a / radius).astype(np.int64)
+    query_keys = _cell_keys(a_cells[:, None, :] + _NEIGHBOUR_OFFSETS[None, :, :]).ravel()
+
+    starts = np.searchsorted(sorted_keys, query_keys, side='left')
+    ends = np.searchsorted(sorted_keys, query_keys, side='right')
+    counts = ends - starts
+    total = int(counts.sum())
+
+    a_idx = np.repeat(np.repeat(np.arange(len(a)), len(_NEIGHBOUR_OFFSETS)), counts)
+    # Expand every [start, end) range into consecutive positions
+    range_base = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    b_idx = order[range_base + np.arange(total)]
+
+    return a_idx, b_idx
+
+
+def pairs_within(a, b, radius):
+    """
+    Find all pairs of points closer than radius
+
+    Small inputs use the full distance matrix; large inputs use a grid so the
+    work grows with the number of nearby pairs instead of P x G.
+
+    Args:
+        a: (P, 2) array of centers (e.g. persons)
+        b: (G, 2) array of centers (e.g. garbage)
+        radius: Maximum distance in pixels
+
+    Returns:
+        (a_idx, b_idx, distances) sorted by a_idx, then b_idx
+    """
+    a = as_centers(a)
+    b = as_centers(b)
+
+    if len(a) == 0 or len(b) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32)
+
+    if len(a) * len(b) < GRID_MIN_PAIRS:
+        distances = distance_matrix(a, b)
+        a_idx, b_idx = np.nonzero(distances < radius)
+        return a_idx, b_idx, distances[a_idx, b_idx]
+
+    a_idx, b_idx = _grid_candidates(a, b, radius)
+    diff = a[a_idx] - b[b_idx]
+    distances = np.sqrt(np.einsum('nk,nk->n', diff, diff))
+    keep = distances < radius
+    a_idx, b_idx, distances = a_idx[keep], b_idx[keep], distances[keep]
+
+    order = np.lexsort((b_idx, a_idx))
+    return a_idx[order], b_idx[order], distances[order]
+
+
+def count_within(a, b, radius):
+    """Number of points of b closer than radius to each point of a"""
+    a = as_centers(a)
+    a_idx, _, _ = pairs_within(a, b, radius)
+    return np.bincount(a_idx, minlength=len(a))
+
+
+def nearest(a, b):
+    """
+    Nearest point of b for every point of a
+
+    Returns:
+        (indices, distances) arrays of length P, or (None, None) if b is empty
+    """
+    a = as_centers(a)
+    b = as_centers(b)
+
+    if len(b) == 0:
+        return None, None
+
+    distances = distance_matrix(a, b)
+    indices = distances.argmin(axis=1)
+    return indices, distances[np.arange(len(a)), indices]
@@ -0,0 +1,155 @@
+"""
+Response Formats
+Image decoding and detection response encodings shared by the API servers.
+Clients only pay for what they ask for: legacy JSON with an annotated image,
+boxes-only JSON, msgpack with packed float32 arrays, or the annotated frame
+as raw JPEG
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT_LEGACY = 'legacy'    # JSON + base64 annotated image (default)
+FORMAT_BOXES = 'boxes'      # JSON, detections only
+FORMAT_MSGPACK = 'msgpack'  # msgpack, detections as packed float32 arrays
+FORMAT_JPEG = 'jpeg'        # Annotated frame as raw image/jpeg
+
+FORMATS = (FORMAT_LEGACY, FORMAT_BOXES, FORMAT_MSGPACK, FORMAT_JPEG)
+
+MIME_TYPES = {
+    FORMAT_LEGACY: 'application/json',
+    FORMAT_BOXES: 'application/json',
+    FORMAT_MSGPACK: 'application/msgpack',
+    FORMAT_JPEG: 'image/jpeg'
+}
+
+# Accept header media types that select a non-default format
+ACCEPT_FORMATS = {
+    'application/msgpack': FORMAT_MSGPACK,
+    'application/x-msgpack': FORMAT_MSGPACK,
+    'image/jpeg': FORMAT_JPEG,
+    'application/vnd.netra.boxes+json': FORMAT_BOXES
+}
+
+
+def decode_image(img_bytes):
+    """Decode raw image bytes (JPEG/PNG) into a BGR frame, or None if invalid"""
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def decode_base64_image(img_data):
+    """Decode a base64 string or data URL into a BGR frame"""
+    if ',' in img_data:
+        img_data = img_data.split(',')[1]
+    return decode_image(base64.b64decode(img_data))
+
+
+def serialize_detections(det, detections, include_bbox=True):
+    """JSON-ready counts and per-detection dicts"""
+    detection_dicts = det.detections_to_dicts(detections)
+
+    garbage = []
+    for g in detection_dicts['garbage']:
+        item = {'type': g['class_name'], 'confidence': g['confidence']}
+        if include_bbox:
+            item['bbox'] = g['bbox']
+        garbage.append(item)
+
+    persons = []
+    for p in detection_dicts['persons']:
+        item = {'confidence': p['confidence']}
+        if include_bbox:
+            item['bbox'] = p['bbox']
+        persons.append(item)
+
+    return {
+        'detection_count': {
+            'garbage': len(detections['garbage']),
+            'persons': len(detections['persons'])
+        },
+        'detections': {
+            'garbage': garbage,
+            'persons': persons
+        }
+    }
+
+
+def negotiate_format(query_format=None, accept_header=None):
+    """
+    Pick the response format for a request
+
+    Args:
+        query_format: Value of the ?format= query parameter (takes precedence)
+        accept_header: Raw Accept header
+
+    Returns:
+        One of FORMATS, or None if the query parameter names an unknown format
+    """
+    if query_format:
+        query_format = query_format.lower()
+        return query_format if query_format in FORMATS else None
+
+    for media_range in (accept_header or '').split(','):
+        media_type = media_range.split(';')[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+
+    return FORMAT_LEGACY
+
+
+def format_available(response_format):
+    """msgpack is an optional dependency; every other format always works"""
+    return response_format != FORMAT_MSGPACK or msgpack is not None
+
+
+def needs_annotation(response_format):
+    """Only the legacy and JPEG formats draw and encode the annotated frame"""
+    return response_format in (FORMAT_LEGACY, FORMAT_JPEG)
+
+
+def encode_jpeg(frame, quality=95):
+    """Encode a BGR frame to JPEG bytes"""
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError('Could not encode frame as JPEG')
+    return buffer.tobytes()
+
+
+def jpeg_data_url(frame, quality=95):
+    """Annotated frame as a base64 data URL (legacy JSON responses)"""
+    return f"data:image/jpeg;base64,{base64.b64encode(encode_jpeg(frame, quality)).decode('utf-8')}"
+
+
+def pack_result(result, label_map=None):
+    """
+    Packed arrays for one DetectionResult
+
+    Boxes and scores are little-endian float32 bytes ('boxes' is N x 4 xyxy),
+    class and track IDs are int32 bytes.
+    """
+    packed = {
+        'count': len(result),
+        'boxes': np.ascontiguousarray(result.boxes, dtype='<f4').tobytes(),
+        'scores': np.ascontiguousarray(result.scores, dtype='<f4').tobytes(),
+        'class_ids': np.ascontiguousarray(result.class_ids, dtype='<i4').tobytes()
+    }
+    if label_map is not None:
+        packed['class_names'] = result.labels(label_map)
+    if result.track_ids is not None:
+        packed['track_ids'] = np.ascontiguousarray(result.track_ids, dtype='<i4').tobytes()
+    return packed
+
+
+def encode_msgpack(payload):
+    """Serialize a response payload with msgpack (bytes/arrays stay binary)"""
+    if msgpack is None:
+        raise RuntimeError('msgpack is not installed (pip install msgpack)')
+    return msgpack.packb(payload, use_bin_type=True)
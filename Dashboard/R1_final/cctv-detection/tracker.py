@@ -0,0 +1,208 @@
+"""
+Multi-Object Tracker
+SORT-style tracker (IoU association + constant-velocity Kalman filter) that
+gives detections stable IDs across frames, in pure NumPy
+"""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+# Kalman model: state [cx, cy, area, aspect, vx, vy, v_area], measurement [cx, cy, area, aspect]
+_F = np.eye(7)
+_F[0, 4] = _F[1, 5] = _F[2, 6] = 1
+
+_H = np.eye(4, 7)
+
+_R = np.eye(4)
+_R[2:, 2:] *= 10
+
+_Q = np.eye(7)
+_Q[-1, -1] *= 0.01
+_Q[4:, 4:] *= 0.01
+
+_P0 = np.eye(7) * 10
+_P0[4:, 4:] *= 100
+
+
+def boxes_to_measurements(boxes):
+    """Convert (N, 4) xyxy boxes to (N, 4) [cx, cy, area, aspect]"""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    w = np.maximum(boxes[:, 2] - boxes[:, 0], 1e-3)
+    h = np.maximum(boxes[:, 3] - boxes[:, 1], 1e-3)
+    return np.stack([boxes[:, 0] + w / 2, boxes[:, 1] + h / 2, w * h, w / h], axis=1)
+
+
+def states_to_boxes(states):
+    """Convert (N, >=4) Kalman states to (N, 4) xyxy boxes"""
+    area = np.maximum(states[:, 2], 1e-3)
+    w = np.sqrt(area * np.maximum(states[:, 3], 1e-3))
+    h = area / w
+    return np.stack([
+        states[:, 0] - w / 2, states[:, 1] - h / 2,
+        states[:, 0] + w / 2, states[:, 1] + h / 2
+    ], axis=1)
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (A, 4) and (B, 4) xyxy boxes"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def _assign(iou, iou_threshold):
+    """Match rows (tracks) to columns (detections), maximising IoU"""
+    if iou.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(-iou)
+    else:
+        # Greedy fallback: take pairs in order of decreasing IoU
+        order = np.argsort(-iou, axis=None)
+        candidate_rows, candidate_cols = np.unravel_index(order, iou.shape)
+        used_rows, used_cols = set(), set()
+        rows, cols = [], []
+        for r, c in zip(candidate_rows, candidate_cols):
+            if iou[r, c] < iou_threshold:
+                break
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            rows.append(r)
+            cols.append(c)
+        rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    keep = iou[rows, cols] >= iou_threshold
+    return rows[keep], cols[keep]
+
+
+class MultiObjectTracker:
+    def __init__(self, iou_threshold=0.3, max_age=30):
+        """
+        Initialize the tracker
+
+        Args:
+            iou_threshold: Minimum IoU between a predicted track and a detection to match
+            max_age: Frames a track survives without a matching detection
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.next_id = 1
+
+        # Per-track arrays (one row per active track)
+        self.states = np.empty((0, 7))
+        self.covariances = np.empty((0, 7, 7))
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.scores = np.empty(0, dtype=np.float32)
+        self.frames_since_update = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    def _advance(self):
+        """Kalman predict step for all tracks"""
+        if len(self) == 0:
+            return
+
+        # Keep the predicted area positive
+        shrinking = self.states[:, 2] + self.states[:, 6] <= 0
+        self.states[shrinking, 6] = 0
+
+        self.states = self.states @ _F.T
+        self.covariances = np.einsum('ij,njk,lk->nil', _F, self.covariances, _F) + _Q
+        self.frames_since_update += 1
+
+    def _correct(self, track_idx, measurements):
+        """Kalman update step for the matched tracks"""
+        x = self.states[track_idx]
+        P = self.covariances[track_idx]
+
+        y = measurements - x @ _H.T
+        S = np.einsum('ij,njk,lk->nil', _H, P, _H) + _R
+        K = np.einsum('nij,kj,nkl->nil', P, _H, np.linalg.inv(S))
+
+        self.states[track_idx] = x + np.einsum('nij,nj->ni', K, y)
+        self.covariances[track_idx] = P - np.einsum('nij,jk,nkl->nil', K, _H, P)
+        self.frames_since_update[track_idx] = 0
+
+    def _prune(self):
+        alive = self.frames_since_update <= self.max_age
+        self.states = self.states[alive]
+        self.covariances = self.covariances[alive]
+        self.track_ids = self.track_ids[alive]
+        self.scores = self.scores[alive]
+        self.frames_since_update = self.frames_since_update[alive]
+
+    def update(self, boxes, scores=None):
+        """
+        Advance all tracks one frame and associate them with new detections
+
+        Args:
+            boxes: (N, 4) xyxy detection boxes for this frame
+            scores: Optional (N,) detection confidences
+
+        Returns:
+            (N,) array of track IDs, aligned with boxes
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        scores = np.ones(len(boxes), dtype=np.float32) if scores is None else np.asarray(scores, dtype=np.float32)
+
+        self._advance()
+
+        iou = iou_matrix(states_to_boxes(self.states), boxes)
+        track_idx, det_idx = _assign(iou, self.iou_threshold)
+
+        measurements = boxes_to_measurements(boxes)
+        if len(track_idx):
+            self._correct(track_idx, measurements[det_idx])
+            self.scores[track_idx] = scores[det_idx]
+
+        ids = np.empty(len(boxes), dtype=np.int64)
+        ids[det_idx] = self.track_ids[track_idx]
+
+        # Start a new track for every unmatched detection
+        unmatched = np.setdiff1d(np.arange(len(boxes)), det_idx)
+        if len(unmatched):
+            new_ids = np.arange(self.next_id, self.next_id + len(unmatched))
+            self.next_id += len(unmatched)
+
+            new_states = np.zeros((len(unmatched), 7))
+            new_states[:, :4] = measurements[unmatched]
+
+            self.states = np.concatenate([self.states, new_states])
+            self.covariances = np.concatenate([self.covariances, np.repeat(_P0[None], len(unmatched), axis=0)])
+            self.track_ids = np.concatenate([self.track_ids, new_ids])
+            self.scores = np.concatenate([self.scores, scores[unmatched]])
+            self.frames_since_update = np.concatenate([self.frames_since_update, np.zeros(len(unmatched), dtype=np.int64)])
+            ids[unmatched] = new_ids
+
+        self._prune()
+        return ids
+
+    def predict(self):
+        """
+        Advance all tracks one frame without detections (for skipped frames)
+
+        Returns:
+            (boxes, scores, track_ids) for the currently active tracks
+        """
+        self._advance()
+        self._prune()
+        return states_to_boxes(self.states).astype(np.float32), self.scores.copy(), self.track_ids.copy()
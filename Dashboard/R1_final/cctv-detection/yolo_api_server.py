@@ -3,7 +3,7 @@ Flask API Server for YOLOv8 CCTV Detection
 Provides REST API endpoints for garbage detection and littering detection
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 import cv2
 import numpy as np
@@ -11,33 +11,173 @@ import base64
 import io
 from PIL import Image
 import requests
+import json
+import os
+import atexit
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from yolov8_detector import YOLOv8GarbageDetector
+from camera_supervisor import CameraSupervisor
+from camera_shards import CameraShardPool
+from backend_client import DEFAULT_API_URL, get_backend_client
+from response_formats import (
+    FORMAT_BOXES, FORMAT_JPEG, FORMAT_MSGPACK, FORMATS, MIME_TYPES,
+    decode_base64_image, decode_image, encode_jpeg, encode_msgpack, format_available,
+    jpeg_data_url, needs_annotation, negotiate_format, pack_result, serialize_detections
+)
 
 app = Flask(__name__)
 CORS(app)
 
 # Initialize YOLO detector
 detector = None
-active_cameras = {}
+camera_supervisor = None
+camera_shards = None
+supervisor_lock = threading.Lock()
 
 # Backend API configuration
-BACKEND_API_URL = "http://localhost:3001/api"
+BACKEND_API_URL = DEFAULT_API_URL
 
-def initialize_detector():
-    """Initialize the YOLO detector on first request"""
+# Batch ingest configuration
+BATCH_INFERENCE_SIZE = 16
+decode_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix='decode')
+
+# Model configuration
+MODEL_PATH = os.environ.get('YOLO_MODEL_PATH', 'yolov8n.pt')  # Use yolov8x.pt for best accuracy
+CONFIDENCE_THRESHOLD = float(os.environ.get('YOLO_CONFIDENCE', '0.5'))
+WARMUP_SIZE = 640
+
+# Run /stream/start cameras in this many worker processes, each with its own
+# model (0 = supervised threads sharing this process's detector)
+CAMERA_PROCESSES = int(os.environ.get('YOLO_CAMERA_PROCESSES', '0'))
+
+detector_lock = threading.Lock()
+detector_ready = threading.Event()
+
+def initialize_detector(warmup=False):
+    """
+    Return the process-wide YOLO detector, loading it on first use
+    
+    Args:
+        warmup: Run a dummy inference after loading so the first real request
+            doesn't pay for lazy CUDA/kernel initialization
+    """
     global detector
     if detector is None:
-        print("🚀 Initializing YOLOv8 detector...")
-        detector = YOLOv8GarbageDetector(
-            model_path='yolov8n.pt',  # Use yolov8x.pt for best accuracy
-            confidence_threshold=0.5
-        )
-        print("✅ YOLOv8 detector ready!")
+        with detector_lock:
+            if detector is None:
+                print(f"🚀 Initializing YOLOv8 detector (pid {os.getpid()})...")
+                detector = YOLOv8GarbageDetector(
+                    model_path=MODEL_PATH,
+                    confidence_threshold=CONFIDENCE_THRESHOLD
+                )
+                print("✅ YOLOv8 detector ready!")
+    
+    if warmup and not detector_ready.is_set():
+        with detector_lock:
+            if not detector_ready.is_set():
+                start = time.time()
+                detector.detect_batch([np.zeros((WARMUP_SIZE, WARMUP_SIZE, 3), dtype=np.uint8)])
+                detector_ready.set()
+                print(f"🔥 Model warmed up in {(time.time() - start) * 1000:.0f}ms")
+    elif not warmup:
+        # Lazily loaded (dev server): the first request doubles as the warmup
+        detector_ready.set()
+    
     return detector
 
+def get_camera_supervisor():
+    """Return the supervisor that owns all camera stream workers"""
+    global camera_supervisor
+    with supervisor_lock:
+        if camera_supervisor is None:
+            camera_supervisor = CameraSupervisor(initialize_detector())
+        return camera_supervisor
+
+def get_camera_shards():
+    """Return the shard pool that runs camera streams in worker processes (YOLO_CAMERA_PROCESSES > 0)"""
+    global camera_shards
+    with supervisor_lock:
+        if camera_shards is None:
+            camera_shards = CameraShardPool([], num_processes=CAMERA_PROCESSES, detector_kwargs={
+                'model_path': MODEL_PATH,
+                'confidence_threshold': CONFIDENCE_THRESHOLD
+            }).start()
+            atexit.register(camera_shards.stop)
+        return camera_shards
+
+def active_cameras():
+    """Whichever of the supervisor or shard pool has been started"""
+    return [owner for owner in (camera_supervisor, camera_shards) if owner is not None]
+
+def active_camera_count():
+    return sum(len(owner) for owner in active_cameras())
+
+def requested_format():
+    """
+    Response format from ?format= or the Accept header
+    
+    Returns:
+        (format, None) or (None, error response) if the format is unknown/unavailable
+    """
+    response_format = negotiate_format(request.args.get('format'), request.headers.get('Accept'))
+    if response_format is None:
+        return None, (jsonify({
+            'success': False,
+            'message': f"Unknown format, expected one of: {', '.join(FORMATS)}"
+        }), 400)
+    if not format_available(response_format):
+        return None, (jsonify({
+            'success': False,
+            'message': 'msgpack responses need the msgpack package installed on the server'
+        }), 406)
+    return response_format, None
+
+def detection_response(det, frame, detections, response_format, body, include_bbox=True):
+    """
+    Build a detection response in the requested format
+    
+    The frame is only annotated and JPEG-encoded for formats that return it.
+    
+    Args:
+        det: Detector instance
+        frame: Original BGR frame
+        detections: Output of detect_frame
+        response_format: One of response_formats.FORMATS
+        body: Common fields (success, camera_id, location, alerts)
+        include_bbox: Include boxes in legacy JSON responses
+    """
+    if needs_annotation(response_format):
+        annotated_frame = det.draw_detections(frame, detections)
+    
+    if response_format == FORMAT_JPEG:
+        response = Response(encode_jpeg(annotated_frame), mimetype=MIME_TYPES[FORMAT_JPEG])
+        response.headers['X-Garbage-Count'] = str(len(detections['garbage']))
+        response.headers['X-Person-Count'] = str(len(detections['persons']))
+        response.headers['X-Littering-Alerts'] = str(len(body.get('alerts', [])))
+        return response
+    
+    if response_format == FORMAT_MSGPACK:
+        payload = {
+            **body,
+            'detections': {
+                'garbage': pack_result(detections['garbage'], det.garbage_classes),
+                'persons': pack_result(detections['persons'])
+            }
+        }
+        return Response(encode_msgpack(payload), mimetype=MIME_TYPES[FORMAT_MSGPACK])
+    
+    if response_format == FORMAT_BOXES:
+        return jsonify({**body, **serialize_detections(det, detections)})
+    
+    return jsonify({
+        **body,
+        **serialize_detections(det, detections, include_bbox),
+        'annotated_image': jpeg_data_url(annotated_frame)
+    })
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -45,9 +185,22 @@ def health_check():
         'status': 'running',
         'service': 'YOLOv8 Detection API',
         'version': '1.0.0',
-        'active_cameras': len(active_cameras)
+        'detector_ready': detector_ready.is_set(),
+        'active_cameras': active_camera_count()
     })
 
+@app.route('/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the worker process is up and serving requests"""
+    return jsonify({'status': 'alive', 'pid': os.getpid()})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: the model is loaded and warmed up in this worker"""
+    if not detector_ready.is_set():
+        return jsonify({'status': 'loading', 'pid': os.getpid()}), 503
+    return jsonify({'status': 'ready', 'pid': os.getpid()})
+
 @app.route('/detect/image', methods=['POST'])
 def detect_image():
     """
@@ -59,7 +212,17 @@ def detect_image():
         "camera_id": "cam_1",
         "location": "Main Street"
     }
+    
+    Response format (?format= or Accept header):
+    - legacy (default): JSON with a base64 annotated image
+    - boxes: JSON detections only (Accept: application/vnd.netra.boxes+json)
+    - msgpack: packed float32 arrays (Accept: application/msgpack)
+    - jpeg: annotated frame as raw image/jpeg (Accept: image/jpeg)
     """
+    response_format, error = requested_format()
+    if error:
+        return error
+    
     try:
         # Initialize detector
         det = initialize_detector()
@@ -67,18 +230,10 @@ def detect_image():
         # Get image from request
         if 'image' in request.files:
             # File upload
-            file = request.files['image']
-            img_bytes = file.read()
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            frame = decode_image(request.files['image'].read())
         elif 'image' in request.json:
             # Base64 encoded image
-            img_data = request.json['image']
-            if ',' in img_data:
-                img_data = img_data.split(',')[1]
-            img_bytes = base64.b64decode(img_data)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            frame = decode_base64_image(request.json['image'])
         else:
             return jsonify({'success': False, 'message': 'No image provided'}), 400
         
@@ -111,40 +266,11 @@ def detect_image():
                     'complaint_id': complaint.get('ticket_id') if complaint else None
                 })
         
-        # Draw detections on frame
-        annotated_frame = det.draw_detections(frame, detections)
-        
-        # Encode annotated image to base64
-        _, buffer = cv2.imencode('.jpg', annotated_frame)
-        annotated_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        return jsonify({
+        return detection_response(det, frame, detections, response_format, {
             'success': True,
             'camera_id': camera_id,
             'location': location,
-            'detection_count': {
-                'garbage': len(detections['garbage']),
-                'persons': len(detections['persons'])
-            },
-            'detections': {
-                'garbage': [
-                    {
-                        'type': g.get('garbage_type', g['class_name']),
-                        'confidence': float(g['confidence']),
-                        'bbox': g['bbox'].tolist()
-                    }
-                    for g in detections['garbage']
-                ],
-                'persons': [
-                    {
-                        'confidence': float(p['confidence']),
-                        'bbox': p['bbox'].tolist()
-                    }
-                    for p in detections['persons']
-                ]
-            },
-            'alerts': alerts,
-            'annotated_image': f"data:image/jpeg;base64,{annotated_base64}"
+            'alerts': alerts
         })
         
     except Exception as e:
@@ -157,6 +283,119 @@ def detect_image():
             'error': str(e)
         }), 500
 
+@app.route('/detect/batch', methods=['POST'])
+def detect_batch():
+    """
+    Detect garbage in many images with one request
+    
+    Accepts either:
+    - multipart/form-data with repeated 'images' files and optional
+      'camera_ids' / 'locations' fields (one per image, same order)
+    - application/x-ndjson, one JSON object per line:
+      {"image": "base64_encoded_image", "camera_id": "cam_1", "location": "Main Street"}
+    
+    Images are decoded in parallel and run through the model in batches.
+    The response is NDJSON, one line per image, streamed as each batch finishes.
+    """
+    try:
+        det = initialize_detector()
+        
+        # Collect (camera_id, location, decode job) for every image
+        items = []
+        if request.files:
+            files = request.files.getlist('images')
+            camera_ids = request.form.getlist('camera_ids')
+            locations = request.form.getlist('locations')
+            for i, file in enumerate(files):
+                items.append((
+                    camera_ids[i] if i < len(camera_ids) else 'unknown',
+                    locations[i] if i < len(locations) else 'Unknown Location',
+                    decode_pool.submit(decode_image, file.read())
+                ))
+        else:
+            for line in request.get_data().splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                items.append((
+                    entry.get('camera_id', 'unknown'),
+                    entry.get('location', 'Unknown Location'),
+                    decode_pool.submit(decode_base64_image, entry.get('image', ''))
+                ))
+        
+        if not items:
+            return jsonify({'success': False, 'message': 'No images provided'}), 400
+        
+    except Exception as e:
+        print(f"❌ Error in detect_batch: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Invalid batch request',
+            'error': str(e)
+        }), 400
+    
+    def generate():
+        for start in range(0, len(items), BATCH_INFERENCE_SIZE):
+            chunk = list(enumerate(items[start:start + BATCH_INFERENCE_SIZE], start))
+            
+            # Wait for this chunk's decodes (later chunks keep decoding meanwhile)
+            frames = []
+            for index, (camera_id, location, decode_job) in chunk:
+                try:
+                    frame = decode_job.result()
+                except Exception:
+                    frame = None
+                if frame is None:
+                    yield json.dumps({
+                        'index': index,
+                        'success': False,
+                        'camera_id': camera_id,
+                        'message': 'Could not decode image'
+                    }) + '\n'
+                else:
+                    frames.append((index, camera_id, location, frame))
+            
+            if not frames:
+                continue
+            
+            try:
+                batch_detections = det.detect_batch([frame for _, _, _, frame in frames])
+            except Exception as e:
+                print(f"❌ Batch inference error: {e}")
+                for index, camera_id, _, _ in frames:
+                    yield json.dumps({
+                        'index': index,
+                        'success': False,
+                        'camera_id': camera_id,
+                        'message': 'Detection failed',
+                        'error': str(e)
+                    }) + '\n'
+                continue
+            
+            for (index, camera_id, location, frame), detections in zip(frames, batch_detections):
+                alerts = []
+                for event in det.check_littering(detections, camera_id, location) or []:
+                    # Screenshot and complaint are handled by the evidence workers
+                    det.submit_evidence(frame, event)
+                    alerts.append({
+                        'type': 'littering',
+                        'camera_id': event['camera_id'],
+                        'location': event['location'],
+                        'garbage_type': event['garbage_type'],
+                        'timestamp': event['timestamp'].isoformat()
+                    })
+                
+                yield json.dumps({
+                    'index': index,
+                    'success': True,
+                    'camera_id': camera_id,
+                    'location': location,
+                    **serialize_detections(det, detections),
+                    'alerts': alerts
+                }) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/stream/start', methods=['POST'])
 def start_camera_stream():
     """
@@ -168,6 +407,9 @@ def start_camera_stream():
         "stream_url": "rtsp://192.168.1.100:554/stream" or camera index,
         "location": "Main Street, Civil Lines"
     }
+    
+    With YOLO_CAMERA_PROCESSES=N the camera runs in one of N shard
+    processes (each with its own model) instead of a thread in this worker.
     """
     try:
         data = request.json
@@ -178,29 +420,19 @@ def start_camera_stream():
         if not camera_id:
             return jsonify({'success': False, 'message': 'camera_id is required'}), 400
         
-        if camera_id in active_cameras:
+        # Start a supervised, headless worker (reconnects on failure), in a
+        # camera shard process when YOLO_CAMERA_PROCESSES is set
+        try:
+            if CAMERA_PROCESSES:
+                get_camera_shards().add_camera(camera_id, stream_url, location)
+            else:
+                get_camera_supervisor().start(camera_id, stream_url, location)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': f'Camera {camera_id} is already active'
+                'message': str(e)
             }), 400
         
-        # Initialize detector
-        det = initialize_detector()
-        
-        # Start camera stream in background thread
-        def stream_worker():
-            det.process_camera_stream(stream_url, camera_id, location)
-        
-        thread = threading.Thread(target=stream_worker, daemon=True)
-        thread.start()
-        
-        active_cameras[camera_id] = {
-            'thread': thread,
-            'stream_url': stream_url,
-            'location': location,
-            'started_at': datetime.now().isoformat()
-        }
-        
         return jsonify({
             'success': True,
             'message': f'Camera {camera_id} stream started',
@@ -219,15 +451,18 @@ def start_camera_stream():
 @app.route('/stream/stop/<camera_id>', methods=['POST'])
 def stop_camera_stream(camera_id):
     """Stop monitoring a camera stream"""
-    if camera_id not in active_cameras:
+    # Signal the worker and wait for it to release the camera (shards stop it asynchronously)
+    stopped = False
+    if camera_supervisor is not None:
+        stopped = camera_supervisor.stop(camera_id)
+    if not stopped and camera_shards is not None:
+        stopped = camera_shards.remove_camera(camera_id)
+    if not stopped:
         return jsonify({
             'success': False,
             'message': f'Camera {camera_id} is not active'
         }), 404
     
-    # Remove from active cameras (thread will stop automatically)
-    del active_cameras[camera_id]
-    
     return jsonify({
         'success': True,
         'message': f'Camera {camera_id} stream stopped'
@@ -235,16 +470,13 @@ def stop_camera_stream(camera_id):
 
 @app.route('/stream/list', methods=['GET'])
 def list_active_streams():
-    """List all active camera streams"""
+    """List all active camera streams with their FPS, latency, drops and last error"""
     return jsonify({
         'success': True,
         'active_cameras': {
-            cam_id: {
-                'location': info['location'],
-                'stream_url': info['stream_url'],
-                'started_at': info['started_at']
-            }
-            for cam_id, info in active_cameras.items()
+            camera_id: camera
+            for owner in active_cameras()
+            for camera_id, camera in owner.list_cameras().items()
         }
     })
 
@@ -259,7 +491,13 @@ def detect_from_webcam():
         "camera_id": "webcam_1",
         "location": "Admin Office"
     }
+    
+    Supports the same response formats as /detect/image.
     """
+    response_format, error = requested_format()
+    if error:
+        return error
+    
     try:
         data = request.json
         camera_index = data.get('camera_index', 0)
@@ -299,35 +537,12 @@ def detect_from_webcam():
                     'complaint_id': complaint.get('ticket_id') if complaint else None
                 })
         
-        # Draw detections
-        annotated_frame = det.draw_detections(frame, detections)
-        _, buffer = cv2.imencode('.jpg', annotated_frame)
-        annotated_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        return jsonify({
+        return detection_response(det, frame, detections, response_format, {
             'success': True,
             'camera_id': camera_id,
             'location': location,
-            'detection_count': {
-                'garbage': len(detections['garbage']),
-                'persons': len(detections['persons'])
-            },
-            'detections': {
-                'garbage': [
-                    {
-                        'type': g.get('garbage_type', g['class_name']),
-                        'confidence': float(g['confidence'])
-                    }
-                    for g in detections['garbage']
-                ],
-                'persons': [
-                    {'confidence': float(p['confidence'])}
-                    for p in detections['persons']
-                ]
-            },
-            'alerts': alerts,
-            'annotated_image': f"data:image/jpeg;base64,{annotated_base64}"
-        })
+            'alerts': alerts
+        }, include_bbox=False)
         
     except Exception as e:
         print(f"❌ Error in detect_from_webcam: {e}")
@@ -337,6 +552,14 @@ def detect_from_webcam():
             'error': str(e)
         }), 500
 
+@app.route('/metrics/backend', methods=['GET'])
+def backend_metrics():
+    """Latency histograms for calls made to the Node backend"""
+    return jsonify({
+        'success': True,
+        'backend': get_backend_client(BACKEND_API_URL).get_stats()
+    })
+
 @app.route('/config', methods=['GET'])
 def get_config():
     """Get current detector configuration"""
@@ -350,13 +573,15 @@ def get_config():
         'success': True,
         'config': {
             'confidence_threshold': detector.confidence_threshold,
+            'inference_backend': detector.inference.name,
             'garbage_classes': list(detector.garbage_classes.values()),
             'backend_api': detector.api_url
         }
     })
 
 if __name__ == '__main__':
-    import os
+    # Development server. For production use the pre-fork server:
+    #   gunicorn -c gunicorn.conf.py yolo_api_server:app
     
     # Create screenshots directory
     os.makedirs('./screenshots', exist_ok=True)
@@ -367,11 +592,15 @@ if __name__ == '__main__':
     print("📡 Starting server on http://localhost:5000")
     print("📊 Endpoints:")
     print("   GET  /health - Health check")
+    print("   GET  /health/live - Liveness probe")
+    print("   GET  /health/ready - Readiness probe (model loaded)")
     print("   POST /detect/image - Detect in uploaded image")
+    print("   POST /detect/batch - Detect in many images (multipart or NDJSON)")
     print("   POST /detect/webcam - Capture and detect from webcam")
     print("   POST /stream/start - Start camera stream monitoring")
     print("   POST /stream/stop/<camera_id> - Stop camera stream")
     print("   GET  /stream/list - List active streams")
+    print("   GET  /metrics/backend - Backend call latency")
     print("   GET  /config - Get detector configuration")
     print("="*60 + "\n")
     
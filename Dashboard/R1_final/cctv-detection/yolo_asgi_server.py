@@ -0,0 +1,378 @@
+"""
+ASGI API Server for YOLOv8 CCTV Detection
+Async variant of yolo_api_server.py: request handling stays on the event loop
+and decode/inference/encode run on a bounded executor, with 429 backpressure
+and per-request deadlines. Executor threads decode and encode in parallel,
+but only one at a time runs detection and tracking on the shared detector.
+
+Run with:
+    uvicorn yolo_asgi_server:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from yolov8_detector import YOLOv8GarbageDetector
+from response_formats import (
+    FORMAT_BOXES, FORMAT_JPEG, FORMAT_MSGPACK, FORMATS, MIME_TYPES,
+    decode_base64_image, decode_image, encode_jpeg, encode_msgpack, format_available,
+    jpeg_data_url, needs_annotation, negotiate_format, pack_result, serialize_detections
+)
+
+# Model configuration (same variables as yolo_api_server.py)
+MODEL_PATH = os.environ.get('YOLO_MODEL_PATH', 'yolov8n.pt')
+CONFIDENCE_THRESHOLD = float(os.environ.get('YOLO_CONFIDENCE', '0.5'))
+WARMUP_SIZE = 640
+
+# Executor and backpressure configuration
+INFERENCE_WORKERS = int(os.environ.get('YOLO_INFERENCE_WORKERS', '2'))  # Decode/encode threads
+DETECTOR_SLOTS = 1  # Threads inside detect_frame/check_littering at once
+MAX_PENDING = int(os.environ.get('YOLO_MAX_PENDING', '16'))  # Queued + running jobs before 429
+UPLOAD_TIMEOUT = float(os.environ.get('YOLO_UPLOAD_TIMEOUT', '5'))  # Seconds to receive the request body
+REQUEST_DEADLINE = float(os.environ.get('YOLO_REQUEST_DEADLINE', '10'))  # Seconds for the whole request
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference')
+detector = None
+detector_ready = False
+# The model and the detector's person tracks are not thread-safe
+detector_lock = threading.Lock()
+
+
+class Backpressure:
+    """Counts executor jobs; only touched from the event loop, so no lock"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def try_acquire(self):
+        if self.pending >= self.limit:
+            self.rejected += 1
+            return False
+        self.pending += 1
+        return True
+
+    def release(self):
+        self.pending -= 1
+        self.completed += 1
+
+
+backpressure = Backpressure(MAX_PENDING)
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time before or during its executor job"""
+
+
+def load_detector():
+    """Load and warm up the model (runs on the executor at startup)"""
+    global detector, detector_ready
+    print(f"🚀 Initializing YOLOv8 detector (pid {os.getpid()})...")
+    detector = YOLOv8GarbageDetector(model_path=MODEL_PATH, confidence_threshold=CONFIDENCE_THRESHOLD)
+
+    start = time.time()
+    detector.detect_batch([np.zeros((WARMUP_SIZE, WARMUP_SIZE, 3), dtype=np.uint8)])
+    detector_ready = True
+    print(f"🔥 Model warmed up in {(time.time() - start) * 1000:.0f}ms")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    os.makedirs('./screenshots', exist_ok=True)
+    await asyncio.get_running_loop().run_in_executor(executor, load_detector)
+    yield
+    executor.shutdown(wait=False)
+
+
+def error_response(message, status_code, **extra):
+    return JSONResponse({'success': False, 'message': message, **extra}, status_code=status_code)
+
+
+def requested_format(request):
+    """
+    Response format from ?format= or the Accept header
+
+    Returns:
+        (format, None) or (None, error response)
+    """
+    response_format = negotiate_format(request.query_params.get('format'), request.headers.get('accept'))
+    if response_format is None:
+        return None, error_response(f"Unknown format, expected one of: {', '.join(FORMATS)}", 400)
+    if not format_available(response_format):
+        return None, error_response('msgpack responses need the msgpack package installed on the server', 406)
+    return response_format, None
+
+
+async def offload(fn, *args, deadline):
+    """
+    Run fn on the inference executor under a deadline
+
+    The caller must hold a backpressure slot; it is released when the job
+    actually leaves the executor, so abandoned jobs still count as load.
+
+    Raises:
+        DeadlineExceeded if the deadline passes first; a job that has not
+        started yet is cancelled, a running one finishes in the background
+    """
+    loop = asyncio.get_running_loop()
+    job = executor.submit(fn, *args, deadline)
+    job.add_done_callback(lambda _: loop.call_soon_threadsafe(backpressure.release))
+
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(job), max(0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        backpressure.timed_out += 1
+        raise DeadlineExceeded()
+
+
+def check_deadline(deadline):
+    """Skip work whose caller has already given up (jobs that waited in the queue too long)"""
+    if time.monotonic() > deadline:
+        raise DeadlineExceeded()
+
+
+def run_detection(frame, camera_id, location, response_format, include_bbox, deadline):
+    """
+    Detection, littering check and response encoding for one frame (executor thread)
+
+    Returns:
+        (body bytes, media type, headers)
+    """
+    check_deadline(deadline)
+    det = detector
+    with detector_lock:
+        check_deadline(deadline)
+        detections = det.detect_frame(frame)
+        littering_events = det.check_littering(detections, camera_id, location) or []
+
+    alerts = []
+    for event in littering_events:
+        # Screenshot and complaint are handled by the evidence workers
+        det.submit_evidence(frame, event)
+        alerts.append({
+            'type': 'littering',
+            'camera_id': event['camera_id'],
+            'location': event['location'],
+            'garbage_type': event['garbage_type'],
+            'timestamp': event['timestamp'].isoformat()
+        })
+
+    body = {
+        'success': True,
+        'camera_id': camera_id,
+        'location': location,
+        'alerts': alerts
+    }
+
+    if needs_annotation(response_format):
+        annotated_frame = det.draw_detections(frame, detections)
+
+    if response_format == FORMAT_JPEG:
+        return encode_jpeg(annotated_frame), MIME_TYPES[FORMAT_JPEG], {
+            'X-Garbage-Count': str(len(detections['garbage'])),
+            'X-Person-Count': str(len(detections['persons'])),
+            'X-Littering-Alerts': str(len(alerts))
+        }
+
+    if response_format == FORMAT_MSGPACK:
+        body['detections'] = {
+            'garbage': pack_result(detections['garbage'], det.garbage_classes),
+            'persons': pack_result(detections['persons'])
+        }
+        return encode_msgpack(body), MIME_TYPES[FORMAT_MSGPACK], {}
+
+    if response_format == FORMAT_BOXES:
+        body.update(serialize_detections(det, detections))
+    else:
+        body.update(serialize_detections(det, detections, include_bbox))
+        body['annotated_image'] = jpeg_data_url(annotated_frame)
+    return json.dumps(body).encode('utf-8'), 'application/json', {}
+
+
+def decode_and_detect(img_bytes, img_b64, camera_id, location, response_format, deadline):
+    check_deadline(deadline)
+    frame = decode_image(img_bytes) if img_bytes is not None else decode_base64_image(img_b64)
+    if frame is None:
+        raise ValueError('Could not decode image')
+    return run_detection(frame, camera_id, location, response_format, True, deadline)
+
+
+def capture_and_detect(camera_index, camera_id, location, response_format, deadline):
+    check_deadline(deadline)
+    cap = cv2.VideoCapture(camera_index)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        raise IOError('Failed to capture from webcam')
+    return run_detection(frame, camera_id, location, response_format, False, deadline)
+
+
+async def handle_offloaded(request, read_input, job):
+    """
+    Shared flow for detection endpoints
+
+    The request body is read on the event loop under UPLOAD_TIMEOUT before an
+    executor slot is taken, so slow uploads never hold an executor worker.
+
+    Args:
+        read_input: async fn(request) -> tuple of job args
+        job: Sync fn(*args, response_format, deadline) run on the executor
+    """
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    response_format, error = requested_format(request)
+    if error:
+        return error
+
+    if not detector_ready:
+        return error_response('Model is still loading', 503)
+
+    try:
+        args = await asyncio.wait_for(read_input(request), UPLOAD_TIMEOUT)
+    except asyncio.TimeoutError:
+        return error_response('Request body not received in time', 408)
+    except (ValueError, KeyError) as e:
+        return error_response(str(e), 400)
+
+    if not backpressure.try_acquire():
+        return JSONResponse({
+            'success': False,
+            'message': 'Server busy, retry shortly',
+            'pending': backpressure.pending
+        }, status_code=429, headers={'Retry-After': '1'})
+
+    try:
+        content, media_type, headers = await offload(job, *args, response_format, deadline=deadline)
+    except DeadlineExceeded:
+        return error_response('Request deadline exceeded', 504)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        print(f"❌ Detection error: {e}")
+        return error_response('Detection failed', 500, error=str(e))
+
+    return Response(content, media_type=media_type, headers=headers)
+
+
+async def read_image_input(request):
+    """(img_bytes, img_b64, camera_id, location) from multipart or JSON"""
+    if request.headers.get('content-type', '').startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get('image')
+        if upload is None:
+            raise ValueError('No image provided')
+        return (await upload.read(), None,
+                form.get('camera_id', 'unknown'), form.get('location', 'Unknown Location'))
+
+    data = await request.json()
+    if 'image' not in data:
+        raise ValueError('No image provided')
+    return (None, data['image'],
+            data.get('camera_id', 'unknown'), data.get('location', 'Unknown Location'))
+
+
+async def read_webcam_input(request):
+    """(camera_index, camera_id, location) from the JSON body"""
+    data = await request.json() if await request.body() else {}
+    return (data.get('camera_index', 0),
+            data.get('camera_id', 'webcam'), data.get('location', 'Admin Office'))
+
+
+async def detect_image(request):
+    """
+    Detect garbage in a single image
+
+    Same request body and response formats as the Flask /detect/image.
+    Littering screenshots and complaints are produced in the background.
+    """
+    return await handle_offloaded(request, read_image_input, decode_and_detect)
+
+
+async def detect_from_webcam(request):
+    """Capture a frame from a local webcam and detect (the capture also runs on the executor)"""
+    return await handle_offloaded(request, read_webcam_input, capture_and_detect)
+
+
+async def health_check(request):
+    return JSONResponse({
+        'status': 'running',
+        'service': 'YOLOv8 Detection API (ASGI)',
+        'version': '1.0.0',
+        'detector_ready': detector_ready
+    })
+
+
+async def liveness(request):
+    return JSONResponse({'status': 'alive', 'pid': os.getpid()})
+
+
+async def readiness(request):
+    if not detector_ready:
+        return JSONResponse({'status': 'loading', 'pid': os.getpid()}, status_code=503)
+    return JSONResponse({'status': 'ready', 'pid': os.getpid()})
+
+
+async def executor_metrics(request):
+    """Backpressure counters and evidence queue stats"""
+    return JSONResponse({
+        'success': True,
+        'executor': {
+            'workers': INFERENCE_WORKERS,
+            'detector_slots': DETECTOR_SLOTS,
+            'max_pending': MAX_PENDING,
+            'pending': backpressure.pending,
+            'completed': backpressure.completed,
+            'rejected': backpressure.rejected,
+            'timed_out': backpressure.timed_out
+        },
+        'evidence': detector.evidence_pool.get_stats() if detector else None
+    })
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health_check),
+        Route('/health/live', liveness),
+        Route('/health/ready', readiness),
+        Route('/detect/image', detect_image, methods=['POST']),
+        Route('/detect/webcam', detect_from_webcam, methods=['POST']),
+        Route('/metrics/executor', executor_metrics)
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("\n" + "="*60)
+    print("🎥 YOLOv8 CCTV Detection API Server (ASGI)")
+    print("="*60)
+    print(f"⚙️  {INFERENCE_WORKERS} executor workers ({DETECTOR_SLOTS} in detection at a time), {MAX_PENDING} max pending, "
+          f"{REQUEST_DEADLINE}s deadline")
+    print("📊 Endpoints:")
+    print("   GET  /health - Health check")
+    print("   GET  /health/live - Liveness probe")
+    print("   GET  /health/ready - Readiness probe (model loaded)")
+    print("   POST /detect/image - Detect in uploaded image")
+    print("   POST /detect/webcam - Capture and detect from webcam")
+    print("   GET  /metrics/executor - Queue and backpressure stats")
+    print("="*60 + "\n")
+
+    uvicorn.run(app, host='0.0.0.0', port=5000)
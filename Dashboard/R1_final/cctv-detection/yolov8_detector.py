@@ -5,57 +5,54 @@ Real-time detection of garbage and littering with auto-complaint generation
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import time
 from datetime import datetime
 import requests
 import json
+import os
 import threading
 import queue
 from collections import defaultdict
+from backend_client import get_backend_client
+from inference_scheduler import BatchInferenceScheduler
+from frame_grabber import LatestFrameGrabber
+from evidence_pipeline import EvidenceWorkerPool
+from incident_outbox import IncidentOutbox
+from camera_shards import CameraShardPool
+from detection_engine import DetectionEngine
 
 class YOLOv8GarbageDetector:
-    def __init__(self, model_path='yolov8n.pt', confidence_threshold=0.5):
+    def __init__(self, model_path='yolov8n.pt', confidence_threshold=0.5,
+                 inference_backend=None, precision=None, garbage_classes=None):
         """
         Initialize YOLOv8 Garbage Detector
         
         Args:
             model_path: Path to YOLOv8 model (yolov8n.pt, yolov8s.pt, yolov8m.pt, yolov8l.pt, yolov8x.pt)
             confidence_threshold: Minimum confidence for detections (0.0 to 1.0)
+            inference_backend: 'torch', 'onnxruntime', 'openvino' or 'auto'
+                (default: YOLO_BACKEND environment variable, else 'torch')
+            precision: 'fp32' or 'int8' (static INT8 ONNX model, see model_quantization.py)
+            garbage_classes: {class_id: name} map overriding the built-in garbage set
         """
         print("🚀 Loading YOLOv8 model...")
-        self.model = YOLO(model_path)
+        self.engine = DetectionEngine(
+            model_path, confidence_threshold,
+            garbage_classes=garbage_classes,
+            inference_backend=inference_backend,
+            precision=precision
+        )
+        self.inference = self.engine.inference
+        print(f"⚙️ Inference backend: {self.inference.name}")
+        self.model_path = model_path
+        self.precision = precision
         self.confidence_threshold = confidence_threshold
+        self.garbage_classes = self.engine.garbage_classes
+        self.person_class_id = self.engine.person_class_id
+        self.inference_classes = self.engine.inference_classes
         
-        # Garbage-related class IDs from COCO dataset
-        self.garbage_classes = {
-            39: 'bottle',
-            40: 'wine glass',
-            41: 'cup',
-            42: 'fork',
-            43: 'knife',
-            44: 'spoon',
-            45: 'bowl',
-            46: 'banana',
-            47: 'apple',
-            48: 'sandwich',
-            49: 'orange',
-            50: 'broccoli',
-            51: 'carrot',
-            52: 'hot dog',
-            53: 'pizza',
-            54: 'donut',
-            55: 'cake',
-            # Add custom garbage classes if you train custom model
-            # 80: 'plastic bag',
-            # 81: 'waste',
-            # 82: 'litter'
-        }
-        
-        # Person detection for littering tracking
-        self.person_class_id = 0
-        
-        # Tracking data
+        # Tracking data (request threads and camera threads share it)
+        self.tracking_lock = threading.Lock()
         self.person_tracks = defaultdict(lambda: {
             'last_seen': time.time(),
             'garbage_nearby': False,
@@ -64,11 +61,22 @@ class YOLOv8GarbageDetector:
         })
         
         # Backend API
-        self.api_url = "http://localhost:3001/api"
+        self.backend = get_backend_client()
+        self.api_url = self.backend.base_url
+        
+        # Complaints are recorded on disk before sending and replayed if the backend is down
+        self.outbox = IncidentOutbox('./outbox/littering.db', self.backend).start_drainer()
         
         # Detection buffer
         self.detection_queue = queue.Queue()
         
+        # Screenshots and auto-complaints for live streams run off the capture thread
+        self.evidence_pool = EvidenceWorkerPool(num_workers=2, name='littering-evidence')
+        self.evidence_stages = [
+            ('screenshot', self._evidence_screenshot_stage),
+            ('complaint', self._evidence_complaint_stage)
+        ]
+        
         print("✅ YOLOv8 Detector Ready!")
         print(f"📊 Confidence Threshold: {confidence_threshold}")
         print(f"🎯 Tracking {len(self.garbage_classes)} garbage classes")
@@ -78,71 +86,44 @@ class YOLOv8GarbageDetector:
         Run YOLOv8 detection on a single frame
         
         Returns:
-            detections: List of detected objects with bounding boxes
+            detections: Dict with 'garbage' and 'persons' DetectionResults
         """
-        results = self.model(frame, conf=self.confidence_threshold)[0]
-        
-        detections = {
-            'garbage': [],
-            'persons': [],
-            'frame': frame,
-            'timestamp': datetime.now()
-        }
-        
-        # Process detections
-        for box in results.boxes:
-            class_id = int(box.cls[0])
-            confidence = float(box.conf[0])
-            bbox = box.xyxy[0].cpu().numpy()
-            
-            detection_data = {
-                'class_id': class_id,
-                'class_name': results.names[class_id],
-                'confidence': confidence,
-                'bbox': bbox,
-                'center': ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
-            }
-            
-            # Check if it's garbage
-            if class_id in self.garbage_classes:
-                detection_data['garbage_type'] = self.garbage_classes[class_id]
-                detections['garbage'].append(detection_data)
-            
-            # Check if it's a person
-            elif class_id == self.person_class_id:
-                detections['persons'].append(detection_data)
+        return self.detect_batch([frame])[0]
+    
+    def detect_batch(self, frames):
+        """
+        Run YOLOv8 detection on several frames in a single model call
         
+        Returns:
+            List of detections, one per input frame
+        """
+        detections = self.engine.detect_batch(frames)
+        for frame_detections, frame in zip(detections, frames):
+            frame_detections['frame'] = frame
+        return detections
+    
+    def parse_results(self, result, frame):
+        """
+        Split a DetectionResult into garbage and person detections
+        """
+        detections = self.engine.split(result)
+        detections['frame'] = frame
         return detections
     
+    def detections_to_dicts(self, detections):
+        """
+        Dict view of detections for JSON responses
+        """
+        return {
+            'garbage': detections['garbage'].to_dicts(self.garbage_classes),
+            'persons': detections['persons'].to_dicts()
+        }
+    
     def draw_detections(self, frame, detections):
         """
         Draw bounding boxes and labels on frame
         """
-        annotated_frame = frame.copy()
-        
-        # Draw garbage detections (RED)
-        for garbage in detections['garbage']:
-            bbox = garbage['bbox'].astype(int)
-            cv2.rectangle(annotated_frame, 
-                         (bbox[0], bbox[1]), (bbox[2], bbox[3]), 
-                         (0, 0, 255), 2)
-            
-            label = f"{garbage.get('garbage_type', garbage['class_name'])} {garbage['confidence']:.2f}"
-            cv2.putText(annotated_frame, label,
-                       (bbox[0], bbox[1] - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-        
-        # Draw person detections (GREEN)
-        for person in detections['persons']:
-            bbox = person['bbox'].astype(int)
-            cv2.rectangle(annotated_frame,
-                         (bbox[0], bbox[1]), (bbox[2], bbox[3]),
-                         (0, 255, 0), 2)
-            
-            label = f"Person {person['confidence']:.2f}"
-            cv2.putText(annotated_frame, label,
-                       (bbox[0], bbox[1] - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        annotated_frame = self.engine.draw(frame.copy(), detections)
         
         # Add statistics
         stats_text = f"Garbage: {len(detections['garbage'])} | Persons: {len(detections['persons'])}"
@@ -152,62 +133,85 @@ class YOLOv8GarbageDetector:
         
         return annotated_frame
     
+    def get_tracker(self, camera_id):
+        """
+        Get (or create) the person tracker for a camera
+        """
+        return self.engine.get_tracker(camera_id)
+    
+    def predict_detections(self, detections, frame, camera_id='cam_1'):
+        """
+        Carry detections forward to a frame where inference was skipped
+        
+        Person boxes come from the tracker's motion prediction; garbage is
+        assumed to stay where it was last detected.
+        """
+        with self.tracking_lock:
+            predicted = self.engine.predict(detections, camera_id)
+        predicted['frame'] = frame
+        return predicted
+    
     def check_littering(self, detections, camera_id='cam_1', location='Unknown'):
         """
         Check if someone is littering (person near garbage)
         Generate auto-complaint if littering detected
+        
+        Safe to call from several threads: trackers and person tracks are
+        updated under tracking_lock.
         """
+        with self.tracking_lock:
+            return self._check_littering(detections, camera_id, location)
+    
+    def _check_littering(self, detections, camera_id, location):
         garbage_items = detections['garbage']
         persons = detections['persons']
         
-        if not garbage_items or not persons:
+        # Keep person IDs stable across frames
+        self.engine.track(detections, camera_id)
+        
+        if len(garbage_items) == 0 or len(persons) == 0:
             return None
         
         # Check proximity between persons and garbage
         littering_events = []
         
-        for person in persons:
-            person_center = person['center']
+        # All person-garbage pairs within 100 pixels (potential littering)
+        person_idx, garbage_idx, _ = self.engine.near_pairs(detections, 100)
+        
+        # Count each person once per frame, against their first nearby item
+        person_idx, first_pair = np.unique(person_idx, return_index=True)
+        
+        for pi, gi in zip(person_idx, garbage_idx[first_pair]):
+            garbage_type = garbage_items.label(gi, self.garbage_classes)
+            
+            # Track this person
+            person_id = f"{camera_id}_{persons.track_ids[pi]}"
             
-            for garbage in garbage_items:
-                garbage_center = garbage['center']
+            if person_id not in self.person_tracks:
+                self.person_tracks[person_id] = {
+                    'last_seen': time.time(),
+                    'garbage_nearby': True,
+                    'frames_with_garbage': 1,
+                    'screenshot_taken': False
+                }
+            else:
+                self.person_tracks[person_id]['frames_with_garbage'] += 1
+                self.person_tracks[person_id]['last_seen'] = time.time()
+            
+            # If person near garbage for 5+ frames and no screenshot taken
+            if (self.person_tracks[person_id]['frames_with_garbage'] >= 5 and 
+                not self.person_tracks[person_id]['screenshot_taken']):
                 
-                # Calculate distance
-                distance = np.sqrt(
-                    (person_center[0] - garbage_center[0])**2 +
-                    (person_center[1] - garbage_center[1])**2
-                )
+                littering_events.append({
+                    'person_id': person_id,
+                    'garbage_type': garbage_type,
+                    'camera_id': camera_id,
+                    'location': location,
+                    'timestamp': datetime.now(),
+                    'frame': detections['frame']
+                })
                 
-                # If person is within 100 pixels of garbage, potential littering
-                if distance < 100:
-                    # Track this person
-                    person_id = f"{camera_id}_{int(person_center[0])}_{int(person_center[1])}"
-                    
-                    if person_id not in self.person_tracks:
-                        self.person_tracks[person_id] = {
-                            'last_seen': time.time(),
-                            'garbage_nearby': True,
-                            'frames_with_garbage': 1,
-                            'screenshot_taken': False
-                        }
-                    else:
-                        self.person_tracks[person_id]['frames_with_garbage'] += 1
-                        self.person_tracks[person_id]['last_seen'] = time.time()
-                    
-                    # If person near garbage for 5+ frames and no screenshot taken
-                    if (self.person_tracks[person_id]['frames_with_garbage'] >= 5 and 
-                        not self.person_tracks[person_id]['screenshot_taken']):
-                        
-                        littering_events.append({
-                            'person_id': person_id,
-                            'garbage_type': garbage.get('garbage_type', 'unknown'),
-                            'camera_id': camera_id,
-                            'location': location,
-                            'timestamp': datetime.now(),
-                            'frame': detections['frame']
-                        })
-                        
-                        self.person_tracks[person_id]['screenshot_taken'] = True
+                self.person_tracks[person_id]['screenshot_taken'] = True
         
         # Clean up old tracks (not seen in 5 seconds)
         current_time = time.time()
@@ -218,17 +222,28 @@ class YOLOv8GarbageDetector:
         
         return littering_events
     
-    def save_screenshot(self, frame, event_data):
+    def write_screenshot(self, frame, event_data):
         """
-        Save screenshot of littering event and upload to backend
+        Save screenshot of littering event locally
+        
+        Returns:
+            Local file path
         """
         timestamp = event_data['timestamp'].strftime('%Y%m%d_%H%M%S')
         filename = f"littering_{event_data['camera_id']}_{timestamp}.jpg"
         filepath = f"./screenshots/{filename}"
         
-        # Save locally
         cv2.imwrite(filepath, frame)
         print(f"📸 Screenshot saved: {filepath}")
+        return filepath
+    
+    def save_screenshot(self, frame, event_data):
+        """
+        Save screenshot of littering event and upload to backend
+        """
+        filepath = self.write_screenshot(frame, event_data)
+        filename = os.path.basename(filepath)
+        timestamp = event_data['timestamp'].strftime('%Y%m%d_%H%M%S')
         
         # Upload to backend
         try:
@@ -240,8 +255,8 @@ class YOLOv8GarbageDetector:
                     'timestamp': timestamp
                 }
                 
-                response = requests.post(
-                    f"{self.api_url}/upload/cctv-screenshot",
+                response = self.backend.post(
+                    "/upload/cctv-screenshot",
                     files=files,
                     data=data,
                     timeout=10
@@ -259,9 +274,13 @@ class YOLOv8GarbageDetector:
             print(f"⚠️ Upload error: {e}")
             return filepath
     
-    def generate_auto_complaint(self, event_data, screenshot_path):
+    def generate_auto_complaint(self, event_data, screenshot_path, send_now=True):
         """
         Generate automatic complaint via backend API
+        
+        Args:
+            send_now: Send right away; False only records it in the outbox
+                for the drainer (no network calls on the caller's thread)
         """
         try:
             complaint_data = {
@@ -283,119 +302,304 @@ This complaint was automatically generated when CCTV detected a person littering
                 'screenshot_path': screenshot_path
             }
             
-            # Send to backend
-            response = requests.post(
-                f"{self.api_url}/tickets",
-                json=complaint_data,
-                timeout=5
-            )
+            job = {'request': {'path': '/tickets', 'json': complaint_data}}
+            
+            # Screenshot upload failed earlier: upload it again when the complaint is replayed
+            if screenshot_path and not screenshot_path.startswith('http') and os.path.exists(screenshot_path):
+                job['uploads'] = [{
+                    'field': 'screenshot_path',
+                    'path': screenshot_path,
+                    'endpoint': '/upload/cctv-screenshot',
+                    'form_field': 'image',
+                    'data': {
+                        'camera_id': event_data['camera_id'],
+                        'location': event_data['location'],
+                        'timestamp': event_data['timestamp'].strftime('%Y%m%d_%H%M%S')
+                    }
+                }]
+            
+            # Record in the outbox, then send to backend
+            result = self.outbox.submit('auto_complaint', job, send_now=send_now)
             
-            if response.status_code == 201:
-                print(f"✅ Auto-complaint created: {response.json().get('ticket_id')}")
-                return response.json()
+            if result is not None:
+                print(f"✅ Auto-complaint created: {result.get('ticket_id')}")
+                return result
             else:
-                print(f"⚠️ Failed to create complaint: {response.status_code}")
+                print(f"📥 Auto-complaint kept in outbox for retry")
                 return None
                 
         except Exception as e:
             print(f"❌ Error creating auto-complaint: {e}")
             return None
     
-    def process_camera_stream(self, camera_source, camera_id='cam_1', location='Unknown'):
+    def _evidence_screenshot_stage(self, job):
+        return {'screenshot_path': self.save_screenshot(job['frame'], job['event'])}
+    
+    def _evidence_complaint_stage(self, job):
+        self.generate_auto_complaint(job['event'], job['screenshot_path'])
+    
+    def submit_evidence(self, frame, event):
+        """
+        Hand a littering event's screenshot and auto-complaint to the evidence workers
+        
+        If their queue is full, the screenshot is written here and the
+        complaint goes straight into the outbox (the drainer uploads and
+        sends it), so the event is never dropped.
+        
+        Returns:
+            True if queued for the workers, False if it went to the outbox
+        """
+        if self.evidence_pool.submit(event['person_id'], self.evidence_stages, {
+            'frame': frame,
+            'event': event
+        }):
+            return True
+        
+        screenshot_path = self.write_screenshot(frame, event)
+        self.generate_auto_complaint(event, screenshot_path, send_now=False)
+        return False
+    
+    def process_camera_stream(self, camera_source, camera_id='cam_1', location='Unknown',
+                              scheduler=None, latest_frame_only=False, detect_interval=1,
+                              stop_event=None, display=True, stats=None, frame_sink=None):
         """
         Process live camera stream
         
+        Returns when the stream ends or fails, 'q' is pressed, or stop_event is set.
+        
         Args:
             camera_source: Camera index (0, 1, 2) or RTSP URL
             camera_id: Unique identifier for this camera
             location: Physical location of the camera
+            scheduler: Optional BatchInferenceScheduler shared with other cameras
+            latest_frame_only: Grab frames on a separate thread and always process
+                the newest one, dropping frames that arrive while inference runs
+            detect_interval: Run detection on every k-th frame only; the person
+                tracker predicts positions on the frames in between
+            stop_event: Optional threading.Event that ends the stream when set
+            display: Show annotated frames in a window (False for headless servers)
+            stats: Optional CameraStats updated with FPS, latency and errors
+            frame_sink: Optional callable receiving each annotated frame (e.g. a
+                shared memory slot read by another process)
+        
+        Returns:
+            True if the stream was stopped on request, False if it failed or ended
         """
         print(f"📹 Starting camera stream: {camera_id} at {location}")
         
-        cap = cv2.VideoCapture(camera_source)
+        if latest_frame_only:
+            cap = LatestFrameGrabber(camera_source, width=1280, height=720).start()
+        else:
+            cap = cv2.VideoCapture(camera_source)
         
         if not cap.isOpened():
             print(f"❌ Failed to open camera: {camera_source}")
-            return
+            if stats is not None:
+                stats.record_error(f"Failed to open camera: {camera_source}")
+            cap.release()
+            return False
         
-        # Set resolution
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        if not latest_frame_only:
+            # Set resolution
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
         
         frame_count = 0
         fps = 0
         fps_start_time = time.time()
+        detections = None
+        stopped = False
+        if stats is not None:
+            stats.begin_connection()
         
         while True:
+            if stop_event is not None and stop_event.is_set():
+                stopped = True
+                break
+            
             ret, frame = cap.read()
             if not ret:
                 print(f"⚠️ Failed to read frame from {camera_id}")
+                if stats is not None:
+                    stats.record_error('Failed to read frame')
                 break
             
             frame_count += 1
             
-            # Process every frame (YOLOv8 is fast enough)
-            detections = self.detect_frame(frame)
-            
-            # Check for littering
-            littering_events = self.check_littering(detections, camera_id, location)
+            if detections is None or frame_count % detect_interval == 0:
+                # Detect (batched with other cameras when a scheduler is given)
+                inference_start = time.time()
+                if scheduler is not None:
+                    detections = scheduler.infer(frame)
+                else:
+                    detections = self.detect_frame(frame)
+                if stats is not None:
+                    stats.record_inference((time.time() - inference_start) * 1000)
+                
+                # Check for littering
+                littering_events = self.check_littering(detections, camera_id, location)
+            else:
+                # Skipped frame: let the tracker predict where people moved
+                detections = self.predict_detections(detections, frame, camera_id)
+                littering_events = None
             
             # Handle littering events
             if littering_events:
                 for event in littering_events:
                     print(f"🚨 LITTERING DETECTED: {event['garbage_type']} at {event['location']}")
                     
-                    # Save screenshot
-                    screenshot_path = self.save_screenshot(frame, event)
-                    
-                    # Generate auto-complaint
-                    self.generate_auto_complaint(event, screenshot_path)
-            
-            # Draw detections
-            annotated_frame = self.draw_detections(frame, detections)
+                    # Save screenshot and generate auto-complaint in the background
+                    self.submit_evidence(frame.copy(), event)
             
             # Calculate FPS
             if frame_count % 30 == 0:
                 fps = 30 / (time.time() - fps_start_time)
                 fps_start_time = time.time()
+                if stats is not None and latest_frame_only:
+                    stats.record_dropped(cap.get_stats()['frames_dropped'])
+            
+            if stats is not None:
+                stats.record_frame(fps)
+            
+            if not display and frame_sink is None:
+                continue
+            
+            # Draw detections
+            annotated_frame = self.draw_detections(frame, detections)
             
             # Add FPS to frame
             cv2.putText(annotated_frame, f"FPS: {fps:.1f}",
                        (10, 60),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             
+            if frame_sink is not None:
+                frame_sink(annotated_frame)
+            
+            if not display:
+                continue
+            
             # Display
             cv2.imshow(f'CCTV - {camera_id}', annotated_frame)
             
             # Break on 'q' key
             if cv2.waitKey(1) & 0xFF == ord('q'):
+                stopped = True
                 break
         
         cap.release()
-        cv2.destroyAllWindows()
+        if display:
+            cv2.destroyAllWindows()
+        
+        if latest_frame_only:
+            grab_stats = cap.get_stats()
+            if stats is not None:
+                stats.record_dropped(grab_stats['frames_dropped'])
+            print(f"📉 {camera_id}: {grab_stats['frames_dropped']} of {grab_stats['frames_grabbed']} frames dropped")
+        
+        # Let pending evidence finish uploading
+        self.evidence_pool.drain()
+        
         print(f"📹 Camera stream {camera_id} stopped")
+        return stopped
     
-    def run_multi_camera(self, camera_configs):
+    def run_multi_camera(self, camera_configs, batch_size=8, max_wait_ms=20,
+                         latest_frame_only=True, detect_interval=1, num_processes=0):
         """
         Run multiple camera streams in parallel
         
+        Each camera thread only captures frames and handles its own littering
+        events; inference for all cameras goes through one batched scheduler.
+        
         Args:
             camera_configs: List of dict with 'source', 'id', 'location'
+            batch_size: Maximum frames per batched model call
+            max_wait_ms: Maximum time to wait for a batch to fill up
+            latest_frame_only: Drop stale frames instead of queueing them per camera
+            detect_interval: Run detection on every k-th frame per camera
+            num_processes: Shard cameras across this many worker processes, each
+                with its own model (0 = threads in this process)
         """
+        if num_processes:
+            return self.run_sharded_cameras(camera_configs, num_processes, batch_size,
+                                            max_wait_ms, latest_frame_only, detect_interval)
+        
+        scheduler = BatchInferenceScheduler(
+            self.detect_batch,
+            max_batch_size=batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue_size=max(batch_size * 2, len(camera_configs))
+        ).start()
+        
         threads = []
         
         for config in camera_configs:
             thread = threading.Thread(
                 target=self.process_camera_stream,
-                args=(config['source'], config['id'], config['location'])
+                args=(config['source'], config['id'], config['location'],
+                      scheduler, latest_frame_only, detect_interval)
             )
             thread.daemon = True
             thread.start()
             threads.append(thread)
         
         # Wait for all threads
-        for thread in threads:
-            thread.join()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            scheduler.stop()
+            stats = scheduler.get_stats()
+            print(f"🧮 Inference stats: {stats['frames_inferred']} frames in "
+                  f"{stats['batches_run']} batches (avg batch {stats['avg_batch_size']:.1f})")
+    
+    def run_sharded_cameras(self, camera_configs, num_processes=None, batch_size=8, max_wait_ms=20,
+                            latest_frame_only=True, detect_interval=1, stats_interval=10):
+        """
+        Run cameras in worker processes and display their annotated frames here
+        
+        Each worker loads its own copy of this detector's model; frames come
+        back through shared memory. Press 'q' to stop all shards.
+        
+        Args:
+            num_processes: Worker processes (default: one per core, at most one per camera)
+            stats_interval: Seconds between per-camera stats printouts
+        """
+        pool = CameraShardPool(
+            camera_configs,
+            num_processes=num_processes,
+            detector_kwargs={
+                'model_path': self.model_path,
+                'confidence_threshold': self.confidence_threshold,
+                'inference_backend': self.inference.name,
+                'precision': self.precision,
+                'garbage_classes': self.garbage_classes
+            },
+            batch_size=batch_size,
+            max_wait_ms=max_wait_ms,
+            latest_frame_only=latest_frame_only,
+            detect_interval=detect_interval
+        ).start()
+        
+        last_stats = time.time()
+        try:
+            while pool.is_alive():
+                for config in camera_configs:
+                    frame = pool.latest_frame(config['id'])
+                    if frame is not None:
+                        cv2.imshow(f"CCTV - {config['id']}", frame)
+                
+                if cv2.waitKey(10) & 0xFF == ord('q'):
+                    break
+                
+                if time.time() - last_stats >= stats_interval:
+                    last_stats = time.time()
+                    for camera_id, stats in pool.get_stats().items():
+                        print(f"📊 {camera_id} [shard {stats['shard']}]: {stats['state']}, "
+                              f"{stats['fps']} FPS, {stats['inference_ms']}ms inference, "
+                              f"{stats['frames_dropped']} dropped")
+        finally:
+            pool.stop()
+            cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -406,6 +610,8 @@ if __name__ == "__main__":
     
     # Initialize detector with YOLOv8 nano (fastest)
     # For better accuracy, use: yolov8s.pt, yolov8m.pt, yolov8l.pt, or yolov8x.pt
+    # On CPU, pair larger models with precision='int8'; compare options with
+    # `python model_quantization.py report` before switching
     detector = YOLOv8GarbageDetector(
         model_path='yolov8n.pt',  # Change to yolov8x.pt for best accuracy
         confidence_threshold=0.5
@@ -426,4 +632,7 @@ if __name__ == "__main__":
     #     {'source': 'rtsp://192.168.1.100:554/stream', 'id': 'cam_2', 'location': 'Park Area'},
     #     {'source': 'rtsp://192.168.1.101:554/stream', 'id': 'cam_3', 'location': 'Market Square'}
     # ]
-    # detector.run_multi_camera(camera_configs)
+    # detector.run_multi_camera(camera_configs, batch_size=8, max_wait_ms=20)
+    
+    # Multi-process mode: one model per worker process (uncomment to use)
+    # detector.run_multi_camera(camera_configs, num_processes=2)